@@ -8,6 +8,7 @@ from seguimientos.views import SeguimientoViewSet
 from evaluaciones.views import EvaluacionViewSet
 from auditoria.views import AuditoriaViewSet
 from reportes.views import ReporteViewSet
+from repositorio.views import RepositorioSearchViewSet
 
 router = DefaultRouter()
 router.register(r'proyectos', ProyectoViewSet)
@@ -19,5 +20,6 @@ router.register(r'seguimientos', SeguimientoViewSet)
 router.register(r'evaluaciones', EvaluacionViewSet)
 router.register(r'auditoria', AuditoriaViewSet)
 router.register(r'reportes', ReporteViewSet, basename='reportes')
+router.register(r'repositorio', RepositorioSearchViewSet, basename='repositorio-api')
 
 urlpatterns = router.urls
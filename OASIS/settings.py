@@ -125,6 +125,15 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Protected downloads: 'django' streams them through the worker (development),
+# 'nginx' hands the transfer to nginx with X-Accel-Redirect after the
+# permission check. Each filesystem root maps to an `internal` location.
+FILE_DOWNLOAD_MODE = config('FILE_DOWNLOAD_MODE', default='django')
+X_ACCEL_LOCATIONS = {
+    str(MEDIA_ROOT): '/protected/media/',
+    str(BASE_DIR / 'backups'): '/protected/backups/',
+}
+
 # Max upload size: 50MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 52428800
 FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800
@@ -152,6 +161,7 @@ REST_FRAMEWORK = {
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/day',
         'user': '1000/day',
+        'repositorio': '120/minute',
     },
 }
 
@@ -263,3 +273,33 @@ else:
             'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         }
     }
+
+# ─── Repositorio: buffered counters ──────────────────────────────────────────
+# Seconds between flushes of the per-process counter buffer (LocMem setups);
+# also what a killed worker can lose. With Redis, run
+# `python manage.py flush_counters --loop <seconds>` instead (docker-compose:
+# the `contadores` service).
+REPOSITORIO_COUNTER_FLUSH_INTERVAL = config('REPOSITORIO_COUNTER_FLUSH_INTERVAL', default=10, cast=int)
+
+# ─── Repositorio: asynchronous download audit ────────────────────────────────
+# RegistroDescarga rows are queued in-process and bulk-inserted every N seconds.
+REPOSITORIO_AUDIT_FLUSH_INTERVAL = config('REPOSITORIO_AUDIT_FLUSH_INTERVAL', default=2, cast=int)
+REPOSITORIO_AUDIT_QUEUE_SIZE = config('REPOSITORIO_AUDIT_QUEUE_SIZE', default=10000, cast=int)
+
+# ─── Repositorio: content-addressed file storage ─────────────────────────────
+# Unreferenced blobs younger than this are kept (uploads reusing them in flight).
+# Run `python manage.py gc_blobs` periodically to sweep orphans.
+REPOSITORIO_BLOB_GRACE_SECONDS = config('REPOSITORIO_BLOB_GRACE_SECONDS', default=3600, cast=int)
+
+# ─── Repositorio: resumable chunked uploads ──────────────────────────────────
+# Chunk size handed to clients (nginx allows 8m bodies on /repositorio/subidas/).
+REPOSITORIO_CHUNK_SIZE = config('REPOSITORIO_CHUNK_SIZE', default=4 * 1024 * 1024, cast=int)
+REPOSITORIO_CHUNK_UPLOAD_MAX_SIZE = config('REPOSITORIO_CHUNK_UPLOAD_MAX_SIZE',
+                                           default=2 * 1024 ** 3, cast=int)
+# Partial uploads idle longer than this are removed by `gc_blobs`.
+REPOSITORIO_CHUNK_UPLOAD_TTL = config('REPOSITORIO_CHUNK_UPLOAD_TTL', default=24 * 3600, cast=int)
+
+# ─── Repositorio: code previews ──────────────────────────────────────────────
+# Only this prefix of a source file is highlighted on the detail page.
+REPOSITORIO_PREVIEW_MAX_BYTES = config('REPOSITORIO_PREVIEW_MAX_BYTES', default=64 * 1024, cast=int)
+REPOSITORIO_PREVIEW_MAX_LINES = config('REPOSITORIO_PREVIEW_MAX_LINES', default=400, cast=int)
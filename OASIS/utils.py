@@ -3,6 +3,15 @@ OASIS — Shared utility functions.
 Centralizes common logic to avoid DRY violations across apps.
 """
 
+import mimetypes
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header, parse_etags
+
 
 def format_bytes(size):
     """Formats byte count into human-readable string (B, KB, MB, GB)."""
@@ -21,3 +30,112 @@ def get_client_ip(request):
     if x_forwarded:
         return x_forwarded.split(',')[0].strip()
     return request.META.get('REMOTE_ADDR', '0.0.0.0')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+RANGE_CHUNK_SIZE = 64 * 1024
+
+
+def parse_byte_range(header, size):
+    """
+    Inclusive (start, end) for a single-range ``Range: bytes=...`` header, or
+    None to serve the whole file (no header, malformed or multi-range, which
+    RFC 9110 lets servers ignore). Raises RangeNotSatisfiable past the end.
+    """
+    match = _RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    if end < start:
+        return None
+    return start, end
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as fh:
+        fh.seek(start)
+        while length > 0:
+            chunk = fh.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def file_download_response(path, filename, request=None, etag=None, as_attachment=True):
+    """
+    Download response for a file on disk, after the caller has checked
+    permissions.
+
+    With ``request`` and a strong ``etag`` (quoted), If-None-Match gets a 304
+    and Range / If-Range get a 206 partial body (416 past the end), so video
+    seeking and resumed downloads only transfer the missing bytes.
+
+    With FILE_DOWNLOAD_MODE = 'nginx' the body is left to nginx through
+    X-Accel-Redirect (see X_ACCEL_LOCATIONS and nginx/default.conf), which
+    answers Range requests itself; otherwise Django streams the file. The
+    internal nginx locations keep the ETag set here (``etag off`` plus
+    ``add_header ETag $upstream_http_etag``), so If-Range keeps matching it.
+    """
+    path = Path(path).resolve()
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    disposition = content_disposition_header(as_attachment, filename)
+    headers = {'ETag': etag} if etag else {}
+
+    if request is not None and etag:
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match and (if_none_match.strip() == '*' or etag in parse_etags(if_none_match)):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+    if settings.FILE_DOWNLOAD_MODE == 'nginx':
+        for root, location in settings.X_ACCEL_LOCATIONS.items():
+            try:
+                relative = path.relative_to(Path(root).resolve())
+            except ValueError:
+                continue
+            response = HttpResponse(content_type=content_type, headers=headers)
+            response['X-Accel-Redirect'] = location + quote(relative.as_posix())
+            response['Content-Disposition'] = disposition
+            return response
+
+    size = path.stat().st_size
+    byte_range = None
+    if request is not None and 'Range' in request.headers:
+        if_range = request.headers.get('If-Range')
+        if not if_range or (etag and if_range.strip() == etag):
+            try:
+                byte_range = parse_byte_range(request.headers['Range'], size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+    if byte_range is None:
+        response = FileResponse(path.open('rb'), as_attachment=as_attachment, filename=filename,
+                                headers=headers)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_iter_range(path, start, end - start + 1), status=206,
+                                         content_type=content_type, headers=headers)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Disposition'] = disposition
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -1,7 +1,9 @@
 import json
 import logging
+from collections import Counter
 
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
 from django.db import connection
 from django.shortcuts import render
 
@@ -51,47 +53,90 @@ CARRERA_ICONS = {
 }
 
 
-def index(request):
-    carreras_data = []
+# ─── Landing page ────────────────────────────────────────────────────────────
+# Careers and clusters come from the constants in repositorio.models, so they
+# are built (and JSON-encoded) once per process. Only the featured projects
+# change: they are cached for INDEX_CACHE_TIMEOUT and dropped by
+# invalidar_index() when an admin toggles `destacado`. Anonymous visitors all
+# see the same page, so it is served whole from the cache.
+
+INDEX_CACHE_TIMEOUT = 5 * 60
+DESTACADOS_CACHE_KEY = 'oasis:index:destacados'
+PAGINA_CACHE_KEY = 'oasis:index:pagina'
+
+
+def _datos_carreras():
+    clusters_display = dict(CLUSTER_CHOICES)
+    carreras = []
     for key, label in CARRERA_CHOICES:
         cluster = CARRERA_A_CLUSTER.get(key, 'TICS')
         meta = CLUSTER_META.get(cluster, {})
-        carreras_data.append({
+        carreras.append({
             'key': key,
             'label': label,
             'cluster': cluster,
-            'cluster_display': dict(CLUSTER_CHOICES).get(cluster, cluster),
+            'cluster_display': clusters_display.get(cluster, cluster),
             'icon': CARRERA_ICONS.get(key, 'fa-graduation-cap'),
             'color': meta.get('color', 'emerald'),
         })
 
-    proyectos_destacados = list(
-        ProyectoGrado.objects.filter(destacado=True)
-        .order_by('-votos', '-fecha_publicacion')[:5]
-        .values('id', 'titulo', 'descripcion', 'carrera', 'autor', 'votos', 'imagen_url', 'enlace_repositorio')
-    )
-
-    clusters_data = []
+    por_cluster = Counter(CARRERA_A_CLUSTER.get(key) for key, _ in CARRERA_CHOICES)
+    clusters = []
     for key, label in CLUSTER_CHOICES:
         meta = CLUSTER_META.get(key, {})
-        count = sum(1 for c in CARRERA_CHOICES if CARRERA_A_CLUSTER.get(c[0]) == key)
-        clusters_data.append({
+        clusters.append({
             'key': key,
             'label': label,
             'icon': meta.get('icon', 'fa-folder'),
             'color': meta.get('color', 'emerald'),
-            'count': count,
+            'count': por_cluster[key],
         })
+    return carreras, json.dumps(carreras), clusters
+
+
+CARRERAS, CARRERAS_JSON, CLUSTERS = _datos_carreras()
+
+
+def _proyectos_destacados():
+    """(list of dicts, JSON) of the featured projects, cached."""
+    datos = cache.get(DESTACADOS_CACHE_KEY)
+    if datos is None:
+        proyectos = list(
+            ProyectoGrado.objects.filter(destacado=True)
+            .order_by('-votos', '-fecha_publicacion')[:5]
+            .values('id', 'titulo', 'descripcion', 'carrera', 'autor', 'votos', 'imagen_url',
+                    'enlace_repositorio')
+        )
+        datos = (proyectos, json.dumps(proyectos, default=str))
+        cache.set(DESTACADOS_CACHE_KEY, datos, INDEX_CACHE_TIMEOUT)
+    return datos
+
+
+def invalidar_index():
+    """Drops the cached featured projects and anonymous landing page."""
+    cache.delete_many([DESTACADOS_CACHE_KEY, PAGINA_CACHE_KEY])
+
+
+def index(request):
+    anonimo = not request.user.is_authenticated
+    if anonimo:
+        pagina = cache.get(PAGINA_CACHE_KEY)
+        if pagina is not None:
+            return HttpResponse(pagina)
 
+    proyectos_destacados, proyectos_json = _proyectos_destacados()
     context = {
-        'carreras': carreras_data,
-        'carreras_json': json.dumps(carreras_data),
-        'clusters': clusters_data,
+        'carreras': CARRERAS,
+        'carreras_json': CARRERAS_JSON,
+        'clusters': CLUSTERS,
         'proyectos_destacados': proyectos_destacados,
-        'proyectos_json': json.dumps(proyectos_destacados, default=str),
-        'total_carreras': len(CARRERA_CHOICES),
+        'proyectos_json': proyectos_json,
+        'total_carreras': len(CARRERAS),
     }
-    return render(request, 'index.html', context)
+    response = render(request, 'index.html', context)
+    if anonimo:
+        cache.set(PAGINA_CACHE_KEY, response.content, INDEX_CACHE_TIMEOUT)
+    return response
 
 
 def health_check(request):
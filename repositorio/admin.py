@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import ProyectoGrado, ArchivoProyecto, TagHabilidad, RegistroDescarga, Carrera
+from .herramientas import sincronizar_herramientas
+from .models import (
+    ProyectoGrado, ArchivoProyecto, TagHabilidad, RegistroDescarga, Carrera, TareaProcesamiento,
+    Voto,
+)
 
 
 class ArchivoInline(admin.TabularInline):
@@ -39,6 +43,11 @@ class ProyectoGradoAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # The tags widget overwrote the tool tags derived from herramientas_usadas.
+        sincronizar_herramientas(form.instance)
+
 
 @admin.register(TagHabilidad)
 class TagHabilidadAdmin(admin.ModelAdmin):
@@ -64,6 +73,22 @@ class RegistroDescargaAdmin(admin.ModelAdmin):
     readonly_fields = ['archivo', 'usuario', 'ip_address', 'fecha']
 
 
+@admin.register(Voto)
+class VotoAdmin(admin.ModelAdmin):
+    list_display = ['proyecto', 'usuario', 'fecha']
+    list_filter = ['fecha']
+    search_fields = ['proyecto__titulo', 'usuario__username']
+    readonly_fields = ['proyecto', 'usuario', 'fecha']
+
+
+@admin.register(TareaProcesamiento)
+class TareaProcesamientoAdmin(admin.ModelAdmin):
+    list_display = ['tipo', 'archivo', 'estado', 'intentos', 'disponible_en', 'fecha_actualizacion']
+    list_filter = ['estado', 'tipo']
+    readonly_fields = ['archivo', 'intentos', 'bloqueada_hasta', 'error',
+                       'fecha_creacion', 'fecha_actualizacion']
+
+
 @admin.register(Carrera)
 class CarreraAdmin(admin.ModelAdmin):
     list_display = ['clave', 'nombre', 'cluster', 'icono', 'activa', 'orden']
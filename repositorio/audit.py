@@ -0,0 +1,133 @@
+"""
+OASIS Repositorio — Asynchronous download audit log.
+
+``registrar_descarga`` puts the event on a bounded in-process queue and
+returns at once; a daemon thread drains it every
+REPOSITORIO_AUDIT_FLUSH_INTERVAL seconds and writes RegistroDescarga rows
+with one bulk_create per batch. The timestamp is taken when the event
+happens, not when it is written.
+
+  - Bounded memory: the queue holds at most REPOSITORIO_AUDIT_QUEUE_SIZE
+    events. When it is full the event is written synchronously instead, so
+    nothing is dropped under a burst; it only costs that request the insert.
+  - Shutdown: the queue is drained at interpreter exit (gunicorn's graceful
+    worker restart), in addition to the periodic flush.
+  - Workers: the thread is started lazily on the first download, i.e. inside
+    the worker after fork. Under gevent, threading and queue are monkey-patched
+    into greenlets and the same code runs cooperatively.
+
+An interval of 0 disables the thread; ``flush()`` then writes on demand.
+"""
+
+import logging
+import queue
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, IntegrityError
+from django.utils import timezone
+
+from .models import ArchivoProyecto, RegistroDescarga
+from .periodico import FlushPeriodico
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+class DownloadAuditQueue(FlushPeriodico):
+    """Bounded in-process queue of RegistroDescarga rows, written in batches."""
+
+    nombre_hilo = 'repositorio-audit'
+    mensaje_error = 'No se pudo escribir el lote de auditoria de descargas.'
+    errores = (DatabaseError,)
+
+    def __init__(self, intervalo, capacidad):
+        super().__init__(intervalo)
+        self.cola = queue.Queue(maxsize=capacidad)
+
+    def registrar(self, archivo_id, usuario_id, ip_address):
+        evento = RegistroDescarga(archivo_id=archivo_id, usuario_id=usuario_id,
+                                  ip_address=ip_address, fecha=timezone.now())
+        try:
+            self.cola.put_nowait(evento)
+        except queue.Full:
+            logger.warning('Cola de auditoria llena; registrando la descarga en linea.')
+            evento.save()
+            return
+        self._arrancar()
+
+    def flush(self):
+        """Writes every queued event. Returns the number of rows written."""
+        total = 0
+        while True:
+            lote = []
+            while len(lote) < BATCH_SIZE:
+                try:
+                    lote.append(self.cola.get_nowait())
+                except queue.Empty:
+                    break
+            if not lote:
+                return total
+            try:
+                total += self._escribir(lote)
+            except DatabaseError:
+                self._reencolar(lote)
+                raise
+
+    def _reencolar(self, lote):
+        """Puts a failed batch back for the next flush, as far as the bound allows."""
+        for i, evento in enumerate(lote):
+            try:
+                self.cola.put_nowait(evento)
+            except queue.Full:
+                logger.error('Cola de auditoria llena: se pierden %d registro(s) de descarga.',
+                             len(lote) - i)
+                return
+
+    def _escribir(self, lote):
+        try:
+            RegistroDescarga.objects.bulk_create(lote)
+            return len(lote)
+        except IntegrityError:
+            pass
+        # A file or user was deleted while its events were queued: drop the
+        # events of deleted files and keep the others without a user, as the
+        # SET_NULL foreign key would have left them.
+        archivos = set(ArchivoProyecto.objects.filter(
+            pk__in={e.archivo_id for e in lote}).values_list('pk', flat=True))
+        usuarios = set(get_user_model().objects.filter(
+            pk__in={e.usuario_id for e in lote if e.usuario_id}).values_list('pk', flat=True))
+        validos = [e for e in lote if e.archivo_id in archivos]
+        for evento in validos:
+            if evento.usuario_id not in usuarios:
+                evento.usuario_id = None
+        try:
+            RegistroDescarga.objects.bulk_create(validos)
+        except IntegrityError:
+            # Never put back a batch that can not be written: it would block the queue.
+            logger.exception('Se descartan %d registro(s) de descarga invalidos.', len(lote))
+            return 0
+        if len(validos) < len(lote):
+            logger.warning('Se descartan %d registro(s) de descarga de archivos borrados.',
+                           len(lote) - len(validos))
+        return len(validos)
+
+
+_cola = None
+
+
+def get_queue():
+    global _cola
+    if _cola is None:
+        _cola = DownloadAuditQueue(settings.REPOSITORIO_AUDIT_FLUSH_INTERVAL,
+                                   settings.REPOSITORIO_AUDIT_QUEUE_SIZE)
+    return _cola
+
+
+def registrar_descarga(archivo_id, usuario_id, ip_address):
+    get_queue().registrar(archivo_id, usuario_id, ip_address)
+
+
+def flush():
+    return get_queue().flush()
@@ -0,0 +1,182 @@
+"""
+OASIS Repositorio — Index of compressed archives.
+
+When a ``comprimido`` file is uploaded, the ``indice_comprimido`` job
+(tareas.py) lists its members into MiembroArchivo (path, parent directory,
+size, compressed size) once, so the detail page browses the archive from the
+table, one directory at a time on the indexed ``directorio`` column:
+
+  - zip: only the central directory at the end of the file is read.
+  - tar (.tar, .tar.gz, .tar.bz2, .tar.xz): member headers in order; in an
+    uncompressed tar the data between them is skipped with seeks.
+  - gz (a single compressed file): the size comes from the gzip trailer.
+
+rar and 7z would need libraries the project does not ship; they are not
+indexed and can only be downloaded whole.
+
+``abrir_miembro`` returns one member as a stream decompressed while it is
+sent; nothing is extracted to disk.
+"""
+
+import gzip
+import logging
+import os
+import tarfile
+import zipfile
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+
+from .models import MiembroArchivo
+
+logger = logging.getLogger(__name__)
+
+MAX_MIEMBROS = 20000
+MAX_RUTA = MiembroArchivo._meta.get_field('ruta').max_length
+EXTENSIONES_TAR = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ILEGIBLE = (zipfile.BadZipFile, zipfile.LargeZipFile, tarfile.TarError, EOFError,
+            gzip.BadGzipFile, ValueError)
+
+
+def formato_de(nombre):
+    """'zip', 'tar', 'gz' or None (not indexable) for a file name."""
+    nombre = nombre.lower()
+    if nombre.endswith('.zip'):
+        return 'zip'
+    if nombre.endswith(EXTENSIONES_TAR):
+        return 'tar'
+    if nombre.endswith('.gz'):
+        return 'gz'
+    return None
+
+
+def directorio_de(ruta):
+    """Parent directory of a member path: 'src/util' for 'src/util/fechas.py'."""
+    return ruta.rpartition('/')[0]
+
+
+def listar(path, formato, nombre):
+    """Yields (ruta, tamano, tamano_comprimido) of the files in the archive."""
+    if formato == 'zip':
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    yield info.filename, info.file_size, info.compress_size
+    elif formato == 'tar':
+        with tarfile.open(path, 'r:*') as tf:
+            for miembro in tf:
+                if miembro.isfile():
+                    yield miembro.name, miembro.size, None
+    elif formato == 'gz':
+        with open(path, 'rb') as f:
+            if f.read(2) != b'\x1f\x8b':
+                raise gzip.BadGzipFile(f'{nombre} no es un archivo gzip')
+            comprimido = f.seek(0, os.SEEK_END)
+            f.seek(-4, os.SEEK_END)
+            # ISIZE: uncompressed size modulo 2**32.
+            tamano = int.from_bytes(f.read(4), 'little')
+        yield os.path.basename(nombre)[:-3], tamano, comprimido
+
+
+def indexar(archivo):
+    """Replaces the MiembroArchivo rows of an ArchivoProyecto. Returns how many."""
+    gemelo = (MiembroArchivo.objects.filter(archivo__archivo=archivo.archivo.name)
+              .exclude(archivo=archivo).values_list('archivo_id', flat=True).first())
+    if gemelo:
+        # Same blob already indexed for another row: copy, do not re-read it.
+        filas = [MiembroArchivo(archivo=archivo, ruta=ruta, directorio=directorio, tamano=tamano,
+                                tamano_comprimido=comp)
+                 for ruta, directorio, tamano, comp in MiembroArchivo.objects.filter(archivo_id=gemelo)
+                 .values_list('ruta', 'directorio', 'tamano', 'tamano_comprimido')]
+    else:
+        filas = _leer(archivo)
+    with transaction.atomic():
+        MiembroArchivo.objects.filter(archivo=archivo).delete()
+        MiembroArchivo.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def _leer(archivo):
+    formato = formato_de(archivo.nombre_original)
+    if not formato:
+        return []
+    filas = []
+    try:
+        for ruta, tamano, comprimido in listar(archivo.archivo.path, formato,
+                                               archivo.nombre_original):
+            if len(ruta) > MAX_RUTA:
+                continue
+            if len(filas) >= MAX_MIEMBROS:
+                logger.warning('%s tiene mas de %d archivos; solo se indexan los primeros.',
+                               archivo.nombre_original, MAX_MIEMBROS)
+                break
+            filas.append(MiembroArchivo(archivo=archivo, ruta=ruta, directorio=directorio_de(ruta),
+                                        tamano=tamano, tamano_comprimido=comprimido))
+    except ILEGIBLE as exc:
+        logger.warning('No se pudo leer el archivo comprimido %s: %s', archivo.nombre_original, exc)
+        return []
+    return filas
+
+
+def listar_directorio(archivo, directorio=''):
+    """
+    One level of the tree under ``directorio``: ([(subdirectorio, n archivos)],
+    [MiembroArchivo]), both sorted by name.
+
+    Files are the rows whose ``directorio`` is this one; subdirectories come
+    from a COUNT per distinct ``directorio`` below it, folded to their first
+    component, so member rows outside this level are never loaded.
+    """
+    directorio = directorio.strip('/')
+    miembros = list(archivo.miembros.filter(directorio=directorio).order_by('ruta'))
+    if directorio:
+        debajo = archivo.miembros.filter(directorio__startswith=f'{directorio}/')
+        inicio = len(directorio) + 1
+    else:
+        debajo = archivo.miembros.exclude(directorio='')
+        inicio = 0
+    subdirectorios = Counter()
+    for ruta, n in debajo.order_by().values_list('directorio').annotate(n=Count('id')):
+        subdirectorios[ruta[inicio:].split('/', 1)[0]] += n
+    return sorted(subdirectorios.items()), miembros
+
+
+class MiembroStream:
+    """Read-only stream of one member; closing it closes the archive too."""
+
+    def __init__(self, stream, *recursos):
+        self.stream = stream
+        self.recursos = recursos
+
+    def read(self, n=-1):
+        return self.stream.read(n)
+
+    def close(self):
+        self.stream.close()
+        for recurso in self.recursos:
+            recurso.close()
+
+
+def abrir_miembro(archivo, ruta):
+    """MiembroStream of ``ruta`` inside ``archivo``, decompressed on the fly."""
+    path = archivo.archivo.path
+    formato = formato_de(archivo.nombre_original)
+    if formato == 'zip':
+        zf = zipfile.ZipFile(path)
+        try:
+            return MiembroStream(zf.open(ruta), zf)
+        except KeyError:
+            zf.close()
+            raise FileNotFoundError(ruta)
+    if formato == 'tar':
+        tf = tarfile.open(path, 'r:*')
+        # Scan in order and stop at the member, reading only up to it.
+        for miembro in tf:
+            if miembro.name == ruta and miembro.isfile():
+                return MiembroStream(tf.extractfile(miembro), tf)
+        tf.close()
+        raise FileNotFoundError(ruta)
+    if formato == 'gz':
+        return MiembroStream(gzip.open(path, 'rb'))
+    raise FileNotFoundError(ruta)
@@ -0,0 +1,193 @@
+"""
+OASIS Repositorio — Buffered view / download / vote counters.
+
+Hot paths call ``incrementar(pk, campo)`` instead of running
+``UPDATE ... SET campo = campo + 1`` on a popular ProyectoGrado row. Deltas are
+collected in a buffer and written by ``flush()`` in batches: one UPDATE per
+batch of projects (CASE per pk), inside one transaction.
+
+Buffers:
+  - Redis (when the default cache is django-redis): a single hash
+    ``repositorio:contadores`` updated with HINCRBY. It lives outside the
+    workers, so recycling a worker loses nothing. ``flush`` atomically renames
+    the hash before reading it; a flush that dies mid-way leaves the renamed
+    hash behind and the next flush applies it.
+  - Local (LocMemCache / development): a per-process dict flushed by a daemon
+    thread every REPOSITORIO_COUNTER_FLUSH_INTERVAL seconds and at interpreter
+    exit, so a gracefully recycled worker flushes before it goes away. A worker
+    that dies without running atexit (SIGKILL, OOM killer, gunicorn's timeout
+    kill) loses what it buffered since its last flush: at most
+    REPOSITORIO_COUNTER_FLUSH_INTERVAL seconds of views, downloads and votes.
+    Use the Redis buffer where that window is not acceptable.
+
+``pendientes`` / ``aplicar_pendientes`` merge the not-yet-flushed deltas into
+values read from the database, so pages never show a count going backwards.
+The Redis buffer needs ``python manage.py flush_counters --loop 10`` running
+next to it (the ``contadores`` service in docker-compose.yml).
+"""
+
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import ProyectoGrado
+from .periodico import FlushPeriodico
+
+CAMPOS = ('vistas', 'descargas', 'votos')
+BATCH_SIZE = 500
+
+
+def _clave(pk, campo):
+    return f'{campo}:{pk}'
+
+
+def _separar(clave):
+    campo, pk = clave.split(':')
+    return int(pk), campo
+
+
+def escribir_deltas(deltas):
+    """Applies {(pk, campo): delta} with one UPDATE per BATCH_SIZE projects."""
+    por_pk = {}
+    for (pk, campo), delta in deltas.items():
+        if delta:
+            por_pk.setdefault(pk, {})[campo] = delta
+    pks = sorted(por_pk)  # stable lock order across concurrent flushes
+    with transaction.atomic():
+        for i in range(0, len(pks), BATCH_SIZE):
+            lote = pks[i:i + BATCH_SIZE]
+            cambios = {}
+            for campo in CAMPOS:
+                whens = [When(pk=pk, then=Value(por_pk[pk][campo]))
+                         for pk in lote if campo in por_pk[pk]]
+                if whens:
+                    cambios[campo] = F(campo) + Case(*whens, default=Value(0),
+                                                     output_field=IntegerField())
+            ProyectoGrado.objects.filter(pk__in=lote).update(**cambios)
+    return len(pks)
+
+
+class LocalCounterBuffer(FlushPeriodico):
+    """Per-process buffer flushed by a daemon thread and at exit."""
+
+    name = 'local'
+    nombre_hilo = 'repositorio-counters'
+    mensaje_error = 'No se pudieron escribir los contadores del repositorio.'
+
+    def __init__(self, intervalo):
+        super().__init__(intervalo)
+        self._deltas = {}
+
+    def incrementar(self, pk, campo, n=1):
+        with self._lock:
+            self._deltas[(pk, campo)] = self._deltas.get((pk, campo), 0) + n
+        self._arrancar()
+
+    def pendientes(self, pks):
+        pks = set(pks)
+        with self._lock:
+            return {k: v for k, v in self._deltas.items() if k[0] in pks}
+
+    def flush(self):
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        if not deltas:
+            return 0
+        try:
+            return escribir_deltas(deltas)
+        except Exception:
+            # Put the deltas back so the next flush retries them.
+            with self._lock:
+                for k, v in deltas.items():
+                    self._deltas[k] = self._deltas.get(k, 0) + v
+            raise
+
+
+class RedisCounterBuffer:
+    """Shared Redis hash buffer; flushed by the flush_counters command."""
+
+    name = 'redis'
+    KEY = 'repositorio:contadores'
+    FLUSHING_PREFIX = 'repositorio:contadores:flush:'
+
+    def __init__(self):
+        from django_redis import get_redis_connection
+        self.redis = get_redis_connection('default')
+
+    def incrementar(self, pk, campo, n=1):
+        self.redis.hincrby(self.KEY, _clave(pk, campo), n)
+
+    def pendientes(self, pks):
+        pks = list(pks)
+        if not pks:
+            return {}
+        claves = [_clave(pk, campo) for pk in pks for campo in CAMPOS]
+        valores = self.redis.hmget(self.KEY, claves)
+        return {_separar(c): int(v) for c, v in zip(claves, valores) if v}
+
+    def flush(self):
+        # Leftovers from a flush that died after the rename come first.
+        pendientes = [k.decode() if isinstance(k, bytes) else k
+                      for k in self.redis.scan_iter(f'{self.FLUSHING_PREFIX}*')]
+        nuevo = f'{self.FLUSHING_PREFIX}{uuid.uuid4().hex}'
+        try:
+            self.redis.rename(self.KEY, nuevo)
+            pendientes.append(nuevo)
+        except Exception as exc:  # redis.ResponseError: no such key
+            if 'no such key' not in str(exc).lower():
+                raise
+        total = 0
+        for key in pendientes:
+            crudo = self.redis.hgetall(key)
+            deltas = {}
+            for clave, valor in crudo.items():
+                clave = clave.decode() if isinstance(clave, bytes) else clave
+                deltas[_separar(clave)] = int(valor)
+            total += escribir_deltas(deltas)
+            self.redis.delete(key)
+        return total
+
+
+_buffer = None
+
+
+def get_buffer():
+    """Redis buffer when the default cache is django-redis, local otherwise."""
+    global _buffer
+    if _buffer is None:
+        backend = settings.CACHES['default']['BACKEND']
+        if backend.startswith('django_redis.'):
+            _buffer = RedisCounterBuffer()
+        else:
+            _buffer = LocalCounterBuffer(settings.REPOSITORIO_COUNTER_FLUSH_INTERVAL)
+    return _buffer
+
+
+def incrementar(pk, campo, n=1):
+    assert campo in CAMPOS, campo
+    get_buffer().incrementar(pk, campo, n)
+
+
+def pendientes(pks):
+    """Not-yet-flushed deltas {(pk, campo): delta} for ``pks``."""
+    return get_buffer().pendientes(pks)
+
+
+def aplicar_pendientes(proyectos):
+    """Adds pending deltas to the counter attributes of loaded projects."""
+    proyectos = list(proyectos)
+    deltas = pendientes([p.pk for p in proyectos])
+    if deltas:
+        for p in proyectos:
+            for campo in CAMPOS:
+                delta = deltas.get((p.pk, campo))
+                if delta and campo in p.__dict__:
+                    setattr(p, campo, getattr(p, campo) + delta)
+    return proyectos
+
+
+def flush():
+    """Writes the buffered deltas. Returns the number of projects updated."""
+    return get_buffer().flush()
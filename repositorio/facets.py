@@ -0,0 +1,219 @@
+"""
+OASIS Repositorio — Facet counts for the explorer sidebar.
+
+Unfiltered facets (per-career, per-year and per-tag counts of published
+projects) live in the FacetaConteo table and are updated incrementally by the
+ProyectoGrado / tags signals in signals.py. The sidebar reads them as a single
+cached structure keyed on the shared "facetas" generation (generaciones.py),
+which every change bumps in its own transaction, so all workers drop the old
+summary at once even on a per-process cache. ``rebuild_facets`` recomputes the
+table from scratch after bulk edits that bypass signals (queryset.update, raw
+SQL, restores).
+
+When the explorer has active filters, ``facetas_para(qs)`` computes the same
+structure over the filtered queryset with two grouped queries.
+"""
+
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F
+
+from .generaciones import incrementar_generaciones, leer_generaciones
+from .models import (
+    ProyectoGrado, TagHabilidad, FacetaConteo, Carrera,
+    CARRERA_CHOICES, CLUSTER_CHOICES, CARRERA_A_CLUSTER,
+)
+
+CACHE_KEY = 'repositorio:facetas'
+GENERACION = 'facetas'
+CACHE_TIMEOUT = 60 * 60
+TOP_TAGS = 20
+
+# Fields whose change moves a project between facet buckets.
+FACET_FIELDS = ('estado', 'carrera', 'anio')
+
+PUBLICADO = ProyectoGrado.EstadoProyecto.PUBLICADO
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# INCREMENTAL UPDATES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _contribucion(estado, carrera, anio, signo):
+    """Facet buckets a project with these values counts towards (tags excluded)."""
+    if estado != PUBLICADO:
+        return Counter()
+    return Counter({
+        (FacetaConteo.Faceta.CARRERA, carrera): signo,
+        (FacetaConteo.Faceta.ANIO, str(anio)): signo,
+    })
+
+
+def deltas_por_cambio(previo, proyecto):
+    """
+    Deltas produced by saving ``proyecto`` whose stored state was ``previo``
+    (dict of FACET_FIELDS, or None on create).
+    """
+    deltas = Counter()
+    if previo:
+        deltas.update(_contribucion(previo['estado'], previo['carrera'], previo['anio'], -1))
+    deltas.update(_contribucion(proyecto.estado, proyecto.carrera, proyecto.anio, 1))
+
+    # On create the tags are not linked yet; m2m_changed accounts for them.
+    era_publicado = bool(previo) and previo['estado'] == PUBLICADO
+    if previo and era_publicado != proyecto.es_publicado:
+        signo = 1 if proyecto.es_publicado else -1
+        for tag_id in proyecto.tags.values_list('pk', flat=True):
+            deltas[(FacetaConteo.Faceta.TAG, str(tag_id))] += signo
+    return deltas
+
+
+def deltas_por_borrado(proyecto):
+    """Deltas produced by deleting ``proyecto`` (including its tag links)."""
+    deltas = _contribucion(proyecto.estado, proyecto.carrera, proyecto.anio, -1)
+    if proyecto.es_publicado:
+        deltas.update(deltas_por_tags(proyecto.tags.values_list('pk', flat=True), -1))
+    return deltas
+
+
+def deltas_por_tags(tag_ids, signo):
+    return Counter({(FacetaConteo.Faceta.TAG, str(pk)): signo for pk in tag_ids})
+
+
+def aplicar_deltas(deltas):
+    """Applies facet deltas atomically (F() updates) and invalidates the summary."""
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    for (faceta, valor), delta in deltas.items():
+        updated = FacetaConteo.objects.filter(faceta=faceta, valor=valor).update(
+            conteo=F('conteo') + delta
+        )
+        if not updated:
+            obj, _ = FacetaConteo.objects.get_or_create(faceta=faceta, valor=valor)
+            FacetaConteo.objects.filter(pk=obj.pk).update(conteo=F('conteo') + delta)
+    invalidar()
+
+
+def invalidar():
+    """Makes every worker rebuild the cached summary once the transaction commits."""
+    incrementar_generaciones(GENERACION)
+
+
+def recalcular_facetas():
+    """Recomputes FacetaConteo from the projects table. Returns the row count."""
+    publicados = ProyectoGrado.objects.filter(estado=PUBLICADO).order_by()
+    filas = [
+        FacetaConteo(faceta=FacetaConteo.Faceta.CARRERA, valor=carrera, conteo=c)
+        for carrera, c in publicados.values_list('carrera').annotate(c=Count('id'))
+    ]
+    filas += [
+        FacetaConteo(faceta=FacetaConteo.Faceta.ANIO, valor=str(anio), conteo=c)
+        for anio, c in publicados.values_list('anio').annotate(c=Count('id'))
+    ]
+    filas += [
+        FacetaConteo(faceta=FacetaConteo.Faceta.TAG, valor=str(tag_id), conteo=c)
+        for tag_id, c in (
+            ProyectoGrado.tags.through.objects
+            .filter(proyectogrado__estado=PUBLICADO)
+            .values_list('taghabilidad_id')
+            .annotate(c=Count('id'))
+            .order_by()
+        )
+    ]
+    with transaction.atomic():
+        FacetaConteo.objects.all().delete()
+        FacetaConteo.objects.bulk_create(filas)
+        invalidar()
+    return len(filas)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# READ SIDE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _construir(carrera_counts, anio_counts, cluster_counts, tags):
+    """Builds the sidebar structure from raw counts."""
+    cluster_display = dict(CLUSTER_CHOICES)
+
+    return {
+        'total': sum(carrera_counts.values()),
+        'clusters': {
+            key: {'name': cluster_display[key], 'count': cluster_counts[key]}
+            for key, _ in CLUSTER_CHOICES if cluster_counts[key] > 0
+        },
+        'carreras': [
+            {'clave': clave, 'nombre': nombre, 'count': carrera_counts.get(clave, 0)}
+            for clave, nombre in CARRERA_CHOICES
+        ],
+        'anios': [
+            {'anio': anio, 'count': count}
+            for anio, count in sorted(anio_counts.items(), reverse=True) if count > 0
+        ],
+        'tags': tags,
+    }
+
+
+def get_resumen_facetas():
+    """Unfiltered facets from FacetaConteo, cached as one structure per generation."""
+    key = f'{CACHE_KEY}:{leer_generaciones(GENERACION)[GENERACION]}'
+    resumen = cache.get(key)
+    if resumen is not None:
+        return resumen
+
+    carrera_counts, anio_counts, tag_counts = {}, {}, {}
+    for faceta, valor, conteo in FacetaConteo.objects.filter(conteo__gt=0).values_list(
+        'faceta', 'valor', 'conteo'
+    ):
+        if faceta == FacetaConteo.Faceta.CARRERA:
+            carrera_counts[valor] = conteo
+        elif faceta == FacetaConteo.Faceta.ANIO:
+            anio_counts[int(valor)] = conteo
+        else:
+            tag_counts[int(valor)] = conteo
+
+    top = sorted(tag_counts.items(), key=lambda kv: -kv[1])[:TOP_TAGS]
+    nombres = {
+        t['pk']: t for t in
+        TagHabilidad.objects.filter(pk__in=[pk for pk, _ in top]).values('pk', 'nombre', 'slug')
+    }
+    tags = [
+        {'slug': nombres[pk]['slug'], 'nombre': nombres[pk]['nombre'], 'count': count}
+        for pk, count in top if pk in nombres
+    ]
+
+    clusters = {**CARRERA_A_CLUSTER, **dict(Carrera.objects.values_list('clave', 'cluster'))}
+    cluster_counts = Counter()
+    for carrera_key, count in carrera_counts.items():
+        cluster_counts[clusters.get(carrera_key, 'TICS')] += count
+
+    resumen = _construir(carrera_counts, anio_counts, cluster_counts, tags)
+    cache.set(key, resumen, CACHE_TIMEOUT)
+    return resumen
+
+
+def facetas_para(qs):
+    """Facets restricted to the explorer's filtered queryset (two grouped queries)."""
+    base = qs.order_by()
+    carrera_counts, anio_counts, cluster_counts = Counter(), Counter(), Counter()
+    for carrera, cluster, anio, c in (
+        base.values_list('carrera', 'cluster', 'anio').annotate(c=Count('id', distinct=True))
+    ):
+        carrera_counts[carrera] += c
+        cluster_counts[cluster] += c
+        anio_counts[anio] += c
+
+    # Grouped on the queryset itself (not a pk__in subquery): the SQLite search
+    # backend joins the FTS table by name, which subquery aliasing would break.
+    tags = [
+        {'slug': slug, 'nombre': nombre, 'count': c}
+        for slug, nombre, c in (
+            base.filter(tags__isnull=False)
+            .values_list('tags__slug', 'tags__nombre')
+            .annotate(c=Count('id', distinct=True))
+            .order_by('-c', 'tags__nombre')[:TOP_TAGS]
+        )
+    ]
+    return _construir(carrera_counts, anio_counts, cluster_counts, tags)
@@ -0,0 +1,76 @@
+"""
+OASIS Repositorio — Explorer filters shared by the HTML explorer and the JSON API.
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import ProyectoGrado, ArchivoProyecto
+from .pagination import DEFAULT_SORT, RELEVANCE_SORT, SORT_KEYS
+from .search import get_search_backend
+
+
+def proyectos_publicados():
+    return ProyectoGrado.objects.filter(estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
+
+
+def anotar_num_archivos(qs):
+    """
+    Annotates ``num_archivos`` with a correlated COUNT per row (served by the
+    (proyecto, fecha_subida) index) instead of loading every ArchivoProyecto.
+    """
+    conteo = (
+        ArchivoProyecto.objects.filter(proyecto=OuterRef('pk'))
+        .order_by().values('proyecto').annotate(c=Count('id')).values('c')
+    )
+    return qs.annotate(num_archivos=Coalesce(
+        Subquery(conteo, output_field=IntegerField()), Value(0)
+    ))
+
+
+def filtrar_explorador(qs, params):
+    """
+    Applies the explorer query-string filters (q, carrera, cluster, anio, tag,
+    tipo, sort) to ``qs``. Returns (filtered_qs, normalized_filters).
+    """
+    filtros = {
+        'q': params.get('q', '').strip(),
+        'carrera': params.get('carrera', ''),
+        'cluster': params.get('cluster', ''),
+        'anio': params.get('anio', ''),
+        'tag': params.get('tag', ''),
+        'tipo': params.get('tipo', ''),
+    }
+
+    # ── Search (full-text index, relevance-ranked) ──
+    if filtros['q']:
+        qs = get_search_backend().search(qs, filtros['q'])
+
+    if filtros['carrera']:
+        qs = qs.filter(carrera=filtros['carrera'])
+
+    if filtros['cluster']:
+        qs = qs.filter(cluster=filtros['cluster'])
+
+    if filtros['anio']:
+        try:
+            qs = qs.filter(anio=int(filtros['anio']))
+        except ValueError:
+            pass
+
+    if filtros['tag']:
+        qs = qs.filter(tags__slug=filtros['tag'])
+
+    if filtros['tipo']:
+        qs = qs.filter(preview_type=filtros['tipo'])
+
+    sort = params.get('sort', RELEVANCE_SORT if filtros['q'] else DEFAULT_SORT)
+    if sort not in SORT_KEYS and not (sort == RELEVANCE_SORT and filtros['q']):
+        sort = DEFAULT_SORT
+    filtros['sort'] = sort
+    return qs, filtros
+
+
+def hay_filtros(filtros):
+    """True when any filter besides the sort order is active."""
+    return any(v for k, v in filtros.items() if k != 'sort')
@@ -3,6 +3,7 @@ import re
 from django import forms
 from django.core.exceptions import ValidationError
 
+from .herramientas import CATEGORIA as CATEGORIA_HERRAMIENTA, sincronizar_herramientas
 from .models import ProyectoGrado, Carrera
 
 
@@ -83,6 +84,18 @@ class ProyectoGradoAdminForm(forms.ModelForm):
             'estado': forms.Select(attrs={'class': 'admin-input'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Tool tags are derived from herramientas_usadas, not picked by hand.
+        self.fields['tags'].queryset = self.fields['tags'].queryset.exclude(
+            categoria=CATEGORIA_HERRAMIENTA
+        )
+
+    def _save_m2m(self):
+        super()._save_m2m()
+        # Saving the tags field replaced the tool tags with the checked ones.
+        sincronizar_herramientas(self.instance)
+
     def clean_titulo(self):
         val = self.cleaned_data.get('titulo', '').strip()
         if len(val) < 5:
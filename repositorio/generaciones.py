@@ -0,0 +1,48 @@
+"""
+OASIS Repositorio — Shared generation numbers for cached structures.
+
+Caches that are rebuilt on change (sidebar facets, explorer results, the
+typeahead index) embed a generation number in their keys and bump it when
+the underlying data changes. The numbers live in the GeneracionCache table,
+not in the cache: with the per-process LocMemCache a bump made in one gunicorn
+worker would never reach the others, which would keep serving stale entries.
+
+  - ``leer_generaciones`` is one indexed query for any number of names.
+  - ``incrementar_generaciones`` runs inside the caller's transaction, so the
+    bump becomes visible to other workers exactly when the change commits.
+
+Rows are created on first use with a clock-based value, so a recreated row
+(restored database, test rollback) never reuses a number some cache key was
+built with.
+"""
+
+import time
+
+from django.db.models import F
+
+from .models import GeneracionCache
+
+
+def _crear(nombres):
+    GeneracionCache.objects.bulk_create(
+        [GeneracionCache(nombre=nombre, valor=time.time_ns()) for nombre in nombres],
+        ignore_conflicts=True,
+    )
+
+
+def leer_generaciones(*nombres):
+    """{nombre: generation} for ``nombres``."""
+    valores = dict(GeneracionCache.objects.filter(nombre__in=nombres).values_list('nombre', 'valor'))
+    faltan = [nombre for nombre in nombres if nombre not in valores]
+    if faltan:
+        _crear(faltan)
+        valores.update(GeneracionCache.objects.filter(nombre__in=faltan).values_list('nombre', 'valor'))
+    return valores
+
+
+def incrementar_generaciones(*nombres):
+    """Bumps ``nombres`` as part of the current transaction."""
+    nombres = set(nombres)
+    if GeneracionCache.objects.filter(nombre__in=nombres).update(valor=F('valor') + 1) < len(nombres):
+        # Missing rows are created with a fresh value, which is a bump as well.
+        _crear(nombres)
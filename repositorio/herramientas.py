@@ -0,0 +1,97 @@
+"""
+OASIS Repositorio — Tools used (``herramientas_usadas``) as structured tags.
+
+``herramientas_usadas`` remains the comma-separated input on the admin forms,
+but every tool in it is stored as a TagHabilidad (categoria "Herramienta")
+linked through ProyectoGrado.tags. Cards render the prefetched tags and the
+``tag`` filter is an indexed join on the M2M table, so nothing re-splits the
+string per request.
+
+Tool tags follow the text: saving a project links the tools it lists and
+unlinks "Herramienta" tags it no longer lists. ``backfill_herramientas``
+converts existing rows in bulk (migration 0008 and the management command).
+"""
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+CATEGORIA = 'Herramienta'
+MAX_NOMBRE = 80
+
+
+def parse_herramientas(texto):
+    """Splits the comma-separated field into clean, de-duplicated tool names."""
+    vistos, nombres = set(), []
+    for nombre in (texto or '').split(','):
+        nombre = ' '.join(nombre.split())[:MAX_NOMBRE]
+        if nombre and nombre.lower() not in vistos:
+            vistos.add(nombre.lower())
+            nombres.append(nombre)
+    return nombres
+
+
+def _crear_tag(tag_model, nombre):
+    """Creates a tool tag with a free slug ("c", "c-2", ...). Returns its pk."""
+    base = slugify(nombre)[:MAX_NOMBRE - 4] or 'herramienta'
+    usados = set(tag_model.objects.filter(slug__startswith=base).values_list('slug', flat=True))
+    slug, n = base, 2
+    while slug in usados:
+        slug, n = f'{base}-{n}', n + 1
+    return tag_model.objects.create(nombre=nombre, slug=slug, categoria=CATEGORIA).pk
+
+
+def resolver_tags(tag_model, nombres, conocidos=None):
+    """
+    Tag pks for ``nombres`` (matched case-insensitively, created if missing).
+    ``conocidos`` is an optional {lower nombre: pk} dict that is read and filled.
+    """
+    if conocidos is None:
+        conocidos = {}
+        if nombres:
+            condicion = Q()
+            for nombre in nombres:
+                condicion |= Q(nombre__iexact=nombre)
+            for pk, nombre in tag_model.objects.filter(condicion).values_list('pk', 'nombre'):
+                conocidos[nombre.lower()] = pk
+    pks = []
+    for nombre in nombres:
+        if nombre.lower() not in conocidos:
+            conocidos[nombre.lower()] = _crear_tag(tag_model, nombre)
+        pks.append(conocidos[nombre.lower()])
+    return pks
+
+
+def sincronizar_herramientas(proyecto):
+    """Makes the project's "Herramienta" tags match its herramientas_usadas."""
+    from .models import TagHabilidad
+
+    pks = set(resolver_tags(TagHabilidad, parse_herramientas(proyecto.herramientas_usadas)))
+    actuales = set(proyecto.tags.filter(categoria=CATEGORIA).values_list('pk', flat=True))
+    if actuales - pks:
+        proyecto.tags.remove(*(actuales - pks))
+    if pks - actuales:
+        proyecto.tags.add(*(pks - actuales))
+
+
+def backfill_herramientas(proyecto_model, tag_model, batch_size=1000):
+    """
+    Links every project to tags for its herramientas_usadas with bulk inserts
+    (no per-row signals; recompute facets afterwards). Works with historical
+    models. Returns (projects processed, tags created).
+    """
+    through = proyecto_model.tags.through
+    conocidos = {n.lower(): pk for pk, n in tag_model.objects.values_list('pk', 'nombre')}
+    tags_antes = len(conocidos)
+
+    proyectos, filas = 0, []
+    textos = (proyecto_model.objects.exclude(herramientas_usadas='')
+              .values_list('pk', 'herramientas_usadas').order_by('pk'))
+    for pk, texto in textos.iterator(chunk_size=batch_size):
+        proyectos += 1
+        for tag_pk in resolver_tags(tag_model, parse_herramientas(texto), conocidos):
+            filas.append(through(proyectogrado_id=pk, taghabilidad_id=tag_pk))
+        if len(filas) >= batch_size:
+            through.objects.bulk_create(filas, ignore_conflicts=True)
+            filas = []
+    through.objects.bulk_create(filas, ignore_conflicts=True)
+    return proyectos, len(conocidos) - tags_antes
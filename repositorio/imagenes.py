@@ -0,0 +1,106 @@
+"""
+OASIS Repositorio — Responsive image variants (Pillow).
+
+For project thumbnails and image ArchivoProyecto files, the ``miniaturas``
+job (tareas.py) writes downscaled copies next to the original:
+
+    <name sin extension>.w<ancho>.webp
+    <name sin extension>.w<ancho>.jpg
+
+for every width in ANCHOS narrower than the original, and stores the widths
+it produced on the row (``thumbnail_variantes`` / ``variantes``). Templates
+build ``srcset`` from those widths with the ``repositorio_imagenes`` tag library, without
+touching the disk. Variants of a content-addressed blob are named after the
+blob, so they are shared by every row that uses it and are removed with it;
+those of a replaced project thumbnail are removed when the project is saved.
+
+``generar_variantes`` only needs a storage and a name, so the backfill
+command (``generar_variantes``) can run it on a process pool.
+"""
+
+import os
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+ANCHOS = (320, 640, 1280)
+FORMATOS = (('webp', 'WEBP', {'quality': 80, 'method': 4}),
+            ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}))
+EXTENSIONES_RASTER = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp'}
+
+VARIANTE_RE = re.compile(r'\.w\d+\.(?:webp|jpg)$')
+
+
+def variante_name(name, ancho, ext):
+    return f'{os.path.splitext(name)[0]}.w{ancho}.{ext}'
+
+
+def origen_de_variante(name):
+    """Name of the original without extension, or None if ``name`` is no variant."""
+    match = VARIANTE_RE.search(name)
+    return name[:match.start()] if match else None
+
+
+def es_raster(name):
+    return os.path.splitext(name)[1].lower().lstrip('.') in EXTENSIONES_RASTER
+
+
+def _a_rgb(img):
+    """Flattens transparency onto white for JPEG."""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        fondo = Image.new('RGB', img.size, (255, 255, 255))
+        fondo.paste(img, mask=img.getchannel('A'))
+        return fondo
+    return img.convert('RGB')
+
+
+def generar_variantes(storage, name):
+    """
+    Writes the WebP/JPEG variants of image ``name`` in ``storage`` and returns
+    the widths produced (empty if it is not a readable raster image, exceeds
+    Pillow's decompression-bomb limit or is already narrower than the
+    smallest width).
+    """
+    try:
+        with storage.open(name, 'rb') as f:
+            original = Image.open(f)
+            # JPEG: decode at 1/2, 1/4 or 1/8 scale while both sides stay at
+            # least as large as the widest variant.
+            original.draft('RGB', (ANCHOS[-1], ANCHOS[-1]))
+            original.load()
+    except (FileNotFoundError, UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        return []
+    original = ImageOps.exif_transpose(original)
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'transparency' in original.info
+                                    or original.mode in ('LA', 'P') else 'RGB')
+
+    ancho_original, alto_original = original.size
+    anchos = [ancho for ancho in ANCHOS if ancho < ancho_original]
+    if not anchos:
+        return []
+    # Shrink the full-size image once (box-reduced, then LANCZOS); the
+    # variants are resized from that copy.
+    original.thumbnail((anchos[-1], alto_original), Image.LANCZOS)
+    for ancho in anchos:
+        alto = max(1, round(alto_original * ancho / ancho_original))
+        reducida = original.resize((ancho, alto), Image.LANCZOS)
+        for ext, formato, opciones in FORMATOS:
+            destino = variante_name(name, ancho, ext)
+            if storage.exists(destino):
+                continue
+            buffer = BytesIO()
+            (reducida if formato == 'WEBP' else _a_rgb(reducida)).save(buffer, formato, **opciones)
+            storage.save(destino, ContentFile(buffer.getvalue()))
+    return anchos
+
+
+def borrar_variantes(storage, name, anchos=ANCHOS):
+    for ancho in anchos:
+        for ext, _, _ in FORMATOS:
+            destino = variante_name(name, ancho, ext)
+            if storage.exists(destino):
+                storage.delete(destino)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from repositorio.facets import recalcular_facetas
+from repositorio.herramientas import backfill_herramientas
+from repositorio.models import ProyectoGrado, TagHabilidad
+
+
+class Command(BaseCommand):
+    help = 'Convierte herramientas_usadas en tags (TagHabilidad) enlazados a cada proyecto.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        proyectos, creados = backfill_herramientas(
+            ProyectoGrado, TagHabilidad, batch_size=options['batch_size'],
+        )
+        recalcular_facetas()
+        self.stdout.write(self.style.SUCCESS(
+            f'{proyectos} proyecto(s) procesados, {creados} tag(s) nuevos.'
+        ))
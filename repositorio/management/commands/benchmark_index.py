@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.shortcuts import render
+from django.test import RequestFactory
+
+from OASIS import views
+from repositorio.models import ProyectoGrado, CARRERA_CHOICES, CLUSTER_CHOICES, CARRERA_A_CLUSTER
+
+
+def index_por_peticion(request):
+    """The landing page as it was built before precomputing: everything per request."""
+    carreras_data = []
+    for key, label in CARRERA_CHOICES:
+        cluster = CARRERA_A_CLUSTER.get(key, 'TICS')
+        meta = views.CLUSTER_META.get(cluster, {})
+        carreras_data.append({
+            'key': key,
+            'label': label,
+            'cluster': cluster,
+            'cluster_display': dict(CLUSTER_CHOICES).get(cluster, cluster),
+            'icon': views.CARRERA_ICONS.get(key, 'fa-graduation-cap'),
+            'color': meta.get('color', 'emerald'),
+        })
+    proyectos_destacados = list(
+        ProyectoGrado.objects.filter(destacado=True)
+        .order_by('-votos', '-fecha_publicacion')[:5]
+        .values('id', 'titulo', 'descripcion', 'carrera', 'autor', 'votos', 'imagen_url',
+                'enlace_repositorio')
+    )
+    clusters_data = []
+    for key, label in CLUSTER_CHOICES:
+        meta = views.CLUSTER_META.get(key, {})
+        count = sum(1 for c in CARRERA_CHOICES if CARRERA_A_CLUSTER.get(c[0]) == key)
+        clusters_data.append({
+            'key': key, 'label': label, 'icon': meta.get('icon', 'fa-folder'),
+            'color': meta.get('color', 'emerald'), 'count': count,
+        })
+    return render(request, 'index.html', {
+        'carreras': carreras_data,
+        'carreras_json': json.dumps(carreras_data),
+        'clusters': clusters_data,
+        'proyectos_destacados': proyectos_destacados,
+        'proyectos_json': json.dumps(proyectos_destacados, default=str),
+        'total_carreras': len(CARRERA_CHOICES),
+    })
+
+
+def _sin_cache(request):
+    views.invalidar_index()
+    return views.index(request)
+
+
+class Command(BaseCommand):
+    help = ('Mide peticiones por segundo de la pagina de inicio: construccion por peticion '
+            '(antes) frente a datos precalculados y cache de pagina (despues).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        n = options['requests']
+        factory = RequestFactory()
+        casos = (
+            ('antes (por peticion)', index_por_peticion),
+            ('despues, cache vacia', _sin_cache),
+            ('despues, anonimo', views.index),
+        )
+        views.invalidar_index()
+        for nombre, vista in casos:
+            vista(self._peticion(factory))  # warm-up (templates, first cache fill)
+            inicio = time.perf_counter()
+            for _ in range(n):
+                vista(self._peticion(factory))
+            rps = n / (time.perf_counter() - inicio)
+            self.stdout.write(f'{nombre:<22} | {rps:10.1f} peticiones/s')
+        views.invalidar_index()
+
+    def _peticion(self, factory):
+        request = factory.get('/')
+        request.user = AnonymousUser()
+        return request
@@ -0,0 +1,111 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from repositorio.models import ProyectoGrado, CARRERA_CHOICES
+from repositorio.search import IcontainsSearchBackend, get_search_backend
+
+VOCABULARIO = [
+    'sistema', 'gestion', 'inventario', 'aplicacion', 'movil', 'web', 'analisis',
+    'datos', 'control', 'automatizacion', 'prototipo', 'diseno', 'plataforma',
+    'seguridad', 'red', 'sensor', 'energia', 'agricola', 'salud', 'turismo',
+    'python', 'django', 'react', 'arduino', 'figma', 'blender', 'unity', 'mysql',
+]
+AUTORES = ['Ana Torres', 'Luis Gomez', 'Maria Rojas', 'Carlos Diaz', 'Sofia Ruiz']
+CONSULTAS = ['python', 'gestion inventario', 'arduino sensor', 'rojas', 'plat', 'diseno web']
+
+
+# Marks the synthetic rows; deletion goes by the pk range created by the run.
+FICHA_PREFIX = 'bench-'
+
+
+class Command(BaseCommand):
+    help = ('Mide la latencia de busqueda del explorador (icontains vs indice full-text) '
+            'con N proyectos sinteticos, en una base de datos temporal que se borra al terminar.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000])
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--bd-actual', action='store_true',
+                            help='Usar la base de datos actual (ya desechable, p. ej. en los tests) '
+                                 'en lugar de crear una temporal.')
+
+    def handle(self, *args, **options):
+        if options['bd_actual']:
+            self._benchmark(options)
+            return
+        # A throwaway database built like the test one (test_<NAME> on MySQL,
+        # in memory on SQLite): the synthetic projects never reach the site and
+        # a killed run leaves nothing behind in the real data.
+        nombre_real = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self._benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(nombre_real, verbosity=0)
+
+    def _benchmark(self, options):
+        # No surrounding transaction: InnoDB FULLTEXT only sees committed rows,
+        # and OPTIMIZE TABLE (MySQL rebuild) commits implicitly anyway.
+        backend = get_search_backend()
+        self.stdout.write(f'Backend full-text: {backend.name}')
+        try:
+            for size in options['sizes']:
+                desde = ProyectoGrado.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+                try:
+                    self._populate(size)
+                    backend.rebuild()
+                    for label, b in (('icontains', IcontainsSearchBackend()), (backend.name, backend)):
+                        median, p95 = self._measure(b, options['repeat'])
+                        self.stdout.write(
+                            f'{size:>7} proyectos | {label:<15} | '
+                            f'mediana {median:8.2f} ms | p95 {p95:8.2f} ms'
+                        )
+                finally:
+                    self._limpiar(desde)
+        finally:
+            backend.rebuild()
+
+    def _limpiar(self, desde):
+        # Only the rows this run created (pk above the previous maximum). Raw
+        # DELETE: bulk_create skipped the signals (facet counts included), so
+        # there is nothing for them to undo, and the rows have no tags, files
+        # or votes.
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {ProyectoGrado._meta.db_table} WHERE id > %s AND ficha LIKE %s',
+                           [desde, f'{FICHA_PREFIX}%'])
+
+    def _populate(self, size):
+        rng = random.Random(size)
+        carreras = [c[0] for c in CARRERA_CHOICES]
+        batch = []
+        for i in range(size):
+            batch.append(ProyectoGrado(
+                titulo=' '.join(rng.sample(VOCABULARIO, 4)).capitalize(),
+                descripcion=' '.join(rng.choices(VOCABULARIO, k=40)),
+                autor=rng.choice(AUTORES),
+                herramientas_usadas=', '.join(rng.sample(VOCABULARIO[-8:], 3)),
+                ficha=f'{FICHA_PREFIX}{i}',
+                carrera=rng.choice(carreras),
+                estado=ProyectoGrado.EstadoProyecto.PUBLICADO,
+            ))
+            if len(batch) == 5000:
+                ProyectoGrado.objects.bulk_create(batch)
+                batch = []
+        ProyectoGrado.objects.bulk_create(batch)
+
+    def _measure(self, backend, repeat):
+        published = ProyectoGrado.objects.filter(estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
+        timings = []
+        for _ in range(repeat):
+            for q in CONSULTAS:
+                start = time.perf_counter()
+                qs = backend.search(published, q)
+                qs.count()
+                list(qs.order_by('-search_rank', '-fecha_publicacion')[:60])
+                timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from OASIS.utils import format_bytes
+from repositorio import storage
+
+
+class Command(BaseCommand):
+    help = ('Mueve los archivos de proyecto al almacenamiento por contenido (SHA-256), '
+            'guardando una sola copia de cada archivo repetido.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo informa; no mueve ni borra archivos.')
+
+    def handle(self, *args, **options):
+        resumen = storage.deduplicar(dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{resumen['movidos']} movido(s), {resumen['duplicados']} duplicado(s) "
+            f"({format_bytes(resumen['bytes_liberados'])} liberados), "
+            f"{resumen['faltantes']} faltante(s)."
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from repositorio import results_cache
+
+
+class Command(BaseCommand):
+    help = 'Muestra los aciertos/fallos de la cache de resultados del explorador.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true',
+                            help='Pone los contadores en cero despues de mostrarlos.')
+
+    def handle(self, *args, **options):
+        stats = results_cache.estadisticas()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} "
+            f"hit_ratio={stats['hit_ratio']:.1%}"
+        )
+        if options['reset']:
+            results_cache.reiniciar_estadisticas()
+            self.stdout.write(self.style.SUCCESS('Contadores reiniciados.'))
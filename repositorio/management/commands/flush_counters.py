@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from repositorio import counters
+
+
+class Command(BaseCommand):
+    help = 'Escribe en la base de datos los contadores (vistas, descargas, votos) en buffer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=int, default=0, metavar='SEGUNDOS',
+                            help='Repite el flush cada SEGUNDOS en lugar de salir.')
+
+    def handle(self, *args, **options):
+        while True:
+            total = counters.flush()
+            self.stdout.write(f'Contadores escritos para {total} proyecto(s).')
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
+            close_old_connections()
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from OASIS.utils import format_bytes
+from repositorio import storage
+from repositorio.uploads import limpiar_subidas
+
+
+class Command(BaseCommand):
+    help = ('Borra los archivos del almacenamiento por contenido que ya no usa ningun proyecto '
+            'y las subidas fragmentadas abandonadas.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=None, metavar='SEGUNDOS',
+                            help='Antiguedad minima (por defecto REPOSITORIO_BLOB_GRACE_SECONDS).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Solo informa; no borra archivos.')
+
+    def handle(self, *args, **options):
+        borrados, liberados = storage.recolectar(gracia=options['grace'],
+                                                 dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{borrados} archivo(s) sin referencias, {format_bytes(liberados)} liberados.'
+        ))
+        if not options['dry_run']:
+            self.stdout.write(f'{limpiar_subidas()} subida(s) fragmentada(s) abandonada(s) borradas.')
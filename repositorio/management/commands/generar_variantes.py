@@ -0,0 +1,59 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from repositorio import imagenes
+from repositorio.models import ArchivoProyecto, ProyectoGrado
+
+
+def _storage(campo):
+    modelo = ArchivoProyecto if campo == 'archivo' else ProyectoGrado
+    return modelo._meta.get_field(campo).storage
+
+
+def _generar(trabajo):
+    """Runs in a pool process: only files, no database."""
+    campo, name = trabajo
+    return campo, name, imagenes.generar_variantes(_storage(campo), name)
+
+
+class Command(BaseCommand):
+    help = ('Genera las variantes WebP/JPEG (srcset) de las miniaturas de proyectos y de los '
+            'archivos de imagen existentes, en un pool de procesos.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+        parser.add_argument('--todos', action='store_true',
+                            help='Regenera tambien las imagenes que ya tienen variantes.')
+
+    def handle(self, *args, **options):
+        archivos = ArchivoProyecto.objects.filter(tipo='imagen')
+        proyectos = ProyectoGrado.objects.exclude(thumbnail='').exclude(thumbnail__isnull=True)
+        if not options['todos']:
+            archivos = archivos.filter(variantes=[])
+            proyectos = proyectos.filter(thumbnail_variantes=[])
+        trabajos = [('archivo', name) for name in
+                    archivos.values_list('archivo', flat=True).distinct() if imagenes.es_raster(name)]
+        trabajos += [('thumbnail', name) for name in
+                     proyectos.values_list('thumbnail', flat=True).distinct() if imagenes.es_raster(name)]
+
+        if options['procesos'] > 1 and len(trabajos) > 1:
+            # Children must not inherit open database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(options['procesos'], initializer=django.setup) as pool:
+                resultados = list(pool.map(_generar, trabajos, chunksize=8))
+        else:
+            resultados = [_generar(t) for t in trabajos]
+
+        for campo, name, anchos in resultados:
+            if campo == 'archivo':
+                ArchivoProyecto.objects.filter(archivo=name).update(variantes=anchos)
+            else:
+                ProyectoGrado.objects.filter(thumbnail=name).update(thumbnail_variantes=anchos)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(resultados)} imagen(es) procesadas, '
+            f'{sum(1 for *_, anchos in resultados if anchos)} con variantes.'
+        ))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from repositorio import comprimidos, tareas
+from repositorio.models import ArchivoProyecto
+
+
+class Command(BaseCommand):
+    help = ('Encola el indice de contenido de los archivos comprimidos (zip/tar/gz) que aun no '
+            'lo tienen; lo procesa `procesar_tareas`.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', action='store_true',
+                            help='Reindexa tambien los archivos que ya tienen indice.')
+
+    def handle(self, *args, **options):
+        archivos = ArchivoProyecto.objects.filter(tipo=ArchivoProyecto.TipoArchivo.COMPRIMIDO)
+        if not options['todos']:
+            archivos = archivos.filter(miembros__isnull=True)
+        total = 0
+        for archivo in archivos.distinct().iterator():
+            if not comprimidos.formato_de(archivo.nombre_original):
+                continue  # rar / 7z
+            tareas.encolar(archivo, tipos=['indice_comprimido'])
+            total += 1
+        self.stdout.write(self.style.SUCCESS(f'{total} archivo(s) comprimido(s) encolados.'))
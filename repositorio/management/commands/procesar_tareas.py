@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from repositorio import tareas
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas de procesamiento de archivos en cola (escaneo, miniaturas, ...).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrencia', type=int, default=2,
+                            help='Tareas ejecutadas a la vez por este worker.')
+        parser.add_argument('--intervalo', type=float, default=1.0, metavar='SEGUNDOS',
+                            help='Espera entre consultas cuando la cola esta vacia.')
+        parser.add_argument('--una-vez', action='store_true',
+                            help='Procesa lo disponible y termina.')
+
+    def handle(self, *args, **options):
+        while True:
+            total = tareas.procesar_pendientes(options['concurrencia'])
+            if total or options['una_vez']:
+                self.stdout.write(f'{total} tarea(s) procesada(s).')
+            if options['una_vez']:
+                break
+            if not total:
+                time.sleep(options['intervalo'])
+            close_old_connections()
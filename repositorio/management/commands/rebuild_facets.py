@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from repositorio.facets import recalcular_facetas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los conteos precalculados de facetas del explorador.'
+
+    def handle(self, *args, **options):
+        total = recalcular_facetas()
+        self.stdout.write(self.style.SUCCESS(f'Facetas recalculadas: {total} fila(s).'))
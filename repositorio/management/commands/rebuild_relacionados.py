@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from repositorio.recomendaciones import recalcular_relacionados
+
+
+class Command(BaseCommand):
+    help = ('Recalcula los proyectos relacionados precalculados (tags, TF-IDF del texto y '
+            'co-descargas). Pensado para ejecutarse periodicamente (cron).')
+
+    def handle(self, *args, **options):
+        total = recalcular_relacionados()
+        self.stdout.write(self.style.SUCCESS(f'Relacionados recalculados: {total} fila(s).'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from repositorio.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el indice de busqueda full-text de ProyectoGrado.'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        total = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indice reconstruido ({backend.name}): {total} proyecto(s).'
+        ))
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+FTS_TABLE = 'repositorio_proyecto_fts'
+PROYECTO_TABLE = 'repositorio_proyectogrado'
+FULLTEXT_INDEX = 'proyecto_fulltext_idx'
+SEARCH_FIELDS = ['titulo', 'descripcion', 'autor', 'herramientas_usadas', 'ficha']
+
+
+def create_fulltext_index(apps, schema_editor):
+    columns = ', '.join(SEARCH_FIELDS)
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} ON {PROYECTO_TABLE} ({columns});"
+        )
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                f"USING fts5({columns}, tokenize = 'unicode61 remove_diacritics 2');"
+            )
+        except Exception:
+            # SQLite built without FTS5: the app falls back to icontains search.
+            return
+        coalesced = ', '.join(f"COALESCE({f}, '')" for f in SEARCH_FIELDS)
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, {columns}) "
+            f"SELECT id, {coalesced} FROM {PROYECTO_TABLE};"
+        )
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(f"DROP INDEX {FULLTEXT_INDEX} ON {PROYECTO_TABLE};")
+    elif vendor == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE};")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0004_populate_carreras'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.11 on 2026-10-17 22:40
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_facetas(apps, schema_editor):
+    ProyectoGrado = apps.get_model('repositorio', 'ProyectoGrado')
+    FacetaConteo = apps.get_model('repositorio', 'FacetaConteo')
+    publicados = ProyectoGrado.objects.filter(estado='publicado').order_by()
+
+    filas = [
+        FacetaConteo(faceta='carrera', valor=carrera, conteo=c)
+        for carrera, c in publicados.values_list('carrera').annotate(c=Count('id'))
+    ]
+    filas += [
+        FacetaConteo(faceta='anio', valor=str(anio), conteo=c)
+        for anio, c in publicados.values_list('anio').annotate(c=Count('id'))
+    ]
+    filas += [
+        FacetaConteo(faceta='tag', valor=str(tag_id), conteo=c)
+        for tag_id, c in (
+            ProyectoGrado.tags.through.objects
+            .filter(proyectogrado__estado='publicado')
+            .values_list('taghabilidad_id').annotate(c=Count('id')).order_by()
+        )
+    ]
+    FacetaConteo.objects.bulk_create(filas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0005_proyecto_fulltext_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetaConteo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('faceta', models.CharField(choices=[('carrera', 'Carrera'), ('anio', 'Ano'), ('tag', 'Tag')], max_length=10)),
+                ('valor', models.CharField(help_text='Clave de carrera, ano o id del tag', max_length=80)),
+                ('conteo', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Conteo de Faceta',
+                'verbose_name_plural': 'Conteos de Facetas',
+                'constraints': [models.UniqueConstraint(fields=('faceta', 'valor'), name='unique_faceta_valor')],
+            },
+        ),
+        migrations.RunPython(populate_facetas, migrations.RunPython.noop),
+    ]
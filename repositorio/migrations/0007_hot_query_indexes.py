@@ -0,0 +1,63 @@
+# Generated by Django 5.2.11 on 2026-10-17 22:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0006_facetaconteo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivoproyecto',
+            index=models.Index(fields=['proyecto', 'fecha_subida'], name='archivo_proyecto_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivoproyecto',
+            index=models.Index(fields=['proyecto', 'tipo'], name='archivo_proyecto_tipo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['estado', 'fecha_publicacion'], name='proyecto_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['estado', 'votos'], name='proyecto_estado_votos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['estado', 'descargas'], name='proyecto_estado_descargas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['estado', 'titulo'], name='proyecto_estado_titulo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['estado', 'anio'], name='proyecto_estado_anio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['estado', 'carrera', 'anio'], name='proyecto_estado_carrera_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['carrera', 'estado', 'votos'], name='proyecto_carrera_votos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrodescarga',
+            index=models.Index(fields=['archivo', 'fecha'], name='descarga_archivo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrodescarga',
+            index=models.Index(fields=['usuario', 'fecha'], name='descarga_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registrodescarga',
+            index=models.Index(fields=['fecha'], name='descarga_fecha_idx'),
+        ),
+    ]
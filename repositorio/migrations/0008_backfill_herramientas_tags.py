@@ -0,0 +1,35 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:55
+
+from django.db import migrations
+from django.db.models import Count
+
+from repositorio.herramientas import backfill_herramientas
+
+
+def herramientas_a_tags(apps, schema_editor):
+    ProyectoGrado = apps.get_model('repositorio', 'ProyectoGrado')
+    TagHabilidad = apps.get_model('repositorio', 'TagHabilidad')
+    FacetaConteo = apps.get_model('repositorio', 'FacetaConteo')
+    backfill_herramientas(ProyectoGrado, TagHabilidad)
+
+    # Bulk inserts skip the m2m signals, so recount the tag facets here.
+    FacetaConteo.objects.filter(faceta='tag').delete()
+    FacetaConteo.objects.bulk_create([
+        FacetaConteo(faceta='tag', valor=str(tag_id), conteo=c)
+        for tag_id, c in (
+            ProyectoGrado.tags.through.objects
+            .filter(proyectogrado__estado='publicado')
+            .values_list('taghabilidad_id').annotate(c=Count('id')).order_by()
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(herramientas_a_tags, migrations.RunPython.noop),
+    ]
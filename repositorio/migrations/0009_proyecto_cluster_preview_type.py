@@ -0,0 +1,46 @@
+# Generated by Django 5.2.11 on 2026-10-17 22:52
+
+from django.db import migrations, models
+
+from repositorio.models import CARRERA_A_CLUSTER, CARRERA_A_PREVIEW
+
+
+def populate_cluster_preview(apps, schema_editor):
+    ProyectoGrado = apps.get_model('repositorio', 'ProyectoGrado')
+    Carrera = apps.get_model('repositorio', 'Carrera')
+    clusters = {**CARRERA_A_CLUSTER, **dict(Carrera.objects.values_list('clave', 'cluster'))}
+    # One UPDATE per career instead of one per project.
+    for carrera in ProyectoGrado.objects.values_list('carrera', flat=True).distinct().order_by():
+        ProyectoGrado.objects.filter(carrera=carrera).update(
+            cluster=clusters.get(carrera, 'TICS'),
+            preview_type=CARRERA_A_PREVIEW.get(carrera, 'DOCUMENT'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0008_backfill_herramientas_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proyectogrado',
+            name='cluster',
+            field=models.CharField(choices=[('TICS', 'Tecnologias de la Informacion'), ('ADMIN', 'Ciencias Administrativas'), ('SALUD', 'Salud y Bienestar'), ('INDUSTRIAL', 'Ingenieria e Industria'), ('CREATIVAS', 'Artes y Diseno'), ('AGRO', 'Agroindustria y Ambiente'), ('TURISMO', 'Turismo y Gastronomia')], default='TICS', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='proyectogrado',
+            name='preview_type',
+            field=models.CharField(choices=[('CODE', 'Visor de Codigo'), ('MEDIA_3D', 'Modelo 3D / Animacion'), ('GALLERY', 'Galeria de Imagenes'), ('DOCUMENT', 'Documento / PDF'), ('VIDEO', 'Video / Multimedia')], default='DOCUMENT', editable=False, max_length=10),
+        ),
+        migrations.RunPython(populate_cluster_preview, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['estado', 'cluster', 'fecha_publicacion'], name='proyecto_estado_cluster_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='proyectogrado',
+            index=models.Index(fields=['estado', 'preview_type', 'fecha_publicacion'], name='proyecto_estado_preview_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.11 on 2026-10-17 22:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0009_proyecto_cluster_preview_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='registrodescarga',
+            name='fecha',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
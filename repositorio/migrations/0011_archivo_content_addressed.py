@@ -0,0 +1,27 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:01
+
+import django.core.validators
+import repositorio.models
+import repositorio.storage
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0010_registrodescarga_fecha_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivoproyecto',
+            name='archivo',
+            field=models.FileField(storage=repositorio.storage.ContentAddressedStorage(), upload_to=repositorio.models.proyecto_upload_path, validators=[django.core.validators.FileExtensionValidator(allowed_extensions=['pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'py', 'js', 'html', 'css', 'java', 'cpp', 'c', 'cs', 'ts', 'jsx', 'tsx', 'json', 'xml', 'sql', 'txt', 'md', 'csv', 'zip', 'rar', '7z', 'tar', 'gz', 'jpg', 'jpeg', 'png', 'gif', 'svg', 'webp', 'bmp', 'mp4', 'avi', 'mov', 'mkv', 'webm', 'mp3', 'wav', 'ogg', 'obj', 'fbx', 'stl', 'gltf', 'glb', 'blend', 'psd', 'ai', 'fig', 'sketch'])]),
+        ),
+        migrations.AddIndex(
+            model_name='archivoproyecto',
+            index=models.Index(fields=['archivo'], name='archivo_blob_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0011_archivo_content_addressed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaProcesamiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(help_text='Ej: escanear, miniatura', max_length=30)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=12)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('max_intentos', models.PositiveSmallIntegerField(default=3)),
+                ('disponible_en', models.DateTimeField(default=django.utils.timezone.now, help_text='No se ejecuta antes (reintentos con espera)')),
+                ('bloqueada_hasta', models.DateTimeField(blank=True, help_text='Fin de la reserva del worker que la ejecuta', null=True)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('archivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tareas', to='repositorio.archivoproyecto')),
+            ],
+            options={
+                'verbose_name': 'Tarea de Procesamiento',
+                'verbose_name_plural': 'Tareas de Procesamiento',
+                'indexes': [models.Index(fields=['estado', 'disponible_en'], name='tarea_estado_disponible_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0012_tareaprocesamiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivoproyecto',
+            name='variantes',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Anchos generados de la imagen (ver imagenes.py)'),
+        ),
+        migrations.AddField(
+            model_name='proyectogrado',
+            name='thumbnail_variantes',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Anchos generados de la miniatura (ver imagenes.py)'),
+        ),
+        migrations.AddField(
+            model_name='tareaprocesamiento',
+            name='proyecto',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tareas', to='repositorio.proyectogrado'),
+        ),
+        migrations.AlterField(
+            model_name='tareaprocesamiento',
+            name='archivo',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tareas', to='repositorio.archivoproyecto'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0013_variantes_imagen'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProyectoRelacionado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posicion', models.PositiveSmallIntegerField()),
+                ('puntaje', models.FloatField()),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionados_calculados', to='repositorio.proyectogrado')),
+                ('relacionado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='relacionado_con', to='repositorio.proyectogrado')),
+            ],
+            options={
+                'verbose_name': 'Proyecto Relacionado',
+                'verbose_name_plural': 'Proyectos Relacionados',
+                'ordering': ['proyecto', 'posicion'],
+                'constraints': [models.UniqueConstraint(fields=('proyecto', 'posicion'), name='unique_relacionado_posicion')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0014_proyectos_relacionados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Voto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votos_usuarios', to='repositorio.proyectogrado')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Voto',
+                'verbose_name_plural': 'Votos',
+                'ordering': ['-fecha'],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'proyecto'), name='unique_voto_usuario_proyecto')],
+            },
+        ),
+    ]
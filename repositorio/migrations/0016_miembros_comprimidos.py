@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0015_voto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MiembroArchivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ruta', models.CharField(help_text='Ruta dentro del archivo comprimido', max_length=500)),
+                ('tamano', models.BigIntegerField(help_text='Tamano descomprimido en bytes')),
+                ('tamano_comprimido', models.BigIntegerField(blank=True, null=True)),
+                ('archivo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='miembros', to='repositorio.archivoproyecto')),
+            ],
+            options={
+                'verbose_name': 'Miembro de Archivo Comprimido',
+                'verbose_name_plural': 'Miembros de Archivos Comprimidos',
+                'ordering': ['ruta'],
+                'indexes': [models.Index(fields=['archivo', 'ruta'], name='miembro_archivo_ruta_idx')],
+            },
+        ),
+    ]
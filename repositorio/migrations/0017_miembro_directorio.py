@@ -0,0 +1,36 @@
+# Generated by Django 5.2.11 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+def rellenar_directorio(apps, schema_editor):
+    MiembroArchivo = apps.get_model('repositorio', 'MiembroArchivo')
+    lote = []
+    for miembro in MiembroArchivo.objects.only('pk', 'ruta').iterator(chunk_size=2000):
+        miembro.directorio = miembro.ruta.rpartition('/')[0]
+        if miembro.directorio:
+            lote.append(miembro)
+        if len(lote) >= 1000:
+            MiembroArchivo.objects.bulk_update(lote, ['directorio'])
+            lote = []
+    MiembroArchivo.objects.bulk_update(lote, ['directorio'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0016_miembros_comprimidos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='miembroarchivo',
+            name='directorio',
+            field=models.CharField(blank=True, default='', help_text='Directorio padre de la ruta ("" en la raiz)', max_length=500),
+        ),
+        migrations.RunPython(rellenar_directorio, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='miembroarchivo',
+            index=models.Index(fields=['archivo', 'directorio'], name='miembro_archivo_dir_idx'),
+        ),
+    ]
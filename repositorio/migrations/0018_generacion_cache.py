@@ -0,0 +1,25 @@
+# Generated by Django 5.2.11 on 2026-10-17 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('repositorio', '0017_miembro_directorio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeneracionCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100, unique=True)),
+                ('valor', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Generacion de Cache',
+                'verbose_name_plural': 'Generaciones de Cache',
+            },
+        ),
+    ]
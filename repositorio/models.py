@@ -1,10 +1,12 @@
 import os
 import uuid
 from django.db import models
+from django.utils import timezone
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 
 from OASIS.utils import format_bytes
+from .storage import blob_name, blob_storage, sha256_de
 
 
 CLUSTER_CHOICES = [
@@ -116,6 +118,7 @@ CARRERA_A_PREVIEW = {
     # Document-based (everything else defaults to DOCUMENT)
 }
 
+
 # ── Unified extension → (tipo, icon_class) mapping ──
 # Single source of truth for both detect_tipo() and icon_class property
 EXTENSION_MAP = {
@@ -198,12 +201,25 @@ ALLOWED_EXTENSIONS = [
 ]
 
 
+def clasificar_carrera(clave):
+    """
+    (cluster, preview_type) stored on ProyectoGrado for a career key. The
+    cluster comes from the Carrera table when the career exists there.
+    """
+    cluster = Carrera.objects.filter(clave=clave).values_list('cluster', flat=True).first()
+    return (
+        cluster or CARRERA_A_CLUSTER.get(clave, 'TICS'),
+        CARRERA_A_PREVIEW.get(clave, 'DOCUMENT'),
+    )
+
+
 def proyecto_upload_path(instance, filename):
-    """Generates: media/repositorio/<carrera>/<year>/<uuid>_<filename>"""
-    safe_name = f"{uuid.uuid4().hex[:8]}_{filename}"
-    pub_date = getattr(instance.proyecto, 'fecha_publicacion', None)
-    year = pub_date.year if pub_date else instance.proyecto.anio
-    return os.path.join('repositorio', instance.proyecto.carrera, str(year), safe_name)
+    """Generates: media/repositorio/blobs/<aa>/<bb>/<sha256>.<ext> (content-addressed)"""
+    # Hashed from the bytes being stored, so the name always matches the
+    # content (the admin can replace a file without touching hash_sha256).
+    # HashingUploadHandler already hashed the upload while it streamed in.
+    instance.hash_sha256 = getattr(instance.archivo.file, 'sha256', None) or sha256_de(instance.archivo)
+    return blob_name(instance.hash_sha256, filename)
 
 
 def thumbnail_upload_path(instance, filename):
@@ -270,6 +286,10 @@ class ProyectoGrado(models.Model):
         upload_to=thumbnail_upload_path, blank=True, null=True,
         help_text='Miniatura del proyecto (recomendado: 400x300px)',
     )
+    thumbnail_variantes = models.JSONField(
+        default=list, blank=True, editable=False,
+        help_text='Anchos generados de la miniatura (ver imagenes.py)',
+    )
     imagen_url = models.URLField(
         blank=True,
         help_text='URL de imagen externa (alternativa a thumbnail)',
@@ -299,27 +319,50 @@ class ProyectoGrado(models.Model):
     fecha_publicacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
+    # ── Derived from carrera (see clasificar_carrera) ──
+    cluster = models.CharField(max_length=20, choices=CLUSTER_CHOICES, default='TICS',
+                               editable=False)
+    preview_type = models.CharField(max_length=10, choices=PREVIEW_TYPE_CHOICES,
+                                    default='DOCUMENT', editable=False)
+
     class Meta:
         ordering = ['-destacado', '-votos', '-fecha_publicacion']
         verbose_name = 'Proyecto de Grado'
         verbose_name_plural = 'Proyectos de Grado'
+        # Shaped after the explorer / detail / landing queries. Each explorer
+        # sort gets (estado, sort_key): the implicit trailing primary key makes
+        # them serve the keyset tie-break on id as well.
+        indexes = [
+            models.Index(fields=['estado', 'fecha_publicacion'], name='proyecto_estado_fecha_idx'),
+            models.Index(fields=['estado', 'votos'], name='proyecto_estado_votos_idx'),
+            models.Index(fields=['estado', 'descargas'], name='proyecto_estado_descargas_idx'),
+            models.Index(fields=['estado', 'titulo'], name='proyecto_estado_titulo_idx'),
+            models.Index(fields=['estado', 'anio'], name='proyecto_estado_anio_idx'),
+            # Career filter, facet grouping (covering) and related projects.
+            models.Index(fields=['estado', 'carrera', 'anio'], name='proyecto_estado_carrera_idx'),
+            models.Index(fields=['carrera', 'estado', 'votos'], name='proyecto_carrera_votos_idx'),
+            # Cluster / preview-type filters.
+            models.Index(fields=['estado', 'cluster', 'fecha_publicacion'], name='proyecto_estado_cluster_idx'),
+            models.Index(fields=['estado', 'preview_type', 'fecha_publicacion'],
+                         name='proyecto_estado_preview_idx'),
+        ]
 
     def __str__(self):
         return f"{self.titulo} — {self.get_carrera_display()}"
 
-    @property
-    def cluster(self):
-        return CARRERA_A_CLUSTER.get(self.carrera, 'TICS')
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'carrera' in update_fields:
+            self.cluster, self.preview_type = clasificar_carrera(self.carrera)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'cluster', 'preview_type'}
+        super().save(*args, **kwargs)
 
     @property
     def cluster_display(self):
         cluster_key = self.cluster
         return dict(CLUSTER_CHOICES).get(cluster_key, cluster_key)
 
-    @property
-    def preview_type(self):
-        return CARRERA_A_PREVIEW.get(self.carrera, 'DOCUMENT')
-
     @property
     def preview_type_display(self):
         return dict(PREVIEW_TYPE_CHOICES).get(self.preview_type, 'Documento')
@@ -334,14 +377,19 @@ class ProyectoGrado(models.Model):
 
     @property
     def tags_list(self):
-        if self.herramientas_usadas:
-            return [t.strip() for t in self.herramientas_usadas.split(',') if t.strip()]
-        return []
+        # Tool names now live in TagHabilidad (see herramientas.py); reuses a
+        # prefetch_related('tags') cache when present.
+        return [t.nombre for t in self.tags.all()]
 
     @property
     def archivos_count(self):
-        # Use len() to leverage prefetch_related cache instead of hitting DB
-        return len(self.archivos.all())
+        # Listings annotate num_archivos (see filters.anotar_num_archivos);
+        # otherwise reuse a prefetch_related cache, or fall back to COUNT(*).
+        if 'num_archivos' in self.__dict__:
+            return self.num_archivos
+        if 'archivos' in getattr(self, '_prefetched_objects_cache', {}):
+            return len(self.archivos.all())
+        return self.archivos.count()
 
     @property
     def es_publicado(self):
@@ -365,7 +413,7 @@ class ArchivoProyecto(models.Model):
         ProyectoGrado, on_delete=models.CASCADE, related_name='archivos',
     )
     archivo = models.FileField(
-        upload_to=proyecto_upload_path,
+        upload_to=proyecto_upload_path, storage=blob_storage,
         validators=[FileExtensionValidator(allowed_extensions=ALLOWED_EXTENSIONS)],
     )
     nombre_original = models.CharField(max_length=255)
@@ -374,6 +422,8 @@ class ArchivoProyecto(models.Model):
     size_bytes = models.BigIntegerField(default=0)
     hash_sha256 = models.CharField(max_length=64, blank=True,
                                    help_text='Hash de integridad')
+    variantes = models.JSONField(default=list, blank=True, editable=False,
+                                 help_text='Anchos generados de la imagen (ver imagenes.py)')
     scan_status = models.CharField(max_length=20, default='pending',
                                    choices=[('pending', 'Pendiente'),
                                             ('clean', 'Limpio'),
@@ -392,6 +442,12 @@ class ArchivoProyecto(models.Model):
         ordering = ['-fecha_subida']
         verbose_name = 'Archivo de Proyecto'
         verbose_name_plural = 'Archivos de Proyecto'
+        indexes = [
+            models.Index(fields=['proyecto', 'fecha_subida'], name='archivo_proyecto_fecha_idx'),
+            models.Index(fields=['proyecto', 'tipo'], name='archivo_proyecto_tipo_idx'),
+            # Blob reference counts (storage.referencias / gc_blobs).
+            models.Index(fields=['archivo'], name='archivo_blob_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_original} ({self.proyecto.titulo})"
@@ -415,6 +471,36 @@ class ArchivoProyecto(models.Model):
         return entry[0] if entry else 'otro'
 
 
+class MiembroArchivo(models.Model):
+    """File inside an indexed zip/tar/gz ArchivoProyecto (see comprimidos.py)."""
+    archivo = models.ForeignKey(ArchivoProyecto, on_delete=models.CASCADE, related_name='miembros')
+    ruta = models.CharField(max_length=500, help_text='Ruta dentro del archivo comprimido')
+    directorio = models.CharField(max_length=500, blank=True, default='',
+                                  help_text='Directorio padre de la ruta ("" en la raiz)')
+    tamano = models.BigIntegerField(help_text='Tamano descomprimido en bytes')
+    tamano_comprimido = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['ruta']
+        verbose_name = 'Miembro de Archivo Comprimido'
+        verbose_name_plural = 'Miembros de Archivos Comprimidos'
+        indexes = [
+            models.Index(fields=['archivo', 'ruta'], name='miembro_archivo_ruta_idx'),
+            models.Index(fields=['archivo', 'directorio'], name='miembro_archivo_dir_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.archivo.nombre_original}:{self.ruta}"
+
+    @property
+    def nombre(self):
+        return self.ruta.rsplit('/', 1)[-1]
+
+    @property
+    def size_display(self):
+        return format_bytes(self.tamano)
+
+
 class RegistroDescarga(models.Model):
     """Tracks who downloaded what and when (audit trail)."""
     archivo = models.ForeignKey(ArchivoProyecto, on_delete=models.CASCADE,
@@ -422,18 +508,145 @@ class RegistroDescarga(models.Model):
     usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
                                 null=True, blank=True)
     ip_address = models.GenericIPAddressField(blank=True, null=True)
-    fecha = models.DateTimeField(auto_now_add=True)
+    # Set when the download happens; rows are written later in batches (audit.py).
+    fecha = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['-fecha']
         verbose_name = 'Registro de Descarga'
         verbose_name_plural = 'Registros de Descarga'
+        indexes = [
+            models.Index(fields=['archivo', 'fecha'], name='descarga_archivo_fecha_idx'),
+            models.Index(fields=['usuario', 'fecha'], name='descarga_usuario_fecha_idx'),
+            models.Index(fields=['fecha'], name='descarga_fecha_idx'),
+        ]
 
     def __str__(self):
         user = self.usuario.username if self.usuario else 'Anonimo'
         return f"{user} -> {self.archivo.nombre_original}"
 
 
+class Voto(models.Model):
+    """One vote per user and project; inserted with INSERT-or-ignore (see votos.py)."""
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                related_name='votos')
+    proyecto = models.ForeignKey(ProyectoGrado, on_delete=models.CASCADE,
+                                 related_name='votos_usuarios')
+    fecha = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ['-fecha']
+        verbose_name = 'Voto'
+        verbose_name_plural = 'Votos'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'proyecto'],
+                                    name='unique_voto_usuario_proyecto'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} -> {self.proyecto_id}"
+
+
+class TareaProcesamiento(models.Model):
+    """Post-upload job on a file or project, run by `procesar_tareas` (see tareas.py)."""
+
+    class Estado(models.TextChoices):
+        PENDIENTE = 'pendiente', 'Pendiente'
+        EN_CURSO = 'en_curso', 'En curso'
+        COMPLETADA = 'completada', 'Completada'
+        FALLIDA = 'fallida', 'Fallida'
+
+    tipo = models.CharField(max_length=30, help_text='Ej: escanear, miniatura')
+    archivo = models.ForeignKey(ArchivoProyecto, on_delete=models.CASCADE,
+                                null=True, blank=True, related_name='tareas')
+    proyecto = models.ForeignKey(ProyectoGrado, on_delete=models.CASCADE,
+                                 null=True, blank=True, related_name='tareas')
+    estado = models.CharField(max_length=12, choices=Estado.choices,
+                              default=Estado.PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=3)
+    disponible_en = models.DateTimeField(default=timezone.now,
+                                         help_text='No se ejecuta antes (reintentos con espera)')
+    bloqueada_hasta = models.DateTimeField(null=True, blank=True,
+                                           help_text='Fin de la reserva del worker que la ejecuta')
+    error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Tarea de Procesamiento'
+        verbose_name_plural = 'Tareas de Procesamiento'
+        indexes = [
+            models.Index(fields=['estado', 'disponible_en'], name='tarea_estado_disponible_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} {self.objetivo} ({self.get_estado_display()})"
+
+    @property
+    def objetivo(self):
+        """The ArchivoProyecto or ProyectoGrado the job works on."""
+        return self.archivo if self.archivo_id else self.proyecto
+
+
+class FacetaConteo(models.Model):
+    """Precomputed sidebar facet counts over published projects (see facets.py)."""
+
+    class Faceta(models.TextChoices):
+        CARRERA = 'carrera', 'Carrera'
+        ANIO = 'anio', 'Ano'
+        TAG = 'tag', 'Tag'
+
+    faceta = models.CharField(max_length=10, choices=Faceta.choices)
+    valor = models.CharField(max_length=80, help_text='Clave de carrera, ano o id del tag')
+    conteo = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Conteo de Faceta'
+        verbose_name_plural = 'Conteos de Facetas'
+        constraints = [
+            models.UniqueConstraint(fields=['faceta', 'valor'], name='unique_faceta_valor'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_faceta_display()} {self.valor}: {self.conteo}"
+
+
+class GeneracionCache(models.Model):
+    """Shared version of a cached structure, bumped on change (see generaciones.py)."""
+    nombre = models.CharField(max_length=100, unique=True)
+    valor = models.BigIntegerField()
+
+    class Meta:
+        verbose_name = 'Generacion de Cache'
+        verbose_name_plural = 'Generaciones de Cache'
+
+    def __str__(self):
+        return f"{self.nombre}: {self.valor}"
+
+
+class ProyectoRelacionado(models.Model):
+    """Precomputed top-K related projects, rebuilt by `rebuild_relacionados` (see recomendaciones.py)."""
+    proyecto = models.ForeignKey(ProyectoGrado, on_delete=models.CASCADE,
+                                 related_name='relacionados_calculados')
+    relacionado = models.ForeignKey(ProyectoGrado, on_delete=models.CASCADE,
+                                    related_name='relacionado_con')
+    posicion = models.PositiveSmallIntegerField()
+    puntaje = models.FloatField()
+
+    class Meta:
+        ordering = ['proyecto', 'posicion']
+        verbose_name = 'Proyecto Relacionado'
+        verbose_name_plural = 'Proyectos Relacionados'
+        constraints = [
+            models.UniqueConstraint(fields=['proyecto', 'posicion'],
+                                    name='unique_relacionado_posicion'),
+        ]
+
+    def __str__(self):
+        return f"{self.proyecto_id} -> {self.relacionado_id} ({self.puntaje:.3f})"
+
+
 class Carrera(models.Model):
     """Carrera model for admin CRUD. Source of truth for career management."""
     clave = models.CharField(max_length=50, unique=True,
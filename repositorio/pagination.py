@@ -0,0 +1,132 @@
+"""
+OASIS Repositorio — Keyset (cursor) pagination for the explorer.
+
+Each sort is an ordered list of (field, descending) keys ending in ``id`` as a
+unique tie-break. The cursor stores the sort keys of the last row served, so
+the next page is a range seek (``WHERE key < last``) on the matching index
+instead of an OFFSET scan: page 500 costs the same as page 1.
+
+Cursors are signed with django.core.signing, so clients treat them as opaque
+tokens and cannot forge arbitrary WHERE values.
+
+Relevance pages seek on (search_rank, fecha_publicacion, id) the same way: the
+cursor carries the rank of the last row, and the rank expression the search
+backend selected (annotation, or the SQLite backend's extra select) is
+compared in the WHERE clause. The rank is recomputed with the same query on
+every page, so equal ranks compare equal and ties fall through to the date
+and id.
+"""
+
+from django.core import signing
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+PAGE_SIZE = 60
+CURSOR_SALT = 'repositorio.explorador.cursor'
+
+SORT_KEYS = {
+    'recientes': [('fecha_publicacion', True), ('id', True)],
+    'populares': [('votos', True), ('id', True)],
+    'descargas': [('descargas', True), ('id', True)],
+    'titulo': [('titulo', False), ('id', False)],
+}
+DEFAULT_SORT = 'recientes'
+RELEVANCE_SORT = 'relevancia'
+RELEVANCE_KEYS = [('search_rank', True), ('fecha_publicacion', True), ('id', True)]
+RELEVANCE_ORDER = ['-search_rank', '-fecha_publicacion', '-id']
+
+
+def ordering_for(sort):
+    """ORDER BY clause for a sort name (keys in SORT_KEYS, or relevance)."""
+    if sort == RELEVANCE_SORT:
+        return RELEVANCE_ORDER
+    keys = SORT_KEYS.get(sort, SORT_KEYS[DEFAULT_SORT])
+    return [f'-{field}' if desc else field for field, desc in keys]
+
+
+def encode_cursor(sort, values):
+    return signing.dumps({'s': sort, 'v': values}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, sort):
+    """Returns the cursor values, or None for a missing/invalid/foreign cursor."""
+    if not token:
+        return None
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+    if data.get('s') != sort:
+        return None
+    return data.get('v')
+
+
+def _to_python(model, field, raw):
+    if field == 'search_rank':
+        return float(raw)
+    return model._meta.get_field(field).to_python(raw)
+
+
+def _keyset_filter(model, keys, values, lookups=None):
+    """
+    k1 <= v1 AND ((k1 < v1) OR (k1 = v1 AND k2 < v2) ...) for the given keys.
+    The redundant leading bound lets the planner turn the OR into a range
+    seek on the (estado, k1) index instead of walking it from the start.
+    ``lookups`` renames keys for filter() (e.g. an alias of the rank).
+    """
+    lookups = lookups or {}
+    condition = Q()
+    equal = {}
+    for (field, desc), raw in zip(keys, values):
+        value = _to_python(model, field, raw)
+        name = lookups.get(field, field)
+        lookup = 'lt' if desc else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    first, desc = keys[0]
+    first = lookups.get(first, first)
+    bound = Q(**{f'{first}__{"lte" if desc else "gte"}': equal[first]})
+    return bound & condition
+
+
+def _relevance_filter(qs, values):
+    extra = qs.query.extra_select.get('search_rank')
+    if extra is None:  # an annotation: filter() takes it as is
+        return qs.filter(_keyset_filter(qs.model, RELEVANCE_KEYS, values))
+    # .extra(select=...) (SQLite FTS5) is not visible to filter(): alias the same SQL.
+    sql, params = extra
+    qs = qs.alias(search_rank_cursor=RawSQL(sql, params, output_field=FloatField()))
+    return qs.filter(_keyset_filter(qs.model, RELEVANCE_KEYS, values,
+                                    {'search_rank': 'search_rank_cursor'}))
+
+
+def keyset_queryset(qs, sort, values):
+    """``qs`` ordered by ``sort`` and positioned after the cursor ``values``."""
+    qs = qs.order_by(*ordering_for(sort))
+    if not values:
+        return qs
+    if sort == RELEVANCE_SORT:
+        return _relevance_filter(qs, values)
+    keys = SORT_KEYS.get(sort, SORT_KEYS[DEFAULT_SORT])
+    return qs.filter(_keyset_filter(qs.model, keys, values))
+
+
+def paginate(qs, sort, token, page_size=PAGE_SIZE):
+    """
+    Returns (items, next_cursor) for ``qs`` ordered by ``sort``.
+    ``next_cursor`` is None on the last page.
+    """
+    keys = RELEVANCE_KEYS if sort == RELEVANCE_SORT else SORT_KEYS.get(sort, SORT_KEYS[DEFAULT_SORT])
+    values = decode_cursor(token, sort)
+    if not isinstance(values, list) or len(values) != len(keys):
+        values = None  # includes offset cursors issued before relevance used keysets
+    items = list(keyset_queryset(qs, sort, values)[:page_size + 1])
+    if len(items) <= page_size:
+        return items, None
+    last = items[page_size - 1]
+    return items[:page_size], encode_cursor(
+        sort, [_serialize(getattr(last, field)) for field, _ in keys])
+
+
+def _serialize(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
@@ -0,0 +1,55 @@
+"""
+OASIS Repositorio — Periodic flush from a daemon thread.
+
+In-process buffers (``counters.LocalCounterBuffer``,
+``audit.DownloadAuditQueue``) inherit FlushPeriodico and implement
+``flush()``. The thread is started lazily by ``_arrancar()`` on the first
+write, i.e. inside the worker after fork, and ``flush()`` also runs at
+interpreter exit. An interval of 0 starts no thread.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.db import connection
+
+
+class FlushPeriodico:
+    """Calls ``self.flush()`` every ``intervalo`` seconds and at exit."""
+
+    nombre_hilo = 'repositorio-flush'
+    mensaje_error = 'No se pudo escribir el buffer del repositorio.'
+    errores = (Exception,)  # logged under the subclass' module; retried on the next tick
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def flush(self):
+        raise NotImplementedError
+
+    def _arrancar(self):
+        if self._hilo is not None or self.intervalo <= 0:
+            return
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._hilo = threading.Thread(target=self._bucle, name=self.nombre_hilo, daemon=True)
+            self._hilo.start()
+        atexit.register(self._flush_seguro)
+
+    def _bucle(self):
+        while True:
+            time.sleep(self.intervalo)
+            self._flush_seguro()
+
+    def _flush_seguro(self):
+        try:
+            self.flush()
+        except self.errores:
+            logging.getLogger(type(self).__module__).exception(self.mensaje_error)
+        finally:
+            connection.close()
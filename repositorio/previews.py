@@ -0,0 +1,113 @@
+"""
+OASIS Repositorio — Server-side preview of source code files.
+
+``vista_previa(archivo)`` highlights the first lines of a ``codigo``
+ArchivoProyecto with Pygments and caches the HTML under the file's SHA-256
+(plus extension, which picks the lexer). Identical files uploaded to several
+projects share the blob and therefore the rendered preview; the content
+behind a hash never changes, so entries only expire to free cache space.
+
+Only a bounded prefix is read: at most REPOSITORIO_PREVIEW_MAX_BYTES and
+REPOSITORIO_PREVIEW_MAX_LINES, cut at a line boundary. Files larger than
+MMAP_MIN are memory-mapped and scanned in place for the cut, so a large
+source file is never copied whole into memory. Files with NUL bytes in the
+prefix are treated as binary and get no preview.
+"""
+
+import mmap
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import TextLexer, get_lexer_for_filename
+from pygments.util import ClassNotFound
+
+CACHE_PREFIX = 'repositorio:preview:v1'
+CACHE_TIMEOUT = 30 * 24 * 3600
+MMAP_MIN = 1024 * 1024
+
+FORMATTER = HtmlFormatter(cssclass='codehilite', style='github-dark', linenos='table', wrapcode=True)
+CSS = FORMATTER.get_style_defs('.codehilite')
+
+# Stored for files without a preview (binary, missing), so they are not re-read.
+SIN_PREVIEW = {'html': '', 'lineas': 0, 'truncado': False}
+
+
+def _corte(datos, limite_bytes, limite_lineas):
+    """Length of the prefix of ``datos`` within both limits, ending at a newline if cut."""
+    fin = min(len(datos), limite_bytes)
+    pos = 0
+    for _ in range(limite_lineas):
+        salto = datos.find(b'\n', pos, fin)
+        if salto < 0:
+            break
+        pos = salto + 1
+    else:
+        return pos
+    if fin == len(datos):
+        return fin
+    return pos or fin  # one huge line: cut mid-line
+
+
+def leer_prefijo(archivo_field):
+    """(bytes of the prefix, whether the file continues) for a FieldFile."""
+    max_bytes = settings.REPOSITORIO_PREVIEW_MAX_BYTES
+    max_lineas = settings.REPOSITORIO_PREVIEW_MAX_LINES
+    try:
+        path = archivo_field.path
+    except NotImplementedError:  # remote storage: a bounded read
+        with archivo_field.open('rb') as f:
+            datos = f.read(max_bytes + 1)
+        corte = _corte(datos, max_bytes, max_lineas)
+        return datos[:corte], corte < len(datos)
+
+    with open(path, 'rb') as f:
+        tamano = os.fstat(f.fileno()).st_size
+        if tamano < MMAP_MIN:
+            datos = f.read(max_bytes + 1)
+            corte = _corte(datos, max_bytes, max_lineas)
+            return datos[:corte], corte < tamano
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            corte = _corte(mapa, max_bytes, max_lineas)
+            return mapa[:corte], corte < tamano
+
+
+def renderizar(nombre, datos, truncado):
+    if b'\0' in datos:
+        return SIN_PREVIEW
+    texto = datos.decode('utf-8', errors='replace')
+    try:
+        lexer = get_lexer_for_filename(nombre, stripnl=False)
+    except ClassNotFound:
+        lexer = TextLexer(stripnl=False)
+    return {
+        'html': highlight(texto, lexer, FORMATTER),
+        'lineas': texto.count('\n') + bool(texto and not texto.endswith('\n')),
+        'truncado': truncado,
+    }
+
+
+def _cache_key(archivo):
+    return f'{CACHE_PREFIX}:{archivo.hash_sha256}:{archivo.extension}'
+
+
+def vista_previa(archivo):
+    """
+    {'html', 'lineas', 'truncado'} for an ArchivoProyecto (html is empty when
+    there is nothing to show). Cached by content hash.
+    """
+    key = _cache_key(archivo) if archivo.hash_sha256 else None
+    if key:
+        preview = cache.get(key)
+        if preview is not None:
+            return preview
+    try:
+        datos, truncado = leer_prefijo(archivo.archivo)
+    except (FileNotFoundError, ValueError):
+        return SIN_PREVIEW  # missing on disk: not cached, it may be restored
+    preview = renderizar(archivo.nombre_original, datos, truncado)
+    if key:
+        cache.set(key, preview, CACHE_TIMEOUT)
+    return preview
@@ -0,0 +1,197 @@
+"""
+OASIS Repositorio — Precomputed "related projects".
+
+``recalcular_relacionados`` scores every pair of published projects and keeps
+the TOP_K best for each one in ProyectoRelacionado, so the detail page reads
+them with a single indexed lookup. The score is a weighted sum (PESOS) of
+three cosine similarities:
+
+  - tags: shared TagHabilidad (binary vectors).
+  - texto: TF-IDF of titulo + descripcion (accent-free tokens, Spanish stop
+    words dropped).
+  - descargas: co-downloads, i.e. users who downloaded files of both projects
+    (RegistroDescarga).
+
+Each signal is a scipy CSR matrix X (one L2-normalised row per project) and
+the similarities are the sparse product X·Xᵀ, computed in compiled code in
+slices of BLOQUE rows; the best TOP_K of every row are picked with
+``argpartition``. The product costs the sum of df² over the terms and its
+result holds up to that many entries, so terms shared by more than MAX_DF of
+the projects are dropped first: they carry almost no signal and would fill
+the matrix towards n².
+
+Run ``python manage.py rebuild_relacionados`` periodically (cron). Projects
+published since the last run have no rows yet and fall back to projects of
+the same career.
+"""
+
+import re
+from collections import Counter
+
+import numpy as np
+from django.db import transaction
+from scipy import sparse
+
+from .models import ProyectoGrado, ProyectoRelacionado, RegistroDescarga
+from .suggest import normalizar
+
+TOP_K = 8
+MOSTRAR = 4
+PESOS = {'tags': 0.35, 'texto': 0.45, 'descargas': 0.2}
+MAX_DF = 0.5
+MIN_POSTINGS = 50  # below this many projects per term, MAX_DF does not apply
+MIN_TOKEN = 3
+BLOQUE = 2000  # projects per slice of the similarity product
+
+STOP_WORDS = frozenset('''
+    para por con los las del una unos unas que como mas sus sin sobre entre desde
+    hasta este esta estos estas ese esa eso ser son fue han hay muy tambien
+    donde cuando cual cuales porque pero sino asi todo todos toda todas cada
+    otro otra otros otras mediante traves permite realizar proyecto
+'''.split())
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+PUBLICADO = ProyectoGrado.EstadoProyecto.PUBLICADO
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SPARSE MATRICES
+# ═══════════════════════════════════════════════════════════════════════════
+
+def tokens(texto):
+    return [t for t in _TOKEN_RE.findall(normalizar(texto))
+            if len(t) >= MIN_TOKEN and t not in STOP_WORDS]
+
+
+def _csr(vectores):
+    """[{term: weight}] (one dict per project) -> CSR matrix projects x terms."""
+    columnas = {}
+    filas, cols, datos = [], [], []
+    for fila, vector in enumerate(vectores):
+        for termino, peso in vector.items():
+            filas.append(fila)
+            cols.append(columnas.setdefault(termino, len(columnas)))
+            datos.append(peso)
+    return sparse.csr_matrix((datos, (filas, cols)), shape=(len(vectores), len(columnas)),
+                             dtype=np.float64)
+
+
+def _unitario(matriz):
+    """Rows scaled to unit L2 norm (empty rows stay empty)."""
+    normas = np.sqrt(np.asarray(matriz.multiply(matriz).sum(axis=1)).ravel())
+    normas[normas == 0] = 1
+    return (sparse.diags(1 / normas) @ matriz).tocsr()
+
+
+def matriz_tfidf(documentos):
+    """[[tokens]] -> TF-IDF rows with sublinear tf and smoothed idf."""
+    matriz = _csr([Counter(lista) for lista in documentos])
+    matriz.data = 1 + np.log(matriz.data)
+    n = matriz.shape[0]
+    idf = np.log((1 + n) / (1 + matriz.getnnz(axis=0))) + 1
+    return _unitario(matriz @ sparse.diags(idf))
+
+
+def matriz_binaria(conjuntos):
+    """[set of items] -> rows with 1/sqrt(len) per item."""
+    return _unitario(_csr([dict.fromkeys(items, 1.0) for items in conjuntos]))
+
+
+def podar(matriz):
+    """Drops the terms (columns) shared by more than MAX_DF of the projects."""
+    limite = max(MAX_DF * matriz.shape[0], MIN_POSTINGS)
+    return matriz[:, np.flatnonzero(matriz.getnnz(axis=0) <= limite)]
+
+
+def similitudes(matrices, inicio, fin):
+    """
+    Weighted cosine similarities of rows [inicio, fin) against every row:
+    sum of peso * X[inicio:fin]·Xᵀ over ``matrices`` [(peso, X)], CSR, with
+    each project's similarity to itself removed.
+    """
+    bloque = sum(peso * (matriz[inicio:fin] @ matriz.T) for peso, matriz in matrices).tocoo()
+    propia = bloque.col == bloque.row + inicio
+    bloque.data[propia] = 0
+    bloque = bloque.tocsr()
+    bloque.eliminate_zeros()
+    return bloque
+
+
+def mejores(sims, votos, k=TOP_K):
+    """Yields (row, columns, scores) with the k best of each row; ties go to the most voted."""
+    for fila in range(sims.shape[0]):
+        inicio, fin = sims.indptr[fila], sims.indptr[fila + 1]
+        if inicio == fin:
+            continue
+        cols, vals = sims.indices[inicio:fin], sims.data[inicio:fin]
+        if len(vals) > k:
+            # Keep everything tied with the k-th best, then order by (score, votos).
+            corte = vals[np.argpartition(-vals, k - 1)[:k]].min()
+            cols, vals = cols[vals >= corte], vals[vals >= corte]
+        orden = np.lexsort((-votos[cols], -vals))[:k]
+        yield fila, cols[orden], vals[orden]
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REBUILD / READ
+# ═══════════════════════════════════════════════════════════════════════════
+
+def recalcular_relacionados():
+    """Recomputes ProyectoRelacionado for every published project. Returns the row count."""
+    publicados = ProyectoGrado.objects.filter(estado=PUBLICADO).order_by()
+    pks, textos, votos = [], [], []
+    for pk, titulo, descripcion, n_votos in publicados.values_list(
+            'pk', 'titulo', 'descripcion', 'votos'):
+        pks.append(pk)
+        textos.append(tokens(f'{titulo} {descripcion}'))
+        votos.append(n_votos)
+    fila_de = {pk: fila for fila, pk in enumerate(pks)}
+
+    tags = [set() for _ in pks]
+    for pk, tag_id in (ProyectoGrado.tags.through.objects
+                       .filter(proyectogrado__estado=PUBLICADO)
+                       .values_list('proyectogrado_id', 'taghabilidad_id')):
+        tags[fila_de[pk]].add(tag_id)
+
+    usuarios = [set() for _ in pks]
+    for pk, usuario_id in (RegistroDescarga.objects
+                           .filter(usuario__isnull=False, archivo__proyecto__estado=PUBLICADO)
+                           .values_list('archivo__proyecto_id', 'usuario_id')
+                           .distinct().order_by()):
+        usuarios[fila_de[pk]].add(usuario_id)
+
+    filas = []
+    matrices = [(PESOS['tags'], podar(matriz_binaria(tags))),
+                (PESOS['texto'], podar(matriz_tfidf(textos))),
+                (PESOS['descargas'], podar(matriz_binaria(usuarios)))]
+    votos = np.array(votos)
+    # Row blocks bound the memory of the product to BLOQUE x n entries.
+    for inicio in range(0, len(pks), BLOQUE):
+        for fila, cols, vals in mejores(similitudes(matrices, inicio, inicio + BLOQUE), votos):
+            filas += [
+                ProyectoRelacionado(proyecto_id=pks[inicio + fila], relacionado_id=pks[col],
+                                    posicion=posicion, puntaje=float(puntaje))
+                for posicion, (col, puntaje) in enumerate(zip(cols, vals))
+            ]
+    with transaction.atomic():
+        ProyectoRelacionado.objects.all().delete()
+        ProyectoRelacionado.objects.bulk_create(filas, batch_size=1000)
+    return len(filas)
+
+
+def relacionados_de(proyecto, limite=MOSTRAR):
+    """Precomputed related projects still published; same career if none were computed."""
+    relacionados = list(
+        ProyectoGrado.objects
+        .filter(relacionado_con__proyecto=proyecto, estado=PUBLICADO)
+        .order_by('relacionado_con__posicion')[:limite]
+    )
+    if relacionados:
+        return relacionados
+    return list(
+        ProyectoGrado.objects
+        .filter(carrera=proyecto.carrera, estado=PUBLICADO)
+        .exclude(pk=proyecto.pk)
+        .order_by('-votos')[:limite]
+    )
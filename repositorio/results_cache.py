@@ -0,0 +1,109 @@
+"""
+OASIS Repositorio — Result cache in front of the explorer.
+
+For each normalized filter combination (plus cursor) the cache stores the ids
+of the page, the next cursor and the sidebar facets, which carry the total
+count. A hit costs one indexed query for the generations, one cache
+round-trip for the entry and one primary-key query to load the cards, instead
+of the result, count and aggregate queries.
+
+Invalidation uses generation counters. A key filtered by career embeds that
+career's generation; any other key embeds the "all careers" generation. Saving
+or deleting a project bumps its career(s) and "all", so only the entries that
+could contain it go stale; entries for other careers keep hitting. Changes
+that affect every entry (tags, career clusters) bump an epoch that all keys
+embed. Stale entries are never read again and simply expire. Counter-only
+updates (votos, descargas) go through queryset.update() and do not bump;
+TIMEOUT bounds how stale the popularity sorts can get.
+
+The generations are stored in the database (generaciones.py) and bumped in
+the transaction that changes the projects, so every worker stops reading the
+old entries when it commits, also on LocMemCache where each worker holds its
+own entries.
+"""
+
+import hashlib
+import json
+
+from django.core.cache import cache
+
+from .generaciones import incrementar_generaciones, leer_generaciones
+from .models import CARRERA_CHOICES
+
+PREFIX = 'repositorio:explorador'
+TIMEOUT = 5 * 60
+TODAS = '*'
+EPOCA = 'epoca'
+STATS = ('hits', 'misses')
+
+_CARRERAS = {clave for clave, _ in CARRERA_CHOICES}
+
+
+def _gen_key(scope):
+    return f'resultados:{scope}'
+
+
+def generaciones(carrera=''):
+    """Current [epoch, career-or-all] generations for a carrera filter value."""
+    scope = carrera if carrera in _CARRERAS else TODAS
+    keys = [_gen_key(EPOCA), _gen_key(scope)]
+    valores = leer_generaciones(*keys)
+    return [valores[key] for key in keys]
+
+
+def clave(filtros, cursor=None, parcial=False):
+    """Cache key for explorer filters (as returned by filtrar_explorador)."""
+    normal = {k: v for k, v in filtros.items() if v}
+    if normal.get('q'):
+        normal['q'] = ' '.join(normal['q'].lower().split())
+    data = json.dumps(
+        [normal, cursor or '', parcial, generaciones(filtros.get('carrera', ''))],
+        sort_keys=True,
+    )
+    return f'{PREFIX}:r:{hashlib.sha1(data.encode()).hexdigest()}'
+
+
+def obtener(key):
+    """Cached entry for ``key`` or None; counts the hit/miss."""
+    entrada = cache.get(key)
+    _contar('hits' if entrada is not None else 'misses')
+    return entrada
+
+
+def guardar(key, ids, next_cursor, facetas=None):
+    cache.set(key, {'ids': ids, 'next': next_cursor, 'facetas': facetas}, TIMEOUT)
+
+
+def invalidar(*carreras):
+    """
+    With the current transaction, expires the entries that can list projects
+    of ``carreras`` (their career keys and the unfiltered ones). With no
+    careers, expires all.
+    """
+    scopes = {TODAS, *(c for c in carreras if c)} if carreras else {EPOCA}
+    incrementar_generaciones(*(_gen_key(scope) for scope in scopes))
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# HIT / MISS COUNTERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _contar(nombre):
+    key = f'{PREFIX}:stats:{nombre}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def estadisticas():
+    """{'hits', 'misses', 'hit_ratio'} since the last reset."""
+    valores = cache.get_many([f'{PREFIX}:stats:{n}' for n in STATS])
+    hits, misses = (valores.get(f'{PREFIX}:stats:{n}', 0) for n in STATS)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / total if total else 0.0}
+
+
+def reiniciar_estadisticas():
+    cache.delete_many([f'{PREFIX}:stats:{n}' for n in STATS])
@@ -0,0 +1,184 @@
+"""
+OASIS Repositorio — Full-text search backends.
+
+One interface over the engine-native full-text indexes:
+  - SQLite: FTS5 virtual table ``repositorio_proyecto_fts`` (rowid = proyecto id),
+    kept in sync by the ProyectoGrado save/delete signals.
+  - MySQL: FULLTEXT index on ``repositorio_proyectogrado``, maintained by InnoDB.
+  - Anything else (or SQLite without FTS5): the legacy OR of icontains lookups.
+
+Every backend returns the queryset annotated with ``search_rank`` (higher is
+more relevant) so views can order by ``-search_rank``. The SQLite backend joins
+the FTS table by name, so aggregate over the returned queryset directly rather
+than nesting it as a ``pk__in`` subquery.
+"""
+
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Q, Value, FloatField
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ['titulo', 'descripcion', 'autor', 'herramientas_usadas', 'ficha']
+
+FTS_TABLE = 'repositorio_proyecto_fts'
+PROYECTO_TABLE = 'repositorio_proyectogrado'
+FULLTEXT_INDEX = 'proyecto_fulltext_idx'
+
+# Words are letters/digits (unicode aware); everything else is dropped so user
+# input can never inject FTS5 / BOOLEAN MODE operators.
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Splits a free-text query into safe search tokens."""
+    return _TOKEN_RE.findall(query or '')
+
+
+class IcontainsSearchBackend:
+    """Fallback backend: OR of icontains over SEARCH_FIELDS (full scan)."""
+
+    name = 'icontains'
+
+    def search(self, qs, query):
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': query})
+        return qs.filter(condition).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+    def index(self, proyecto):
+        pass
+
+    def remove(self, pk):
+        pass
+
+    def rebuild(self):
+        return 0
+
+
+class SQLiteFTS5Backend(IcontainsSearchBackend):
+    """SQLite FTS5 backend ranked by bm25()."""
+
+    name = 'sqlite_fts5'
+
+    @staticmethod
+    def build_match(query):
+        """Each token is quoted; the last one is a prefix match (search-as-you-type)."""
+        tokens = tokenize(query)
+        if not tokens:
+            return ''
+        terms = [f'"{t}"' for t in tokens[:-1]]
+        terms.append(f'"{tokens[-1]}"*')
+        return ' '.join(terms)
+
+    def search(self, qs, query):
+        match = self.build_match(query)
+        if not match:
+            return super().search(qs, query)
+        # Join the FTS table so bm25() is evaluated once per matching row.
+        # bm25() is negative (lower = better), so flip the sign.
+        return qs.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = {PROYECTO_TABLE}.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+            select={'search_rank': f'-bm25({FTS_TABLE})'},
+        )
+
+    def index(self, proyecto):
+        values = [getattr(proyecto, f) or '' for f in SEARCH_FIELDS]
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [proyecto.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, {", ".join(SEARCH_FIELDS)}) '
+                f'VALUES (%s, {", ".join(["%s"] * len(SEARCH_FIELDS))})',
+                [proyecto.pk, *values],
+            )
+
+    def remove(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [pk])
+
+    def rebuild(self):
+        columns = ', '.join(SEARCH_FIELDS)
+        coalesced = ', '.join(f"COALESCE({f}, '')" for f in SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, {columns}) '
+                f'SELECT id, {coalesced} FROM {PROYECTO_TABLE}'
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}')
+            return cursor.fetchone()[0]
+
+
+class MySQLFulltextBackend(IcontainsSearchBackend):
+    """MySQL FULLTEXT backend ranked by MATCH ... AGAINST relevance."""
+
+    name = 'mysql_fulltext'
+
+    @staticmethod
+    def build_match(query):
+        """Every token is required; the last one is a prefix match."""
+        tokens = tokenize(query)
+        if not tokens:
+            return ''
+        terms = [f'+{t}' for t in tokens[:-1]]
+        terms.append(f'+{tokens[-1]}*')
+        return ' '.join(terms)
+
+    def search(self, qs, query):
+        match = self.build_match(query)
+        if not match:
+            return super().search(qs, query)
+        against = f'MATCH ({", ".join(SEARCH_FIELDS)}) AGAINST (%s IN BOOLEAN MODE)'
+        return qs.annotate(
+            search_rank=RawSQL(against, [match], output_field=FloatField())
+        ).filter(search_rank__gt=0)
+
+    def rebuild(self):
+        # InnoDB maintains FULLTEXT indexes on write; OPTIMIZE merges the
+        # auxiliary index tables after large imports.
+        with connection.cursor() as cursor:
+            cursor.execute(f'OPTIMIZE TABLE {PROYECTO_TABLE}')
+            cursor.execute(f'SELECT COUNT(*) FROM {PROYECTO_TABLE}')
+            return cursor.fetchone()[0]
+
+
+_backend = None
+
+
+def _fts5_table_exists():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def get_search_backend():
+    """Returns the search backend for the default database (cached per process)."""
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'mysql':
+            _backend = MySQLFulltextBackend()
+        elif connection.vendor == 'sqlite' and _fts5_table_exists():
+            _backend = SQLiteFTS5Backend()
+        else:
+            logger.warning('Full-text index not available; using icontains search.')
+            _backend = IcontainsSearchBackend()
+    return _backend
+
+
+def reset_search_backend():
+    """Forgets the cached backend (used after migrations / in tests)."""
+    global _backend
+    _backend = None
@@ -0,0 +1,61 @@
+from rest_framework import serializers
+
+from .models import ProyectoGrado
+
+
+class ProyectoGradoSearchSerializer(serializers.ModelSerializer):
+    """
+    Explorer card payload for the JSON search API. Supports sparse fieldsets:
+    pass ``fields`` (iterable of names) in the serializer context.
+    """
+    carrera_display = serializers.CharField(source='get_carrera_display', read_only=True)
+    thumbnail_url = serializers.CharField(read_only=True)
+    num_archivos = serializers.IntegerField(read_only=True)
+    tags = serializers.SlugRelatedField(many=True, read_only=True, slug_field='slug')
+
+    # Model columns each serializer field needs, used to build .only().
+    # Fields that are not listed map to the column of the same name.
+    SOURCE_COLUMNS = {
+        'carrera_display': ['carrera'],
+        'thumbnail_url': ['thumbnail', 'imagen_url'],
+        'num_archivos': [],
+        'tags': [],
+    }
+    DEFAULT_FIELDS = [
+        'id', 'titulo', 'resumen', 'autor', 'carrera', 'carrera_display', 'cluster',
+        'preview_type', 'anio', 'votos', 'descargas', 'vistas', 'destacado',
+        'thumbnail_url', 'num_archivos', 'fecha_publicacion',
+    ]
+
+    class Meta:
+        model = ProyectoGrado
+        fields = [
+            'id', 'titulo', 'resumen', 'descripcion', 'autor', 'ficha', 'carrera',
+            'carrera_display', 'cluster', 'preview_type', 'anio', 'version_actual',
+            'votos', 'descargas', 'vistas', 'destacado', 'thumbnail_url',
+            'enlace_repositorio', 'enlace_demo', 'herramientas_usadas', 'tags',
+            'num_archivos', 'fecha_publicacion',
+        ]
+        read_only_fields = fields
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+    @classmethod
+    def resolve_fields(cls, raw):
+        """Parses a ``fields=a,b,c`` value into known field names (default set if empty)."""
+        names = [f.strip() for f in (raw or '').split(',') if f.strip()]
+        valid = [f for f in names if f in cls.Meta.fields]
+        return valid or list(cls.DEFAULT_FIELDS)
+
+    @classmethod
+    def columns_for(cls, fields):
+        """Model columns to load with .only() for the requested fields."""
+        columns = set()
+        for name in fields:
+            columns.update(cls.SOURCE_COLUMNS.get(name, [name]))
+        return columns
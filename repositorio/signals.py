@@ -0,0 +1,276 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete, m2m_changed
+
+from . import facets, imagenes, results_cache, storage, suggest, tareas
+from .herramientas import sincronizar_herramientas
+from .models import (
+    ProyectoGrado, ArchivoProyecto, TagHabilidad, FacetaConteo, Carrera, CARRERA_A_CLUSTER,
+)
+from .search import SEARCH_FIELDS, get_search_backend
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PREVIOUS ROW (one SELECT per save, shared by the pre_save handlers below)
+# ═══════════════════════════════════════════════════════════════════════════
+
+CAMPOS_PREVIOS = tuple(dict.fromkeys(facets.FACET_FIELDS + ('carrera', 'thumbnail')))
+
+
+def proyecto_fila_previa_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """
+    Stores the stored CAMPOS_PREVIOS of the project on ``instance._fila_previa``
+    (None when it is new); not set when the save touches none of them.
+    """
+    instance.__dict__.pop('_fila_previa', None)
+    if raw or (update_fields and not set(update_fields) & set(CAMPOS_PREVIOS)):
+        return
+    instance._fila_previa = (sender.objects.filter(pk=instance.pk).order_by()
+                             .values(*CAMPOS_PREVIOS).first() if instance.pk else None)
+
+
+def proyecto_fila_previa_post_save(sender, instance, **kwargs):
+    instance.__dict__.pop('_fila_previa', None)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FULL-TEXT INDEX
+# ═══════════════════════════════════════════════════════════════════════════
+
+def proyecto_search_post_save(sender, instance, update_fields=None, **kwargs):
+    # Counter/flag updates (update_fields=['destacado'], ...) do not touch the index.
+    if update_fields and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+    get_search_backend().index(instance)
+
+
+def proyecto_search_post_delete(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TOOL TAGS (herramientas_usadas -> TagHabilidad)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def proyecto_herramientas_post_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and 'herramientas_usadas' not in update_fields):
+        return
+    sincronizar_herramientas(instance)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FACET COUNTS
+# ═══════════════════════════════════════════════════════════════════════════
+
+def proyecto_facetas_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not set(update_fields) & set(facets.FACET_FIELDS)):
+        return
+    instance._facetas_previo = instance._fila_previa
+
+
+def proyecto_facetas_post_save(sender, instance, **kwargs):
+    if '_facetas_previo' not in instance.__dict__:
+        return
+    previo = instance.__dict__.pop('_facetas_previo')
+    facets.aplicar_deltas(facets.deltas_por_cambio(previo, instance))
+
+
+def proyecto_facetas_pre_delete(sender, instance, **kwargs):
+    # Tag links are removed by cascade without m2m_changed, so count them here.
+    facets.aplicar_deltas(facets.deltas_por_borrado(instance))
+
+
+def proyecto_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        if reverse:
+            instance._facetas_tags_previos = instance.proyectos.filter(
+                estado=facets.PUBLICADO).count()
+        elif instance.es_publicado:
+            instance._facetas_tags_previos = list(instance.tags.values_list('pk', flat=True))
+        return
+
+    if action == 'post_clear':
+        previos = instance.__dict__.pop('_facetas_tags_previos', None)
+        if not previos:
+            return
+        if reverse:
+            facets.aplicar_deltas(facets.deltas_por_tags([instance.pk], -previos))
+        else:
+            facets.aplicar_deltas(facets.deltas_por_tags(previos, -1))
+        return
+
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    signo = 1 if action == 'post_add' else -1
+    if reverse:
+        publicados = ProyectoGrado.objects.filter(pk__in=pk_set, estado=facets.PUBLICADO).count()
+        facets.aplicar_deltas(facets.deltas_por_tags([instance.pk], signo * publicados))
+    elif instance.es_publicado:
+        facets.aplicar_deltas(facets.deltas_por_tags(pk_set, signo))
+
+
+def tag_facetas_post_delete(sender, instance, **kwargs):
+    FacetaConteo.objects.filter(faceta=FacetaConteo.Faceta.TAG, valor=str(instance.pk)).delete()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CAREER CLUSTER (denormalized on ProyectoGrado.cluster)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def _reasignar_cluster(clave, cluster):
+    # One indexed UPDATE; a no-op unless the projects are on another cluster.
+    return (ProyectoGrado.objects.filter(carrera=clave)
+            .exclude(cluster=cluster).update(cluster=cluster))
+
+
+def carrera_pre_save(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    clave = Carrera.objects.filter(pk=instance.pk).values_list('clave', flat=True).first()
+    if clave is not None and clave != instance.clave:
+        instance.__dict__['_clave_previa'] = clave
+
+
+def carrera_post_save(sender, instance, raw=False, **kwargs):
+    clave_previa = instance.__dict__.pop('_clave_previa', None)
+    if raw:
+        return
+    movidos = _reasignar_cluster(instance.clave, instance.cluster)
+    if clave_previa is not None:
+        # Projects still filed under the old key fall back to the default,
+        # as clasificar_carrera() and the facet summary would resolve it.
+        movidos += _reasignar_cluster(clave_previa, CARRERA_A_CLUSTER.get(clave_previa, 'TICS'))
+    if movidos or kwargs.get('created'):
+        facets.invalidar()
+
+
+def carrera_post_delete(sender, instance, **kwargs):
+    if _reasignar_cluster(instance.clave, CARRERA_A_CLUSTER.get(instance.clave, 'TICS')):
+        facets.invalidar()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# EXPLORER RESULT CACHE (generation bumps)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def proyecto_resultados_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or not instance.pk or (update_fields and 'carrera' not in update_fields):
+        return
+    previo = instance._fila_previa
+    instance._carrera_previa = previo['carrera'] if previo else None
+
+
+def proyecto_resultados_changed(sender, instance, **kwargs):
+    results_cache.invalidar(instance.carrera, instance.__dict__.pop('_carrera_previa', None))
+
+
+def proyecto_tags_resultados(sender, instance, action, reverse, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        results_cache.invalidar()
+    else:
+        results_cache.invalidar(instance.carrera)
+
+
+def resultados_changed(sender, instance, **kwargs):
+    results_cache.invalidar()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TYPEAHEAD INDEX
+# ═══════════════════════════════════════════════════════════════════════════
+
+def proyecto_sugerencias_post_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & set(suggest.INDEXED_FIELDS):
+        return
+    suggest.invalidar()
+
+
+def sugerencias_changed(sender, instance, **kwargs):
+    suggest.invalidar()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONTENT-ADDRESSED BLOBS (release unreferenced files)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def archivo_blob_pre_save(sender, instance, raw=False, **kwargs):
+    if raw or not instance.pk:
+        return
+    instance._blob_previo = (sender.objects.filter(pk=instance.pk)
+                             .values_list('archivo', flat=True).first())
+
+
+def archivo_blob_post_save(sender, instance, **kwargs):
+    previo = instance.__dict__.pop('_blob_previo', None)
+    if previo and previo != instance.archivo.name:
+        storage.liberar(previo)
+
+
+def archivo_blob_post_delete(sender, instance, **kwargs):
+    storage.liberar(instance.archivo.name)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# THUMBNAIL VARIANTS (queued for the procesar_tareas worker)
+# ═══════════════════════════════════════════════════════════════════════════
+
+def proyecto_thumbnail_pre_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and 'thumbnail' not in update_fields):
+        return
+    previo = instance._fila_previa
+    instance._thumbnail_previo = (previo['thumbnail'] if previo else None) or ''
+
+
+def proyecto_thumbnail_post_save(sender, instance, **kwargs):
+    previo = instance.__dict__.pop('_thumbnail_previo', None)
+    if previo is None or previo == (instance.thumbnail.name or ''):
+        return
+    if instance.thumbnail_variantes:
+        instance.thumbnail_variantes = []
+        sender.objects.filter(pk=instance.pk).update(thumbnail_variantes=[])
+    if previo:
+        thumbnail_storage = instance.thumbnail.storage
+        transaction.on_commit(lambda: imagenes.borrar_variantes(thumbnail_storage, previo))
+    tareas.encolar(instance, tipos=['miniaturas_proyecto'])
+
+
+# Connected first: the other ProyectoGrado pre_save handlers read _fila_previa.
+pre_save.connect(proyecto_fila_previa_pre_save, sender=ProyectoGrado)
+
+post_save.connect(proyecto_search_post_save, sender=ProyectoGrado)
+post_delete.connect(proyecto_search_post_delete, sender=ProyectoGrado)
+
+pre_save.connect(proyecto_facetas_pre_save, sender=ProyectoGrado)
+post_save.connect(proyecto_facetas_post_save, sender=ProyectoGrado)
+post_save.connect(proyecto_herramientas_post_save, sender=ProyectoGrado)
+pre_delete.connect(proyecto_facetas_pre_delete, sender=ProyectoGrado)
+m2m_changed.connect(proyecto_tags_changed, sender=ProyectoGrado.tags.through)
+post_delete.connect(tag_facetas_post_delete, sender=TagHabilidad)
+
+post_save.connect(proyecto_sugerencias_post_save, sender=ProyectoGrado)
+post_delete.connect(sugerencias_changed, sender=ProyectoGrado)
+post_save.connect(sugerencias_changed, sender=TagHabilidad)
+post_delete.connect(sugerencias_changed, sender=TagHabilidad)
+
+pre_save.connect(carrera_pre_save, sender=Carrera)
+post_save.connect(carrera_post_save, sender=Carrera)
+post_delete.connect(carrera_post_delete, sender=Carrera)
+
+pre_save.connect(proyecto_resultados_pre_save, sender=ProyectoGrado)
+post_save.connect(proyecto_resultados_changed, sender=ProyectoGrado)
+post_delete.connect(proyecto_resultados_changed, sender=ProyectoGrado)
+m2m_changed.connect(proyecto_tags_resultados, sender=ProyectoGrado.tags.through)
+post_save.connect(resultados_changed, sender=TagHabilidad)
+post_delete.connect(resultados_changed, sender=TagHabilidad)
+post_save.connect(resultados_changed, sender=Carrera)
+post_delete.connect(resultados_changed, sender=Carrera)
+
+pre_save.connect(archivo_blob_pre_save, sender=ArchivoProyecto)
+post_save.connect(archivo_blob_post_save, sender=ArchivoProyecto)
+post_delete.connect(archivo_blob_post_delete, sender=ArchivoProyecto)
+
+pre_save.connect(proyecto_thumbnail_pre_save, sender=ProyectoGrado)
+post_save.connect(proyecto_thumbnail_post_save, sender=ProyectoGrado)
+
+post_save.connect(proyecto_fila_previa_post_save, sender=ProyectoGrado)
@@ -0,0 +1,191 @@
+"""
+OASIS Repositorio — Content-addressed storage for project files.
+
+ArchivoProyecto files are stored once per content, at
+``repositorio/blobs/<aa>/<bb>/<sha256>.<ext>`` (the extension is kept so the
+web server still serves the right Content-Type). Uploading a file whose blob
+already exists writes nothing; the new row just points at the existing blob.
+
+  - Reference count: the number of ArchivoProyecto rows whose ``archivo``
+    names the blob. It is read from the indexed column rather than kept in a
+    separate counter, so it cannot drift from the rows.
+  - Garbage collection: deleting the last row that references a blob removes
+    it after commit. ``gc_blobs`` sweeps whatever that missed (crashes,
+    queryset deletes). A blob is only removed once it has been untouched for
+    REPOSITORIO_BLOB_GRACE_SECONDS; reusing a blob refreshes its mtime, so an
+    upload racing with the delete of the same content keeps it.
+  - Existing files: ``dedup_media`` moves files stored under the old
+    per-upload paths into the blob tree and repoints their rows.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import time
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = 'repositorio/blobs'
+
+
+def sha256_de(f):
+    """Hex SHA-256 of a Django File, read in chunks; rewinds it afterwards."""
+    sha256 = hashlib.sha256()
+    for chunk in f.chunks():
+        sha256.update(chunk)
+    f.seek(0)
+    return sha256.hexdigest()
+
+
+def blob_name(sha256, nombre):
+    """Storage name of the blob for ``sha256``, keeping the extension of ``nombre``."""
+    ext = os.path.splitext(nombre)[1].lower()
+    return f'{BLOB_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}'
+
+
+def es_blob(name):
+    return bool(name) and name.startswith(BLOB_PREFIX + '/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage where a blob name identifies its content."""
+
+    def get_available_name(self, name, max_length=None):
+        # Same name means same bytes: reuse it instead of adding a suffix.
+        if es_blob(name):
+            return name
+        return super().get_available_name(name, max_length)
+
+    def _save(self, name, content):
+        if not es_blob(name):
+            return super()._save(name, content)
+        path = self.path(name)
+        if os.path.exists(path):
+            os.utime(path)
+            return name
+        # Write aside and rename into place, so concurrent uploads of the same
+        # content never see (or serve) a partially written blob.
+        temporal = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temporal), path)
+        return name
+
+
+blob_storage = ContentAddressedStorage()
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# REFERENCES AND GARBAGE COLLECTION
+# ═══════════════════════════════════════════════════════════════════════════
+
+def referencias(name):
+    """Number of ArchivoProyecto rows pointing at ``name``."""
+    from .models import ArchivoProyecto
+    return ArchivoProyecto.objects.filter(archivo=name).count()
+
+
+def _vencido(path, gracia):
+    try:
+        return time.time() - os.path.getmtime(path) >= gracia
+    except FileNotFoundError:
+        return False
+
+
+def liberar(name):
+    """After commit, deletes blob ``name`` if no row references it any more."""
+    if not es_blob(name):
+        return
+
+    def _borrar():
+        from .imagenes import borrar_variantes
+
+        gracia = settings.REPOSITORIO_BLOB_GRACE_SECONDS
+        if referencias(name) == 0 and _vencido(blob_storage.path(name), gracia):
+            blob_storage.delete(name)
+            borrar_variantes(blob_storage, name)
+    transaction.on_commit(_borrar)
+
+
+def recolectar(gracia=None, dry_run=False):
+    """
+    Deletes unreferenced blobs (with their image variants) and leftover
+    temporary files older than ``gracia`` seconds. Returns (files deleted,
+    bytes freed).
+    """
+    from .imagenes import origen_de_variante
+    from .models import ArchivoProyecto
+
+    if gracia is None:
+        gracia = settings.REPOSITORIO_BLOB_GRACE_SECONDS
+    raiz = blob_storage.path(BLOB_PREFIX)
+    if not os.path.isdir(raiz):
+        return 0, 0
+    usados = set(ArchivoProyecto.objects.filter(archivo__startswith=BLOB_PREFIX + '/')
+                 .values_list('archivo', flat=True))
+    originales = {os.path.splitext(name)[0] for name in usados}
+    borrados, liberados = 0, 0
+    for directorio, _, ficheros in os.walk(raiz):
+        for fichero in ficheros:
+            path = os.path.join(directorio, fichero)
+            name = os.path.relpath(path, blob_storage.location).replace(os.sep, '/')
+            if (name in usados or origen_de_variante(name) in originales
+                    or not _vencido(path, gracia)):
+                continue
+            liberados += os.path.getsize(path)
+            borrados += 1
+            if not dry_run:
+                os.remove(path)
+    return borrados, liberados
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# MIGRATION OF THE PER-UPLOAD TREE
+# ═══════════════════════════════════════════════════════════════════════════
+
+def deduplicar(dry_run=False):
+    """
+    Moves every ArchivoProyecto file not yet in the blob tree to its blob and
+    repoints the row (queryset update, no signals). Files whose content is
+    already stored are deleted. Returns {'movidos', 'duplicados', 'faltantes',
+    'bytes_liberados'}.
+    """
+    from .models import ArchivoProyecto
+
+    resumen = {'movidos': 0, 'duplicados': 0, 'faltantes': 0, 'bytes_liberados': 0}
+    antiguos = (ArchivoProyecto.objects.exclude(archivo__startswith=BLOB_PREFIX + '/')
+                .exclude(archivo='').values_list('archivo', flat=True).distinct())
+    for antiguo in list(antiguos):
+        origen = blob_storage.path(antiguo)
+        if not os.path.exists(origen):
+            logger.warning('El archivo %s no existe en disco; se omite.', antiguo)
+            resumen['faltantes'] += 1
+            continue
+        with blob_storage.open(antiguo) as f:
+            sha256 = sha256_de(f)
+        nuevo = blob_name(sha256, antiguo)
+        destino = blob_storage.path(nuevo)
+        duplicado = os.path.exists(destino)
+        if duplicado:
+            resumen['duplicados'] += 1
+            resumen['bytes_liberados'] += os.path.getsize(origen)
+        else:
+            resumen['movidos'] += 1
+        if dry_run:
+            continue
+        if not duplicado:
+            # Link (or copy) first: the old file only goes once the rows moved.
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            try:
+                os.link(origen, destino)
+            except OSError:
+                temporal = f'{destino}.{uuid.uuid4().hex}.tmp'
+                shutil.copyfile(origen, temporal)
+                os.replace(temporal, destino)
+        ArchivoProyecto.objects.filter(archivo=antiguo).update(archivo=nuevo, hash_sha256=sha256)
+        os.remove(origen)
+    return resumen
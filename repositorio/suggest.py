@@ -0,0 +1,144 @@
+"""
+OASIS Repositorio — Typeahead suggestions for the explorer search box.
+
+Suggestions come from an in-memory prefix index (a sorted array searched with
+bisect) over published project titles, authors and tag names. Every word of a
+label is indexed, so "inv" matches "Sistema de inventario". Keys are lower-case
+and accent-free.
+
+The index is built lazily per worker process. Writes that change it (project
+publish/edit/delete, tag edits) bump the "sugerencias" generation in the
+database (generaciones.py) with their transaction. Each worker compares that
+number at most every REVISION seconds and rebuilds when it moved, so other
+workers pick up a change within REVISION seconds (the saving worker at once),
+and suggestion requests in between never touch the database.
+"""
+
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from urllib.parse import urlencode
+
+from django.db import transaction
+from django.urls import reverse
+
+from .generaciones import incrementar_generaciones, leer_generaciones
+from .models import ProyectoGrado, TagHabilidad
+
+GENERACION = 'sugerencias'
+REVISION = 5  # seconds between checks of the shared generation, per worker
+INDEXED_FIELDS = ('titulo', 'autor', 'estado')
+MAX_RESULTS = 8
+MIN_PREFIX = 2
+# Upper bound on index keys scanned per lookup, so very common prefixes
+# ("de", "si") stay sub-millisecond on large catalogues.
+MAX_SCAN = 1000
+
+
+def normalizar(texto):
+    """Lower-case, accent-free form used for index keys and queries."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower().strip()
+
+
+class PrefixIndex:
+    """Sorted (key, entry) array; ``buscar`` is a bisect plus a short scan."""
+
+    def __init__(self, entradas):
+        # entradas: iterable of dicts with at least 'texto'.
+        self.entradas = list(entradas)
+        self.normalizados = [' '.join(normalizar(e['texto']).split()) for e in self.entradas]
+        claves = []
+        for pos, texto in enumerate(self.normalizados):
+            palabras = texto.split()
+            for i in range(len(palabras)):
+                claves.append((' '.join(palabras[i:]), pos))
+        claves.sort()
+        self.claves = [c for c, _ in claves]
+        self.posiciones = [p for _, p in claves]
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def buscar(self, prefijo, limite=MAX_RESULTS):
+        prefijo = ' '.join(normalizar(prefijo).split())
+        if len(prefijo) < MIN_PREFIX:
+            return []
+        vistos, resultados = set(), []
+        i = bisect_left(self.claves, prefijo)
+        fin = min(len(self.claves), i + MAX_SCAN)
+        while i < fin and self.claves[i].startswith(prefijo):
+            pos = self.posiciones[i]
+            if pos not in vistos:
+                vistos.add(pos)
+                resultados.append(pos)
+            i += 1
+        # Labels that start with the prefix first, then by popularity.
+        resultados.sort(key=lambda pos: (
+            not self.normalizados[pos].startswith(prefijo), -self.entradas[pos].get('peso', 0),
+        ))
+        return [self.entradas[pos] for pos in resultados[:limite]]
+
+
+def construir_indice():
+    """Reads titles, authors and tags of published projects into a PrefixIndex."""
+    explorador = reverse('repositorio:explorador')
+    entradas = []
+    autores = {}
+    publicados = ProyectoGrado.objects.filter(estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
+    for pk, titulo, autor, votos in publicados.values_list('pk', 'titulo', 'autor', 'votos'):
+        entradas.append({
+            'tipo': 'proyecto', 'texto': titulo, 'peso': votos,
+            'url': reverse('repositorio:detalle', args=[pk]),
+        })
+        if autor:
+            autores[autor] = autores.get(autor, 0) + 1
+    entradas += [
+        {'tipo': 'autor', 'texto': autor, 'peso': n, 'url': f'{explorador}?{urlencode({"q": autor})}'}
+        for autor, n in autores.items()
+    ]
+    entradas += [
+        {'tipo': 'tag', 'texto': nombre, 'peso': 0, 'url': f'{explorador}?{urlencode({"tag": slug})}'}
+        for nombre, slug in TagHabilidad.objects.values_list('nombre', 'slug')
+    ]
+    return PrefixIndex(entradas)
+
+
+_lock = threading.Lock()
+_indice = None
+_generacion = None
+_revisado = None  # time.monotonic() of the last generation check
+
+
+def get_indice():
+    """The worker's prefix index, rebuilt when the shared generation moved."""
+    global _indice, _generacion, _revisado
+    ahora = time.monotonic()
+    if _indice is not None and _revisado is not None and ahora - _revisado < REVISION:
+        return _indice
+    generacion = leer_generaciones(GENERACION)[GENERACION]
+    with _lock:
+        if _indice is None or _generacion != generacion:
+            _indice = construir_indice()
+            _generacion = generacion
+        _revisado = ahora
+    return _indice
+
+
+def sugerir(prefijo, limite=MAX_RESULTS):
+    return get_indice().buscar(prefijo, limite)
+
+
+def _revisar_pronto():
+    global _revisado
+    _revisado = None
+
+
+def invalidar():
+    """
+    Bumps the shared generation with the current transaction; after the commit
+    this worker rebuilds on its next lookup, the others within REVISION seconds.
+    """
+    incrementar_generaciones(GENERACION)
+    transaction.on_commit(_revisar_pronto)
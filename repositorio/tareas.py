@@ -0,0 +1,217 @@
+"""
+OASIS Repositorio — Background job queue for post-upload processing.
+
+Uploads only store the bytes; everything else that can wait (malware scan,
+thumbnails, previews, archive listings) is a TareaProcesamiento row run by
+``python manage.py procesar_tareas``. The table is the queue, so nothing
+beyond the database is needed.
+
+  - Handlers register with ``@tarea(tipo, modelo=..., aplica=...)``;
+    ``encolar(objeto)`` creates one row per handler that applies to the
+    ArchivoProyecto or ProyectoGrado.
+  - Claiming is an UPDATE conditioned on the state the worker read, so two
+    workers (threads, processes or replicas) never run the same job, on
+    SQLite and MySQL alike. A claim is a lease: a job whose worker died is
+    claimed again once ``bloqueada_hasta`` passes.
+  - Concurrency: the worker runs ``--concurrencia`` jobs at a time, and a
+    handler's ``concurrencia`` caps how many of its jobs run at once across
+    all workers (heavy thumbnailing does not starve scans).
+  - Retries: a failing job goes back to pending with exponential backoff
+    until ``max_intentos``; then it is marked ``fallida`` with the traceback.
+    A job whose lease expires on its last attempt (it killed its worker) is
+    marked ``fallida`` instead of being claimed again.
+"""
+
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from . import comprimidos, imagenes
+from .models import ArchivoProyecto, ProyectoGrado, TareaProcesamiento
+
+logger = logging.getLogger(__name__)
+
+Estado = TareaProcesamiento.Estado
+
+LEASE = timedelta(minutes=10)
+REINTENTO_BASE = timedelta(seconds=30)
+
+
+class Handler:
+    def __init__(self, funcion, modelo, aplica, concurrencia, max_intentos):
+        self.funcion = funcion
+        self.modelo = modelo
+        self.aplica = aplica
+        self.concurrencia = concurrencia
+        self.max_intentos = max_intentos
+
+
+HANDLERS = {}
+
+
+def tarea(tipo, modelo=ArchivoProyecto, aplica=lambda objeto: True, concurrencia=None,
+          max_intentos=3):
+    """Registers ``funcion(objeto)`` as the handler for jobs of ``tipo`` on ``modelo``."""
+    def registrar(funcion):
+        HANDLERS[tipo] = Handler(funcion, modelo, aplica, concurrencia, max_intentos)
+        return funcion
+    return registrar
+
+
+def encolar(objeto, tipos=None):
+    """Queues the applicable jobs (or only ``tipos``) for an ArchivoProyecto or ProyectoGrado."""
+    campo = 'archivo' if isinstance(objeto, ArchivoProyecto) else 'proyecto'
+    TareaProcesamiento.objects.bulk_create([
+        TareaProcesamiento(tipo=tipo, max_intentos=h.max_intentos, **{campo: objeto})
+        for tipo, h in HANDLERS.items()
+        if (tipos is None or tipo in tipos) and isinstance(objeto, h.modelo) and h.aplica(objeto)
+    ])
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CLAIM / RUN
+# ═══════════════════════════════════════════════════════════════════════════
+
+def reservar(limite):
+    """Claims up to ``limite`` runnable jobs for this worker."""
+    ahora = timezone.now()
+    # A lease that expired on the last attempt means the job took its worker
+    # down (OOM, crash in a native decoder): do not hand it out again.
+    TareaProcesamiento.objects.filter(
+        estado=Estado.EN_CURSO, bloqueada_hasta__lt=ahora, intentos__gte=F('max_intentos'),
+    ).update(estado=Estado.FALLIDA, bloqueada_hasta=None,
+             error='La reserva vencio en el ultimo intento: el worker termino sin completarla.')
+    candidatas = (TareaProcesamiento.objects
+                  .filter(Q(estado=Estado.PENDIENTE, disponible_en__lte=ahora)
+                          | Q(estado=Estado.EN_CURSO, bloqueada_hasta__lt=ahora))
+                  .filter(tipo__in=list(HANDLERS))
+                  .order_by('disponible_en', 'pk')
+                  .values_list('pk', 'tipo', 'estado', 'bloqueada_hasta')[:limite * 4])
+    en_curso = dict(TareaProcesamiento.objects
+                    .filter(estado=Estado.EN_CURSO, bloqueada_hasta__gte=ahora)
+                    .values_list('tipo').annotate(n=Count('pk')).values_list('tipo', 'n'))
+    reservadas = []
+    for pk, tipo, estado, bloqueada_hasta in candidatas:
+        if len(reservadas) >= limite:
+            break
+        limite_tipo = HANDLERS[tipo].concurrencia
+        if limite_tipo and en_curso.get(tipo, 0) >= limite_tipo:
+            continue
+        ganada = TareaProcesamiento.objects.filter(
+            pk=pk, estado=estado, bloqueada_hasta=bloqueada_hasta,
+        ).update(estado=Estado.EN_CURSO, bloqueada_hasta=ahora + LEASE,
+                 intentos=F('intentos') + 1)
+        if ganada:
+            reservadas.append(pk)
+            en_curso[tipo] = en_curso.get(tipo, 0) + 1
+    return list(TareaProcesamiento.objects.select_related('archivo', 'proyecto')
+                .filter(pk__in=reservadas))
+
+
+def ejecutar(tarea_obj):
+    """Runs one claimed job and records the outcome."""
+    actual = TareaProcesamiento.objects.filter(pk=tarea_obj.pk, estado=Estado.EN_CURSO)
+    try:
+        HANDLERS[tarea_obj.tipo].funcion(tarea_obj.objetivo)
+    except Exception:
+        logger.exception('Tarea %s fallo (intento %d de %d).', tarea_obj,
+                         tarea_obj.intentos, tarea_obj.max_intentos)
+        if tarea_obj.intentos >= tarea_obj.max_intentos:
+            actual.update(estado=Estado.FALLIDA, bloqueada_hasta=None,
+                          error=traceback.format_exc())
+        else:
+            espera = REINTENTO_BASE * 2 ** (tarea_obj.intentos - 1)
+            actual.update(estado=Estado.PENDIENTE, bloqueada_hasta=None,
+                          disponible_en=timezone.now() + espera, error=traceback.format_exc())
+        return False
+    actual.update(estado=Estado.COMPLETADA, bloqueada_hasta=None, error='')
+    return True
+
+
+def _ejecutar_en_hilo(tarea_obj):
+    try:
+        return ejecutar(tarea_obj)
+    finally:
+        connection.close()
+
+
+def procesar_pendientes(concurrencia=1):
+    """
+    Runs jobs until none is available; returns how many ran. With
+    ``concurrencia`` > 1 they run on that many threads.
+    """
+    total = 0
+    with (ThreadPoolExecutor(concurrencia, thread_name_prefix='repositorio-tareas')
+          if concurrencia > 1 else nullcontext()) as pool:
+        while True:
+            lote = reservar(concurrencia)
+            if not lote:
+                return total
+            if pool:
+                list(pool.map(_ejecutar_en_hilo, lote))
+            else:
+                for tarea_obj in lote:
+                    ejecutar(tarea_obj)
+            total += len(lote)
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# HANDLERS
+# ═══════════════════════════════════════════════════════════════════════════
+
+EXTENSIONES_SOSPECHOSAS = ['exe', 'bat', 'cmd', 'com', 'scr', 'pif', 'vbs', 'msi']
+FIRMAS_EJECUTABLES = (
+    b'MZ',                    # Windows PE
+    b'\x7fELF',               # Linux
+    b'\xcf\xfa\xed\xfe',      # Mach-O 64
+    b'\xce\xfa\xed\xfe',      # Mach-O 32
+)
+
+
+@tarea('escanear')
+def escanear(archivo):
+    """Simulated anti-malware scan: risky extensions and executable headers."""
+    with archivo.archivo.open('rb') as f:
+        cabecera = f.read(4)
+    sospechoso = (archivo.extension in EXTENSIONES_SOSPECHOSAS
+                  or cabecera.startswith(FIRMAS_EJECUTABLES))
+    ArchivoProyecto.objects.filter(pk=archivo.pk).update(
+        scan_status='suspicious' if sospechoso else 'clean',
+    )
+
+
+def _es_imagen(archivo):
+    return archivo.tipo == 'imagen' and imagenes.es_raster(archivo.archivo.name)
+
+
+@tarea('miniaturas', aplica=_es_imagen, concurrencia=2)
+def miniaturas_archivo(archivo):
+    """WebP/JPEG variants of an image file (shared by every row using the blob)."""
+    anchos = imagenes.generar_variantes(archivo.archivo.storage, archivo.archivo.name)
+    ArchivoProyecto.objects.filter(archivo=archivo.archivo.name).update(variantes=anchos)
+
+
+@tarea('miniaturas_proyecto', modelo=ProyectoGrado,
+       aplica=lambda proyecto: bool(proyecto.thumbnail), concurrencia=2)
+def miniaturas_proyecto(proyecto):
+    """WebP/JPEG variants of the project thumbnail."""
+    name = proyecto.thumbnail.name
+    anchos = imagenes.generar_variantes(proyecto.thumbnail.storage, name)
+    # Only if the thumbnail was not replaced meanwhile.
+    ProyectoGrado.objects.filter(pk=proyecto.pk, thumbnail=name).update(thumbnail_variantes=anchos)
+
+
+def _es_comprimido(archivo):
+    return archivo.tipo == 'comprimido' and comprimidos.formato_de(archivo.nombre_original) is not None
+
+
+@tarea('indice_comprimido', aplica=_es_comprimido)
+def indice_comprimido(archivo):
+    """Member list of a zip/tar/gz file, browsable from the detail page."""
+    comprimidos.indexar(archivo)
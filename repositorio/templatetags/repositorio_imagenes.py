@@ -0,0 +1,41 @@
+"""
+Responsive images for the repositorio templates (variants from imagenes.py).
+
+    {% load repositorio_imagenes %}
+    <img srcset="{% srcset p.thumbnail p.thumbnail_variantes 'jpg' %}" ...>
+    {% imagen_responsive p.thumbnail p.thumbnail_variantes alt=p.titulo sizes="50vw" %}
+"""
+
+from django import template
+from django.utils.html import format_html
+
+from repositorio.imagenes import variante_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def srcset(fieldfile, anchos, ext='webp'):
+    """``"<url> 320w, <url> 640w"`` for the generated variants of ``fieldfile``."""
+    if not fieldfile or not anchos:
+        return ''
+    storage = fieldfile.storage
+    return ', '.join(f'{storage.url(variante_name(fieldfile.name, ancho, ext))} {ancho}w'
+                     for ancho in anchos)
+
+
+@register.simple_tag
+def imagen_responsive(fieldfile, anchos, alt='', sizes='100vw'):
+    """
+    ``<picture>`` with WebP and JPEG srcsets; a plain ``<img>`` of the original
+    while no variants exist yet.
+    """
+    if not anchos:
+        return format_html('<img src="{}" alt="{}" loading="lazy">', fieldfile.url, alt)
+    mayor = fieldfile.storage.url(variante_name(fieldfile.name, max(anchos), 'jpg'))
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy" decoding="async"></picture>',
+        srcset(fieldfile, anchos, 'webp'), sizes,
+        mayor, srcset(fieldfile, anchos, 'jpg'), sizes, alt,
+    )
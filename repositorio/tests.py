@@ -1,3 +1,1403 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import os
+import re
+import tarfile
+import tempfile
+import time
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+from urllib.parse import quote
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+from django.template import Context, Template
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from PIL import Image
+
+from .facets import facetas_para, get_resumen_facetas, recalcular_facetas
+from .models import (
+    ProyectoGrado, ArchivoProyecto, RegistroDescarga, TagHabilidad, FacetaConteo, Carrera,
+    TareaProcesamiento, Voto, ProyectoRelacionado, CLUSTER_CHOICES,
+)
+from . import (audit, comprimidos, counters, imagenes, previews, recomendaciones, results_cache,
+               storage, suggest, tareas, uploads)
+from .pagination import SORT_KEYS, keyset_queryset, ordering_for, paginate
+from .recomendaciones import recalcular_relacionados, relacionados_de
+from .search import IcontainsSearchBackend, get_search_backend, reset_search_backend
+from .suggest import PrefixIndex
+
+
+def setUpModule():
+    # No flusher threads in tests; flush() is called explicitly.
+    counters._buffer = counters.LocalCounterBuffer(intervalo=0)
+    audit._cola = audit.DownloadAuditQueue(intervalo=0, capacidad=100)
+
+
+def tearDownModule():
+    counters._buffer = None
+    audit._cola = None
+
+
+def crear_proyecto(**kwargs):
+    data = {
+        'titulo': 'Proyecto de prueba',
+        'descripcion': 'Descripcion generica del proyecto de prueba.',
+        'autor': 'Ana Torres',
+        'carrera': 'software',
+        'estado': ProyectoGrado.EstadoProyecto.PUBLICADO,
+    }
+    data.update(kwargs)
+    return ProyectoGrado.objects.create(**data)
+
+
+class MediaTemporalMixin:
+    """Runs every test with MEDIA_ROOT in a fresh temporary directory."""
+
+    def ajustes_media(self):
+        """Extra settings overridden together with MEDIA_ROOT (``self.media`` exists)."""
+        return {}
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name, **self.ajustes_media())
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'FTS5 backend; MySQL is covered by BusquedaMySQLTests')
+class BusquedaFullTextTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_search_backend()
+        self.en_titulo = crear_proyecto(titulo='Inventario con Python y Django')
+        self.en_descripcion = crear_proyecto(
+            titulo='Sistema de turnos',
+            descripcion='Aplicacion de turnos escrita en Python para un hospital.',
+        )
+        self.otro = crear_proyecto(titulo='Maqueta arquitectonica', autor='Luis Gomez')
+
+    def _buscar(self, q):
+        qs = ProyectoGrado.objects.all()
+        return list(get_search_backend().search(qs, q).order_by('-search_rank'))
+
+    def test_backend_full_text_en_sqlite(self):
+        self.assertEqual(get_search_backend().name, 'sqlite_fts5')
+
+    def test_busqueda_ordenada_por_relevancia(self):
+        self.assertEqual(self._buscar('python'), [self.en_titulo, self.en_descripcion])
+
+    def test_busqueda_por_prefijo_y_autor(self):
+        self.assertEqual(self._buscar('gom'), [self.otro])
+
+    def test_indice_sincronizado_en_edicion_y_borrado(self):
+        self.otro.titulo = 'Maqueta con Python'
+        self.otro.save()
+        self.assertIn(self.otro, self._buscar('python'))
+        self.en_titulo.delete()
+        self.assertNotIn(self.en_titulo.pk, [p.pk for p in self._buscar('inventario')])
+
+    def test_comando_reconstruye_indice(self):
+        ProyectoGrado.objects.filter(pk=self.otro.pk).update(titulo='Robot soldador')
+        self.assertEqual(self._buscar('robot'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self._buscar('robot'), [self.otro])
+
+    def test_explorador_usa_indice(self):
+        response = self.client.get(reverse('repositorio:explorador'), {'q': 'python'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['selected_sort'], 'relevancia')
+        self.assertEqual(list(response.context['proyectos']), [self.en_titulo, self.en_descripcion])
+
+    def test_benchmark_borra_los_datos_sinteticos(self):
+        total = ProyectoGrado.objects.count()
+        salida = StringIO()
+        call_command('benchmark_search', sizes=[50], repeat=1, bd_actual=True, stdout=salida)
+        self.assertIn('sqlite_fts5', salida.getvalue())
+        self.assertEqual(ProyectoGrado.objects.count(), total)
+        self.assertEqual(self._buscar('python'), [self.en_titulo, self.en_descripcion])
+
+    def test_benchmark_no_borra_proyectos_reales_con_ficha_bench(self):
+        real = crear_proyecto(titulo='Banco de pruebas', ficha='bench-7')
+        call_command('benchmark_search', sizes=[20], repeat=1, bd_actual=True, stdout=StringIO())
+        self.assertTrue(ProyectoGrado.objects.filter(pk=real.pk).exists())
+
+
+@skipUnless(connection.vendor == 'mysql', 'MySQL FULLTEXT backend')
+class BusquedaMySQLTests(TransactionTestCase):
+    # InnoDB FULLTEXT indexes only see committed rows, so no TestCase here.
+
+    def setUp(self):
+        reset_search_backend()
+        self.en_titulo = crear_proyecto(titulo='Inventario con Python y Django')
+        self.en_descripcion = crear_proyecto(
+            titulo='Sistema de turnos',
+            descripcion='Aplicacion de turnos escrita en Python para un hospital.',
+        )
+        self.otro = crear_proyecto(titulo='Maqueta arquitectonica', autor='Luis Gomez')
+
+    def _buscar(self, q):
+        return list(get_search_backend().search(ProyectoGrado.objects.all(), q)
+                    .order_by('-search_rank', 'pk'))
+
+    def test_backend_y_relevancia(self):
+        self.assertEqual(get_search_backend().name, 'mysql_fulltext')
+        self.assertCountEqual(self._buscar('python'), [self.en_titulo, self.en_descripcion])
+        self.assertEqual(self._buscar('gom'), [self.otro])
+
+    def test_benchmark_borra_los_datos_sinteticos(self):
+        call_command('benchmark_search', sizes=[50], repeat=1, bd_actual=True, stdout=StringIO())
+        self.assertEqual(ProyectoGrado.objects.count(), 3)
+
+
+class FacetasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.python = TagHabilidad.objects.create(nombre='Python', slug='python')
+        self.figma = TagHabilidad.objects.create(nombre='Figma', slug='figma')
+        self.p1 = crear_proyecto(carrera='software', anio=2025)
+        self.p1.tags.add(self.python, self.figma)
+        self.p2 = crear_proyecto(carrera='adsi', anio=2026)
+        self.p2.tags.add(self.python)
+        self.borrador = crear_proyecto(estado=ProyectoGrado.EstadoProyecto.BORRADOR)
+        self.borrador.tags.add(self.figma)
+
+    def _conteos(self):
+        return set(FacetaConteo.objects.filter(conteo__gt=0).values_list('faceta', 'valor', 'conteo'))
+
+    def assertIncrementalIgualRecalculo(self):
+        incremental = self._conteos()
+        recalcular_facetas()
+        self.assertEqual(incremental, self._conteos())
+
+    def test_conteos_incrementales(self):
+        resumen = get_resumen_facetas()
+        self.assertEqual(resumen['total'], 2)
+        self.assertEqual(resumen['clusters']['TICS']['count'], 2)
+        self.assertEqual([t['slug'] for t in resumen['tags']], ['python', 'figma'])
+        self.assertIncrementalIgualRecalculo()
+
+    def test_publicar_editar_y_borrar(self):
+        self.borrador.estado = ProyectoGrado.EstadoProyecto.PUBLICADO
+        self.borrador.save()
+        self.assertIncrementalIgualRecalculo()
+        self.p1.carrera = 'enfermeria'
+        self.p1.anio = 2024
+        self.p1.save()
+        self.p2.tags.clear()
+        self.figma.proyectos.remove(self.borrador)
+        self.assertIncrementalIgualRecalculo()
+        self.p1.delete()
+        self.assertIncrementalIgualRecalculo()
+        self.assertEqual(get_resumen_facetas()['total'], 2)
+
+    def test_resumen_sigue_la_generacion_compartida(self):
+        self.assertEqual(get_resumen_facetas()['total'], 2)
+        # Another worker's LocMemCache never hears about a delete: the summary
+        # must go stale through the generation stored in the database.
+        with mock.patch.object(cache, 'delete'), mock.patch.object(cache, 'delete_many'):
+            crear_proyecto(carrera='adsi')
+        self.assertEqual(get_resumen_facetas()['total'], 3)
+        with self.assertNumQueries(1):  # the generation; the summary is cached again
+            get_resumen_facetas()
+
+    def test_guardar_lee_la_fila_previa_una_vez(self):
+        self.p1.carrera = 'adsi'
+        with CaptureQueriesContext(connection) as consultas:
+            self.p1.save()
+        tabla = ProyectoGrado._meta.db_table
+        lecturas = [q['sql'] for q in consultas.captured_queries
+                    if q['sql'].startswith('SELECT') and f'FROM "{tabla}"' in q['sql']]
+        self.assertEqual(len(lecturas), 1, lecturas)
+        self.assertNotIn('_fila_previa', self.p1.__dict__)
+        self.assertIncrementalIgualRecalculo()
+
+    def test_facetas_filtradas(self):
+        qs = ProyectoGrado.objects.filter(estado=ProyectoGrado.EstadoProyecto.PUBLICADO, anio=2026)
+        with self.assertNumQueries(2):
+            facetas = facetas_para(qs)
+        self.assertEqual(facetas['total'], 1)
+        self.assertEqual([a['anio'] for a in facetas['anios']], [2026])
+        self.assertEqual(facetas['tags'], [{'slug': 'python', 'nombre': 'Python', 'count': 1}])
+
+
+class PaginacionKeysetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        ProyectoGrado.objects.bulk_create([
+            ProyectoGrado(
+                titulo=f'Proyecto {i % 7}', descripcion='d', autor='a', carrera='software',
+                votos=i % 5, descargas=i % 3, estado=ProyectoGrado.EstadoProyecto.PUBLICADO,
+            )
+            for i in range(25)
+        ])
+        self.qs = ProyectoGrado.objects.filter(estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
+
+    def test_recorre_todas_las_paginas_sin_huecos(self):
+        for sort in SORT_KEYS:
+            esperado = list(self.qs.order_by(*ordering_for(sort)).values_list('pk', flat=True))
+            vistos, cursor = [], None
+            while True:
+                items, cursor = paginate(self.qs, sort, cursor, page_size=10)
+                vistos += [p.pk for p in items]
+                if not cursor:
+                    break
+            self.assertEqual(vistos, esperado, sort)
+
+    def test_relevancia_por_keyset_sin_offset(self):
+        pks = list(self.qs.values_list('pk', flat=True))
+        ProyectoGrado.objects.filter(pk__in=pks[::3]).update(descripcion='proyecto proyecto')
+        backend = get_search_backend()
+        backend.rebuild()  # bulk_create and update() skipped the index signals
+        for b in (backend, IcontainsSearchBackend()):
+            qs = b.search(self.qs, 'proyecto')
+            esperado = [p.pk for p in qs.order_by(*ordering_for('relevancia'))]
+            if b is backend:
+                self.assertGreater(len({p.search_rank for p in qs}), 1)  # ranks and ties
+            vistos, cursor = [], None
+            while True:
+                with CaptureQueriesContext(connection) as consultas:
+                    items, cursor = paginate(qs, 'relevancia', cursor, page_size=10)
+                self.assertNotIn('OFFSET', consultas.captured_queries[-1]['sql'])
+                vistos += [p.pk for p in items]
+                if not cursor:
+                    break
+            self.assertEqual(vistos, esperado, b.name)
+            self.assertEqual(len(vistos), 25)
+
+    def test_cursor_invalido_vuelve_a_primera_pagina(self):
+        primera, _ = paginate(self.qs, 'titulo', None, page_size=10)
+        items, _ = paginate(self.qs, 'titulo', 'no-es-un-cursor', page_size=10)
+        self.assertEqual(items, primera)
+
+    def test_pagina_profunda_por_ajax(self):
+        _, cursor = paginate(self.qs, 'populares', None, page_size=10)
+        results_cache.generaciones()  # rows created on first use
+        with self.assertNumQueries(3):  # cache generations + page (with file counts) + prefetch tags
+            response = self.client.get(
+                reverse('repositorio:explorador'), {'sort': 'populares', 'cursor': cursor},
+                headers={'X-Requested-With': 'XMLHttpRequest'},
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('project-card', response.json()['html'])
+
+
+class BusquedaApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_search_backend()
+        self.proyecto = crear_proyecto(titulo='Inventario con Python', votos=5)
+        crear_proyecto(titulo='Catalogo de moda', carrera='moda')
+        crear_proyecto(titulo='Borrador oculto', estado=ProyectoGrado.EstadoProyecto.BORRADOR)
+        for nombre in ('a.pdf', 'b.pdf'):
+            ArchivoProyecto.objects.create(proyecto=self.proyecto, archivo=f'x/{nombre}',
+                                           nombre_original=nombre)
+        self.url = reverse('repositorio-api-list')
+
+    def test_filtros_y_campos_seleccionados(self):
+        response = self.client.get(self.url, {'carrera': 'software', 'fields': 'id,titulo,num_archivos'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [
+            {'id': self.proyecto.pk, 'titulo': 'Inventario con Python', 'num_archivos': 2},
+        ])
+
+    def test_sin_prefetch_de_archivos(self):
+        # File counts come from a subquery annotation, not an archivos prefetch.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'fields': 'id,num_archivos,votos', 'sort': 'populares'})
+        self.assertEqual([r['votos'] for r in response.json()['results']], [5, 0])
+
+    def test_explorador_cuenta_archivos_sin_cargarlos(self):
+        response = self.client.get(reverse('repositorio:explorador'))
+        proyecto = next(p for p in response.context['proyectos'] if p.pk == self.proyecto.pk)
+        self.assertNotIn('archivos', proyecto._prefetched_objects_cache)
+        with self.assertNumQueries(0):
+            self.assertEqual(proyecto.archivos_count, 2)
+        self.assertEqual(ProyectoGrado.objects.get(pk=self.proyecto.pk).archivos_count, 2)
+
+    def test_cursor_siguiente_pagina(self):
+        response = self.client.get(self.url, {'fields': 'id', 'page_size': 1})
+        siguiente = response.json()['next']
+        self.assertIsNotNone(siguiente)
+        response = self.client.get(siguiente)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNone(response.json()['next'])
+
+
+class HerramientasTagsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_guardar_sincroniza_tags_de_herramientas(self):
+        TagHabilidad.objects.create(nombre='Python', slug='python', categoria='Lenguaje')
+        proyecto = crear_proyecto(herramientas_usadas='python, Django ,  ,Figma')
+        self.assertEqual(sorted(proyecto.tags.values_list('slug', flat=True)),
+                         ['django', 'figma', 'python'])
+
+        proyecto.herramientas_usadas = 'Django, C#'
+        proyecto.save(update_fields=['herramientas_usadas'])
+        # Only "Herramienta" tags follow the text; the pre-existing Python tag stays.
+        self.assertEqual(sorted(proyecto.tags.values_list('slug', flat=True)),
+                         ['c', 'django', 'python'])
+
+    def test_filtro_y_tarjetas_usan_tags(self):
+        crear_proyecto(titulo='Con React', herramientas_usadas='React, Figma')
+        crear_proyecto(titulo='Sin React', herramientas_usadas='Figma')
+        response = self.client.get(reverse('repositorio:explorador'), {'tag': 'react'})
+        self.assertEqual([p.titulo for p in response.context['proyectos']], ['Con React'])
+        self.assertContains(response, '<span class="card-tag">React</span>', html=True)
+
+    def test_backfill(self):
+        proyecto = crear_proyecto()
+        ProyectoGrado.objects.filter(pk=proyecto.pk).update(herramientas_usadas='Unity, Blender')
+        call_command('backfill_herramientas', stdout=StringIO())
+        self.assertEqual(sorted(proyecto.tags.values_list('nombre', flat=True)), ['Blender', 'Unity'])
+        self.assertEqual(FacetaConteo.objects.get(faceta='tag', valor=str(proyecto.tags.first().pk)).conteo, 1)
+
+
+class ClusterPreviewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_columnas_derivadas_de_la_carrera(self):
+        proyecto = crear_proyecto(carrera='fotografia')
+        self.assertEqual((proyecto.cluster, proyecto.preview_type), ('CREATIVAS', 'GALLERY'))
+        proyecto.carrera = 'software'
+        proyecto.save(update_fields=['carrera'])
+        proyecto.refresh_from_db()
+        self.assertEqual((proyecto.cluster, proyecto.preview_type), ('TICS', 'CODE'))
+
+    def test_reasignar_cluster_de_la_carrera(self):
+        proyecto = crear_proyecto(carrera='fotografia')
+        carrera = Carrera.objects.get(clave='fotografia')
+        carrera.cluster = 'TICS'
+        carrera.save()
+        proyecto.refresh_from_db()
+        self.assertEqual(proyecto.cluster, 'TICS')
+        response = self.client.get(reverse('repositorio:explorador'), {'cluster': 'TICS', 'tipo': 'GALLERY'})
+        self.assertEqual([p.pk for p in response.context['proyectos']], [proyecto.pk])
+
+    def test_borrar_carrera_devuelve_el_cluster_por_defecto(self):
+        carrera = Carrera.objects.get(clave='fotografia')
+        carrera.cluster = 'TICS'
+        carrera.save()
+        proyecto = crear_proyecto(carrera='fotografia')
+        self.assertEqual(proyecto.cluster, 'TICS')
+        carrera.delete()
+        proyecto.refresh_from_db()
+        self.assertEqual(proyecto.cluster, 'CREATIVAS')
+        response = self.client.get(reverse('repositorio:explorador'), {'cluster': 'CREATIVAS'})
+        self.assertEqual([p.pk for p in response.context['proyectos']], [proyecto.pk])
+
+    def test_renombrar_clave_de_la_carrera(self):
+        carrera = Carrera.objects.get(clave='fotografia')
+        carrera.cluster = 'ADMIN'
+        carrera.save()
+        anterior = crear_proyecto(carrera='fotografia')
+        nueva = crear_proyecto(carrera='fotografia_digital')
+        self.assertEqual((anterior.cluster, nueva.cluster), ('ADMIN', 'TICS'))
+        carrera.clave = 'fotografia_digital'
+        carrera.save()
+        anterior.refresh_from_db()
+        nueva.refresh_from_db()
+        self.assertEqual((anterior.cluster, nueva.cluster), ('CREATIVAS', 'ADMIN'))
+
+
+class CacheResultadosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.software = crear_proyecto(titulo='Software uno')
+        self.moda = crear_proyecto(titulo='Moda uno', carrera='modas')
+        self.url = reverse('repositorio:explorador')
+
+    def test_acierto_sin_consultas_de_resultados(self):
+        self.assertEqual(self.client.get(self.url, {'sort': 'titulo'})['X-Cache'], 'MISS')
+        with self.assertNumQueries(3):  # generations + cards by pk + prefetch tags
+            response = self.client.get(self.url, {'sort': 'titulo'})
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual([p.titulo for p in response.context['proyectos']], ['Moda uno', 'Software uno'])
+        self.assertEqual(response.context['total_count'], 2)
+        self.assertEqual(results_cache.estadisticas()['hits'], 1)
+
+    def test_invalidacion_por_carrera(self):
+        for params in ({}, {'carrera': 'software'}, {'carrera': 'modas'}):
+            self.client.get(self.url, params)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.software.titulo = 'Software editado'
+            self.software.save()
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.url, {'carrera': 'software'})['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(self.url, {'carrera': 'modas'})['X-Cache'], 'HIT')
+
+    def test_cambio_hecho_por_otro_worker(self):
+        self.client.get(self.url, {'carrera': 'software'})
+        # A save in another process only leaves its bump in the database.
+        ProyectoGrado.objects.filter(pk=self.software.pk).update(titulo='Software remoto')
+        with mock.patch.object(cache, 'incr'), mock.patch.object(cache, 'delete'):
+            results_cache.invalidar('software')
+        response = self.client.get(self.url, {'carrera': 'software'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([p.titulo for p in response.context['proyectos']], ['Software remoto'])
+
+    def test_cambio_de_carrera_invalida_ambas(self):
+        self.client.get(self.url, {'carrera': 'modas'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.software.carrera = 'modas'
+            self.software.save()
+        response = self.client.get(self.url, {'carrera': 'modas'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.context['proyectos']), 2)
+
+
+class DetalleConsultasTests(TestCase):
+    def setUp(self):
+        self.proyecto = crear_proyecto(herramientas_usadas='Python')
+        crear_proyecto(titulo='Otro proyecto de prueba')
+        recalcular_relacionados()
+        self.url = reverse('repositorio:detalle', args=[self.proyecto.pk])
+
+    def agregar_archivos(self, n):
+        tipos = ['imagen', 'codigo', 'documento', 'video', 'modelo_3d', 'otro']
+        ArchivoProyecto.objects.bulk_create([
+            ArchivoProyecto(proyecto=self.proyecto, archivo=f'x/a{i}.bin', nombre_original=f'a{i}.bin',
+                            tipo=tipos[i % len(tipos)], version_label='V1' if i % 2 else 'V2')
+            for i in range(n)
+        ])
+
+    def test_consultas_constantes_con_muchos_archivos(self):
+        # proyecto, tags, archivos, relacionados (vistas are buffered)
+        self.agregar_archivos(3)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+        self.agregar_archivos(60)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['archivos']), 63)
+        self.assertEqual(len(response.context['images']), 11)
+        self.assertEqual(sum(len(v) for v in response.context['archivos_by_version'].values()), 63)
+
+
+class ContadoresTests(TestCase):
+    def setUp(self):
+        counters.get_buffer().flush()
+        self.proyecto = crear_proyecto()
+        self.otro = crear_proyecto(votos=7)
+
+    def test_vistas_en_buffer_y_flush_por_lotes(self):
+        url = reverse('repositorio:detalle', args=[self.proyecto.pk])
+        for _ in range(3):
+            response = self.client.get(url)
+        self.assertEqual(response.context['proyecto'].vistas, 3)  # merged pending deltas
+        self.assertEqual(ProyectoGrado.objects.get(pk=self.proyecto.pk).vistas, 0)
+
+        counters.incrementar(self.otro.pk, 'votos', 2)
+        with self.assertNumQueries(3):  # SAVEPOINT, one UPDATE, RELEASE
+            self.assertEqual(counters.flush(), 2)
+        self.assertEqual(ProyectoGrado.objects.get(pk=self.proyecto.pk).vistas, 3)
+        self.assertEqual(ProyectoGrado.objects.get(pk=self.otro.pk).votos, 9)
+        self.assertEqual(counters.pendientes([self.proyecto.pk]), {})
+
+    def test_flush_fallido_conserva_deltas(self):
+        counters.incrementar(self.proyecto.pk, 'descargas')
+        with mock.patch.object(counters, 'escribir_deltas', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                counters.flush()
+        self.assertEqual(counters.pendientes([self.proyecto.pk]), {(self.proyecto.pk, 'descargas'): 1})
+        counters.flush()
+
+
+class VotoTests(TestCase):
+    def setUp(self):
+        counters.get_buffer().flush()
+        self.proyecto = crear_proyecto(votos=7)
+        self.url = reverse('repositorio:votar', args=[self.proyecto.pk])
+        self.usuario = get_user_model().objects.create_user('votante', password='x')
+        self.client.force_login(self.usuario)
+
+    def test_un_voto_por_usuario_con_un_insert(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post(self.url)
+        self.assertEqual(response.json(), {'ok': True, 'votado': True})
+        sql = [q['sql'] for q in consultas if 'repositorio_' in q['sql']]
+        self.assertEqual(len(sql), 1)
+        self.assertTrue(sql[0].startswith('INSERT'), sql)
+
+        # Another session of the same user cannot vote again.
+        self.client.logout()
+        self.client.force_login(self.usuario)
+        response = self.client.post(self.url)
+        self.assertFalse(response.json()['ok'])
+        self.assertTrue(response.json()['votado'])
+
+        self.client.force_login(get_user_model().objects.create_user('otro', password='x'))
+        self.assertTrue(self.client.post(self.url).json()['ok'])
+        self.assertEqual(Voto.objects.filter(proyecto=self.proyecto).count(), 2)
+        counters.flush()
+        self.assertEqual(ProyectoGrado.objects.get(pk=self.proyecto.pk).votos, 9)
+
+    def test_proyecto_inexistente_y_boton_marcado(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.post(reverse('repositorio:votar', args=[9999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(Voto.objects.exists())
+
+        detalle = reverse('repositorio:detalle', args=[self.proyecto.pk])
+        self.assertFalse(self.client.get(detalle).context['ya_votado'])
+        self.client.post(self.url)
+        self.assertTrue(self.client.get(detalle).context['ya_votado'])
+
+
+class PaginaInicioTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.destacado = crear_proyecto(titulo='Proyecto destacado', destacado=True)
+        self.otro = crear_proyecto(titulo='Proyecto comun')
+
+    def test_pagina_anonima_cacheada_e_invalidada_al_destacar(self):
+        response = self.client.get(reverse('index'))
+        self.assertContains(response, 'Proyecto destacado')
+        self.assertEqual(len(response.context['clusters']), len(CLUSTER_CHOICES))
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get(reverse('index')), 'Proyecto destacado')
+
+        admin = get_user_model().objects.create_superuser('admin', 'a@x.co', 'x')
+        self.client.force_login(admin)
+        self.client.post(reverse('admin_toggle_destacado', args=[self.otro.pk]))
+        self.client.logout()
+        self.assertContains(self.client.get(reverse('index')), 'Proyecto comun')
+
+    def test_benchmark(self):
+        salida = StringIO()
+        call_command('benchmark_index', requests=2, stdout=salida)
+        self.assertIn('antes (por peticion)', salida.getvalue())
+        self.assertIn('despues, anonimo', salida.getvalue())
+
+
+class DescargaTests(MediaTemporalMixin, TestCase):
+    CONTENIDO = b'%PDF-1.4 contenido'
+
+    def ajustes_media(self):
+        return {'X_ACCEL_LOCATIONS': {self.media.name: '/protected/media/'}}
+
+    def setUp(self):
+        super().setUp()
+        # Fresh queue: events left by other tests point at rolled-back rows.
+        audit._cola = audit.DownloadAuditQueue(intervalo=0, capacidad=3)
+
+        proyecto = crear_proyecto()
+        self.archivo = ArchivoProyecto.objects.create(
+            proyecto=proyecto, nombre_original='informe final.pdf',
+            archivo=SimpleUploadedFile('informe.pdf', self.CONTENIDO),
+            hash_sha256=hashlib.sha256(self.CONTENIDO).hexdigest(),
+        )
+        self.etag = f'"{self.archivo.hash_sha256}"'
+        self.client.force_login(get_user_model().objects.create_user('lector', password='x'))
+        self.url = reverse('repositorio:descargar', args=[self.archivo.pk])
+
+    @override_settings(FILE_DOWNLOAD_MODE='django')
+    def test_modo_django_transmite_el_archivo(self):
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 contenido')
+        self.assertNotIn('X-Accel-Redirect', response)
+
+    @override_settings(FILE_DOWNLOAD_MODE='nginx')
+    def test_modo_nginx_delega_la_transferencia(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['X-Accel-Redirect'],
+                         '/protected/media/' + quote(self.archivo.archivo.name))
+        self.assertIn('attachment', response['Content-Disposition'])
+        self.assertEqual(response['ETag'], self.etag)
+        self.assertEqual(RegistroDescarga.objects.filter(archivo=self.archivo).count(), 0)
+        self.assertEqual(audit.flush(), 1)
+        self.assertEqual(RegistroDescarga.objects.filter(archivo=self.archivo).count(), 1)
+
+    def test_nginx_conserva_el_etag_de_django(self):
+        # nginx swaps in its own mtime/size ETag unless each internal location
+        # turns it off and passes the upstream one through.
+        with open(os.path.join(settings.BASE_DIR, 'nginx', 'default.conf')) as f:
+            conf = f.read()
+        for location in settings.X_ACCEL_LOCATIONS.values():
+            bloque = conf[conf.index(f'location {location} {{'):]
+            bloque = bloque[:bloque.index('}')]
+            self.assertIn('etag off;', bloque)
+            self.assertIn('add_header ETag $upstream_http_etag;', bloque)
+
+    def test_auditoria_en_lote_y_cola_llena(self):
+        usuario = get_user_model().objects.get(username='lector')
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                audit.registrar_descarga(self.archivo.pk, usuario.pk, '10.0.0.1')
+        # Queue bound (3 in tests) reached: the fourth event is written inline.
+        with self.assertNumQueries(1), self.assertLogs('repositorio.audit', 'WARNING'):
+            audit.registrar_descarga(self.archivo.pk, usuario.pk, '10.0.0.1')
+        with self.assertNumQueries(1):
+            self.assertEqual(audit.flush(), 3)
+        self.assertEqual(RegistroDescarga.objects.filter(archivo=self.archivo).count(), 4)
+
+    def test_auditoria_con_archivo_o_usuario_borrados(self):
+        borrado = get_user_model().objects.create_user('borrado', password='x')
+        sigue = get_user_model().objects.create_user('sigue', password='x')
+        otro = ArchivoProyecto.objects.create(
+            proyecto=self.archivo.proyecto, nombre_original='otro.pdf',
+            archivo=SimpleUploadedFile('otro.pdf', b'x'))
+        audit.registrar_descarga(self.archivo.pk, borrado.pk, '10.0.0.1')
+        audit.registrar_descarga(self.archivo.pk, sigue.pk, '10.0.0.1')
+        audit.registrar_descarga(otro.pk, sigue.pk, '10.0.0.1')
+        otro.delete()
+        borrado.delete()
+        # SQLite defers FK checks to the commit; MySQL raises on the insert.
+        original = RegistroDescarga.objects.bulk_create
+        llamadas = []
+
+        def bulk_create(filas):
+            llamadas.append(len(filas))
+            if len(llamadas) == 1:
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            return original(filas)
+
+        with mock.patch.object(RegistroDescarga.objects, 'bulk_create', bulk_create), \
+                self.assertLogs('repositorio.audit', 'WARNING'):
+            self.assertEqual(audit.flush(), 2)
+        self.assertEqual(llamadas, [3, 2])
+        self.assertCountEqual(
+            RegistroDescarga.objects.values_list('archivo_id', 'usuario_id'),
+            [(self.archivo.pk, None), (self.archivo.pk, sigue.pk)])
+
+    def test_auditoria_descarta_lo_que_sigue_siendo_invalido(self):
+        audit.registrar_descarga(self.archivo.pk, None, '10.0.0.1')
+        with mock.patch.object(RegistroDescarga.objects, 'bulk_create',
+                               side_effect=IntegrityError('fk')), \
+                self.assertLogs('repositorio.audit', 'ERROR'):
+            self.assertEqual(audit.flush(), 0)
+        # Dropped, not put back: the queue does not retry it forever.
+        self.assertEqual(audit.get_queue().cola.qsize(), 0)
+
+    def test_rango_parcial(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=9-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 9-17/{len(self.CONTENIDO)}')
+        self.assertEqual(b''.join(response.streaming_content), b'contenido')
+        self.assertEqual(response['ETag'], self.etag)
+        # Seeking is not a new download.
+        self.assertEqual(RegistroDescarga.objects.filter(archivo=self.archivo).count(), 0)
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(b''.join(response.streaming_content), b'nido')
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self.client.get(self.url, HTTP_RANGE='bytes=99-').status_code, 416)
+
+    def test_reproduccion_inline_no_cuenta_como_descarga(self):
+        # <video preload="metadata"> on the detail page sends this on every view.
+        pk = self.archivo.proyecto_id
+        antes = counters.pendientes([pk])
+        response = self.client.get(self.url, {'inline': '1'}, HTTP_RANGE='bytes=0-')
+        self.assertEqual(response.status_code, 206)
+        self.assertNotIn('attachment', response['Content-Disposition'])
+        self.assertEqual(counters.pendientes([pk]), antes)
+        self.assertEqual(audit.flush(), 0)
+        self.assertEqual(RegistroDescarga.objects.filter(archivo=self.archivo).count(), 0)
+
+    def test_if_range_desactualizado_devuelve_todo(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=9-', HTTP_IF_RANGE='"otro"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.CONTENIDO)
+
+    def test_if_none_match(self):
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(RegistroDescarga.objects.filter(archivo=self.archivo).count(), 0)
+
+
+class AlmacenamientoContenidoTests(MediaTemporalMixin, TestCase):
+    CONTENIDO = b'%PDF-1.4 mismo contenido'
+
+    def ajustes_media(self):
+        return {'REPOSITORIO_BLOB_GRACE_SECONDS': 0}
+
+    def setUp(self):
+        super().setUp()
+        self.proyecto = crear_proyecto()
+
+    def subir(self, nombre, contenido=CONTENIDO):
+        return ArchivoProyecto.objects.create(
+            proyecto=self.proyecto, nombre_original=nombre,
+            archivo=SimpleUploadedFile(nombre, contenido),
+        )
+
+    def test_mismo_contenido_un_solo_blob(self):
+        v1, v2 = self.subir('v1.pdf'), self.subir('FINAL.PDF')
+        sha = hashlib.sha256(self.CONTENIDO).hexdigest()
+        self.assertEqual(v1.hash_sha256, sha)
+        self.assertEqual(v1.archivo.name, f'repositorio/blobs/{sha[:2]}/{sha[2:4]}/{sha}.pdf')
+        self.assertEqual(v2.archivo.name, v1.archivo.name)
+        self.assertEqual(storage.referencias(v1.archivo.name), 2)
+
+        path = v1.archivo.path
+        with self.captureOnCommitCallbacks(execute=True):
+            v1.delete()
+        self.assertTrue(os.path.exists(path))
+        with self.captureOnCommitCallbacks(execute=True):
+            v2.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_dedup_media_y_gc_blobs(self):
+        antiguos, antiguo_a = [], 'repositorio/software/2024/a.pdf'
+        for nombre in ('a.pdf', 'b.pdf'):
+            name = f'repositorio/software/2024/{nombre}'
+            storage.blob_storage.save(name, SimpleUploadedFile(nombre, self.CONTENIDO))
+            archivo = self.subir(nombre, b'otro')
+            ArchivoProyecto.objects.filter(pk=archivo.pk).update(archivo=name, hash_sha256='')
+            antiguos.append(archivo.pk)
+        # Its on_commit release never runs here, as after a worker crash.
+        huerfano = self.subir('huerfano.pdf', b'huerfano')
+        ArchivoProyecto.objects.filter(pk=huerfano.pk).delete()
+
+        out = StringIO()
+        call_command('dedup_media', stdout=out)
+        self.assertIn('1 movido(s), 1 duplicado(s)', out.getvalue())
+        filas = ArchivoProyecto.objects.filter(pk__in=antiguos)
+        self.assertEqual({a.archivo.name for a in filas}, {storage.blob_name(
+            hashlib.sha256(self.CONTENIDO).hexdigest(), 'a.pdf')})
+        self.assertFalse(os.path.exists(os.path.join(self.media.name, antiguo_a)))
+
+        out = StringIO()
+        call_command('gc_blobs', stdout=out)
+        # The orphan and the blob of b'otro' (rows repointed above) go.
+        self.assertIn('2 archivo(s) sin referencias', out.getvalue())
+        self.assertFalse(os.path.exists(huerfano.archivo.path))
+        self.assertTrue(all(os.path.exists(a.archivo.path) for a in filas))
+
+
+class SubidaStreamingTests(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.usuario = get_user_model().objects.create_user('autor', password='x')
+        self.proyecto = crear_proyecto(subido_por=self.usuario)
+        self.url = reverse('repositorio:subir_archivos', args=[self.proyecto.pk])
+        self.client.force_login(self.usuario)
+
+    def test_hash_tamano_y_tipo_en_una_pasada(self):
+        contenido = b'MZ' + b'x' * 5000
+        with mock.patch('repositorio.models.sha256_de') as rehash:
+            response = self.client.post(self.url, {
+                'archivos': [SimpleUploadedFile('diagrama.png', contenido)],
+                'version': 'V2',
+            })
+        self.assertEqual(response.status_code, 200, response.content)
+        rehash.assert_not_called()
+        archivo = ArchivoProyecto.objects.get(proyecto=self.proyecto)
+        self.assertEqual(archivo.hash_sha256, hashlib.sha256(contenido).hexdigest())
+        self.assertEqual((archivo.size_bytes, archivo.tipo), (len(contenido), 'imagen'))
+        # Scanned by the job queue: an executable header behind an image extension.
+        self.assertEqual(response.json()['archivos'][0]['scan'], 'pending')
+        self.assertEqual(tareas.procesar_pendientes(), 2)  # escanear + miniaturas
+        archivo.refresh_from_db()
+        self.assertEqual(archivo.scan_status, 'suspicious')
+
+    def test_extension_no_permitida_corta_la_subida(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.post(self.url, {'archivos': [
+                SimpleUploadedFile('informe.pdf', b'%PDF'), SimpleUploadedFile('setup.exe', b'MZ'),
+            ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('setup.exe', response.json()['error'])
+        self.assertFalse(ArchivoProyecto.objects.exists())
+
+    def test_sigue_exigiendo_csrf(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        client.force_login(self.usuario)
+        with self.assertLogs('django.security.csrf', 'WARNING'):
+            response = client.post(self.url, {'archivos': [SimpleUploadedFile('a.pdf', b'%PDF')]})
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(REPOSITORIO_CHUNK_SIZE=4)
+class SubidaFragmentadaTests(MediaTemporalMixin, TestCase):
+    CONTENIDO = b'MZ modelo 3d grande'  # 19 bytes: chunks of 4, 4, 4, 4, 3
+
+    def setUp(self):
+        super().setUp()
+        self.usuario = get_user_model().objects.create_user('autor', password='x')
+        self.proyecto = crear_proyecto(subido_por=self.usuario)
+        self.client.force_login(self.usuario)
+
+    def iniciar(self, **extra):
+        data = {'nombre': 'escena.glb', 'tamano': len(self.CONTENIDO), 'version': 'FINAL', **extra}
+        response = self.client.post(reverse('repositorio:subida_iniciar', args=[self.proyecto.pk]), data)
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+    def enviar(self, subida_id, n):
+        chunk = self.CONTENIDO[n * 4:(n + 1) * 4]
+        return self.client.put(reverse('repositorio:subida_fragmento', args=[subida_id, n]), chunk,
+                               content_type='application/octet-stream',
+                               HTTP_X_CHUNK_SHA256=hashlib.sha256(chunk).hexdigest())
+
+    def test_bloqueo_huerfano_lo_toma_un_solo_worker(self):
+        subida = uploads.SubidaFragmentada(self.iniciar())
+        lock = os.path.join(subida.ruta, 'lock')
+        viejo = time.time() - uploads.LOCK_TIMEOUT - 1
+
+        a = subida._bloqueo()
+        a.__enter__()
+        os.utime(lock, (viejo, viejo))  # A looks dead
+        b = uploads.SubidaFragmentada(subida.id)._bloqueo()
+        b.__enter__()  # B takes over; nobody else can now
+        with self.assertRaises(uploads.SubidaError):
+            uploads.SubidaFragmentada(subida.id)._bloqueo().__enter__()
+        a.__exit__(None, None, None)  # A was only slow: it must not release B's lock
+        self.assertTrue(os.path.exists(lock))
+        b.__exit__(None, None, None)
+        self.assertEqual([n for n in os.listdir(subida.ruta) if n.startswith('lock')], [])
+
+    def test_bloqueo_renovado_entre_la_comprobacion_y_el_rename(self):
+        subida = uploads.SubidaFragmentada(self.iniciar())
+        lock = os.path.join(subida.ruta, 'lock')
+        open(lock, 'w').close()
+        inodo = os.stat(lock).st_ino
+        # The first check still saw the old mtime; the lock renamed away is live.
+        mtimes = iter([time.time() - uploads.LOCK_TIMEOUT - 1])
+        real = os.path.getmtime
+        with mock.patch('repositorio.uploads.os.path.getmtime',
+                        side_effect=lambda path: next(mtimes, None) or real(path)):
+            with self.assertRaises(uploads.SubidaError):
+                subida._bloqueo().__enter__()
+        self.assertEqual(os.stat(lock).st_ino, inodo)
+        self.assertEqual([n for n in os.listdir(subida.ruta) if n.startswith('lock')], ['lock'])
+
+    def test_reanuda_y_ensambla_sin_releer(self):
+        sha = hashlib.sha256(self.CONTENIDO).hexdigest()
+        subida_id = self.iniciar(sha256=sha)
+        for n in (0, 1):
+            self.assertEqual(self.enviar(subida_id, n).status_code, 200)
+        # Out of order: rejected with the chunk to resume from.
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.enviar(subida_id, 3)
+        self.assertEqual((response.status_code, response.json()['recibidos']), (409, 2))
+        # A chunk resent after a lost response is acknowledged again.
+        self.assertEqual(self.enviar(subida_id, 1).status_code, 200)
+        estado = self.client.get(reverse('repositorio:subida_estado', args=[subida_id])).json()
+        self.assertEqual((estado['recibidos'], estado['total']), (2, 5))
+
+        for n in (2, 3, 4):
+            self.enviar(subida_id, n)
+        with mock.patch.object(uploads.SubidaFragmentada, '_hash_del_disco') as releer:
+            response = self.client.post(reverse('repositorio:subida_completar', args=[subida_id]))
+        self.assertEqual(response.status_code, 200, response.content)
+        releer.assert_not_called()
+
+        archivo = ArchivoProyecto.objects.get(proyecto=self.proyecto)
+        self.assertEqual((archivo.hash_sha256, archivo.size_bytes), (sha, len(self.CONTENIDO)))
+        self.assertEqual((archivo.tipo, archivo.version_label), ('modelo_3d', 'FINAL'))
+        with archivo.archivo.open('rb') as f:
+            self.assertEqual(f.read(), self.CONTENIDO)
+        self.assertFalse(os.listdir(os.path.join(self.media.name, uploads.DIRECTORIO)))
+
+    def test_otro_worker_rehashea_el_prefijo(self):
+        subida_id = self.iniciar()
+        for n in range(5):
+            self.enviar(subida_id, n)
+        uploads._hashes.clear()  # as if the last chunk landed on another process
+        with mock.patch.object(uploads.SubidaFragmentada, '_hash_del_disco',
+                               autospec=True, side_effect=uploads.SubidaFragmentada._hash_del_disco) as releer:
+            response = self.client.post(reverse('repositorio:subida_completar', args=[subida_id]))
+        self.assertEqual(response.status_code, 200)
+        releer.assert_called_once()
+        self.assertEqual(ArchivoProyecto.objects.get().hash_sha256,
+                         hashlib.sha256(self.CONTENIDO).hexdigest())
+
+    def test_fragmento_alterado_y_hash_final(self):
+        subida_id = self.iniciar(sha256='0' * 64)
+        url = reverse('repositorio:subida_fragmento', args=[subida_id, 0])
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.put(url, b'MZ m', content_type='application/octet-stream',
+                                       HTTP_X_CHUNK_SHA256='f' * 64)
+        self.assertEqual((response.status_code, response.json()['recibidos']), (400, 0))
+        for n in range(5):
+            self.assertEqual(self.enviar(subida_id, n).status_code, 200)
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.post(reverse('repositorio:subida_completar', args=[subida_id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ArchivoProyecto.objects.exists())
+
+    def test_solo_el_duenio_y_extensiones_permitidas(self):
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.post(reverse('repositorio:subida_iniciar', args=[self.proyecto.pk]),
+                                        {'nombre': 'setup.exe', 'tamano': 10})
+        self.assertEqual(response.status_code, 400)
+        subida_id = self.iniciar()
+        self.client.force_login(get_user_model().objects.create_user('otro', password='x'))
+        with self.assertLogs('django.request', 'WARNING'):
+            response = self.client.get(reverse('repositorio:subida_estado', args=[subida_id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class VistaPreviaCodigoTests(MediaTemporalMixin, TestCase):
+    CODIGO = b''.join(b'def f%d(x):\n    return x * %d\n' % (i, i) for i in range(10))
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.proyecto = crear_proyecto(carrera='software')
+
+    def _archivo(self, contenido, nombre='main.py', proyecto=None):
+        return ArchivoProyecto.objects.create(
+            proyecto=proyecto or self.proyecto, nombre_original=nombre, tipo='codigo',
+            archivo=SimpleUploadedFile(nombre, contenido),
+        )
+
+    def test_detalle_resalta_y_cachea_por_hash(self):
+        self._archivo(self.CODIGO)
+        response = self.client.get(reverse('repositorio:detalle', args=[self.proyecto.pk]))
+        preview = response.context['code_preview']
+        self.assertIn('codehilite', preview['html'])
+        self.assertIn('f9', preview['html'])
+        self.assertEqual((preview['lineas'], preview['truncado']), (20, False))
+        self.assertContains(response, '.codehilite')
+
+        # Same content in another project: served from the cache, not rendered again.
+        copia = self._archivo(self.CODIGO, 'copia.py', crear_proyecto())
+        with mock.patch('repositorio.previews.renderizar') as renderizar:
+            self.assertEqual(previews.vista_previa(copia), preview)
+        renderizar.assert_not_called()
+
+    @override_settings(REPOSITORIO_PREVIEW_MAX_LINES=3)
+    def test_prefijo_acotado_con_y_sin_mmap(self):
+        archivo = self._archivo(self.CODIGO)
+        datos, truncado = previews.leer_prefijo(archivo.archivo)
+        self.assertEqual((datos, truncado), (b'def f0(x):\n    return x * 0\ndef f1(x):\n', True))
+        with mock.patch.object(previews, 'MMAP_MIN', 0):
+            self.assertEqual(previews.leer_prefijo(archivo.archivo), (datos, True))
+        with override_settings(REPOSITORIO_PREVIEW_MAX_BYTES=15):
+            self.assertEqual(previews.leer_prefijo(archivo.archivo)[0], b'def f0(x):\n')
+
+    def test_binario_sin_vista_previa(self):
+        archivo = self._archivo(b'\x00\x01ELF', 'programa.c')
+        self.assertEqual(previews.vista_previa(archivo)['html'], '')
+
+
+def zip_con(miembros):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for ruta, contenido in miembros.items():
+            zf.writestr(ruta, contenido)
+    return buffer.getvalue()
+
+
+class ComprimidosTests(MediaTemporalMixin, TestCase):
+    MIEMBROS = {
+        'README.md': b'# Proyecto\n',
+        'src/app.py': b'print("hola")\n' * 200,
+        'src/util/fechas.py': b'import datetime\n',
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.proyecto = crear_proyecto()
+
+    def _archivo(self, nombre, contenido):
+        archivo = ArchivoProyecto.objects.create(
+            proyecto=self.proyecto, nombre_original=nombre, tipo='comprimido',
+            archivo=SimpleUploadedFile(nombre, contenido),
+        )
+        tareas.encolar(archivo)
+        tareas.procesar_pendientes()
+        return archivo
+
+    def test_indice_zip_y_arbol(self):
+        archivo = self._archivo('entrega.zip', zip_con(self.MIEMBROS))
+        miembros = {m.ruta: m for m in archivo.miembros.all()}
+        self.assertEqual(set(miembros), set(self.MIEMBROS))
+        self.assertEqual(miembros['src/app.py'].tamano, len(self.MIEMBROS['src/app.py']))
+        self.assertLess(miembros['src/app.py'].tamano_comprimido, miembros['src/app.py'].tamano)
+
+        url = reverse('repositorio:contenido_comprimido', args=[archivo.pk])
+        raiz = self.client.get(url).json()
+        self.assertEqual(raiz['directorios'], [{'nombre': 'src', 'archivos': 2}])
+        self.assertEqual([a['ruta'] for a in raiz['archivos']], ['README.md'])
+        src = self.client.get(url, {'dir': 'src/'}).json()
+        self.assertEqual(src['dir'], 'src')
+        self.assertEqual([a['nombre'] for a in src['archivos']], ['app.py'])
+        self.assertEqual(src['directorios'], [{'nombre': 'util', 'archivos': 1}])
+        self.assertEqual(miembros['src/util/fechas.py'].directorio, 'src/util')
+        # Files of the level plus one COUNT per directory below it.
+        with self.assertNumQueries(2):
+            self.assertEqual(comprimidos.listar_directorio(archivo, 'src/util')[0], [])
+
+        # Same content uploaded again: the index is copied, the archive not re-read.
+        with mock.patch('repositorio.comprimidos.listar') as listar:
+            copia = self._archivo('copia.zip', zip_con(self.MIEMBROS))
+        listar.assert_not_called()
+        self.assertEqual(copia.miembros.count(), 3)
+        self.assertEqual(copia.miembros.get(ruta='src/app.py').directorio, 'src')
+
+    def test_descarga_de_un_miembro_sin_extraer(self):
+        archivo = self._archivo('entrega.zip', zip_con(self.MIEMBROS))
+        url = reverse('repositorio:descargar_miembro', args=[archivo.pk])
+        self.client.force_login(get_user_model().objects.create_user('lector', password='x'))
+        response = self.client.get(url, {'ruta': 'src/util/fechas.py'})
+        self.assertEqual(b''.join(response.streaming_content), b'import datetime\n')
+        self.assertEqual(response['Content-Length'], '16')
+        self.assertIn('fechas.py', response['Content-Disposition'])
+        with self.assertLogs('django.request', 'WARNING'):
+            self.assertEqual(self.client.get(url, {'ruta': 'no/existe.py'}).status_code, 404)
+
+    def test_tar_gz_y_gz(self):
+        buffer = BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tf:
+            for ruta, contenido in self.MIEMBROS.items():
+                info = tarfile.TarInfo(ruta)
+                info.size = len(contenido)
+                tf.addfile(info, BytesIO(contenido))
+        archivo = self._archivo('entrega.tar.gz', buffer.getvalue())
+        self.assertEqual(archivo.miembros.count(), 3)
+        stream = comprimidos.abrir_miembro(archivo, 'src/util/fechas.py')
+        self.addCleanup(stream.close)
+        self.assertEqual(stream.read(), b'import datetime\n')
+
+        datos = b'linea\n' * 1000
+        gz = self._archivo('datos.csv.gz', gzip.compress(datos))
+        miembro = gz.miembros.get()
+        self.assertEqual((miembro.ruta, miembro.tamano), ('datos.csv', len(datos)))
+
+    def test_archivo_corrupto_no_falla_la_tarea(self):
+        with self.assertLogs('repositorio.comprimidos', 'WARNING'):
+            archivo = self._archivo('roto.zip', b'PK no es un zip')
+        self.assertEqual(archivo.miembros.count(), 0)
+        self.assertEqual(archivo.tareas.get(tipo='indice_comprimido').estado, 'completada')
+
+
+class TareasTests(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.archivo = ArchivoProyecto.objects.create(
+            proyecto=crear_proyecto(), nombre_original='informe.pdf',
+            archivo=SimpleUploadedFile('informe.pdf', b'%PDF-1.4'),
+        )
+        handlers = mock.patch.dict(tareas.HANDLERS)
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def test_escaneo_en_cola(self):
+        tareas.encolar(self.archivo)
+        tarea = TareaProcesamiento.objects.get(archivo=self.archivo, tipo='escanear')
+        self.assertEqual(tareas.procesar_pendientes(), 1)
+        tarea.refresh_from_db()
+        self.archivo.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('completada', 1))
+        self.assertEqual(self.archivo.scan_status, 'clean')
+
+    def test_reintentos_con_espera_y_fallo_final(self):
+        tareas.HANDLERS.clear()
+        falla = mock.Mock(side_effect=RuntimeError('conversor caido'))
+        tareas.tarea('miniatura', max_intentos=2)(falla)
+        tareas.encolar(self.archivo)
+        tarea = TareaProcesamiento.objects.get()
+
+        with self.assertLogs('repositorio.tareas', 'ERROR'):
+            self.assertEqual(tareas.procesar_pendientes(), 1)
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('pendiente', 1))
+        self.assertGreater(tarea.disponible_en, timezone.now())
+        self.assertIn('conversor caido', tarea.error)
+        # Backing off: nothing runnable yet.
+        self.assertEqual(tareas.procesar_pendientes(), 0)
+
+        TareaProcesamiento.objects.update(disponible_en=timezone.now())
+        with self.assertLogs('repositorio.tareas', 'ERROR'):
+            tareas.procesar_pendientes()
+        tarea.refresh_from_db()
+        self.assertEqual((tarea.estado, tarea.intentos), ('fallida', 2))
+        self.assertEqual(falla.call_count, 2)
+
+    def test_concurrencia_por_tipo_y_reserva_vencida(self):
+        tareas.HANDLERS.clear()
+        tareas.tarea('miniatura', concurrencia=1)(mock.Mock())
+        TareaProcesamiento.objects.bulk_create(
+            [TareaProcesamiento(tipo='miniatura', archivo=self.archivo) for _ in range(3)])
+
+        reservadas = tareas.reservar(3)
+        self.assertEqual(len(reservadas), 1)
+        self.assertEqual(tareas.reservar(3), [])
+        # The worker holding it died: once the lease expires the job is claimed again.
+        TareaProcesamiento.objects.filter(pk=reservadas[0].pk).update(
+            bloqueada_hasta=timezone.now() - timedelta(seconds=1))
+        otra = tareas.reservar(3)
+        self.assertEqual([t.pk for t in otra], [reservadas[0].pk])
+        self.assertEqual(otra[0].intentos, 2)
+
+        # It died again on its last attempt: failed, and the next job runs instead.
+        TareaProcesamiento.objects.filter(pk=otra[0].pk).update(
+            max_intentos=2, bloqueada_hasta=timezone.now() - timedelta(seconds=1))
+        siguiente = tareas.reservar(3)
+        self.assertEqual(len(siguiente), 1)
+        self.assertNotEqual(siguiente[0].pk, otra[0].pk)
+        fallida = TareaProcesamiento.objects.get(pk=otra[0].pk)
+        self.assertEqual((fallida.estado, fallida.intentos), ('fallida', 2))
+        self.assertIn('reserva vencio', fallida.error)
+
+
+def png(ancho, alto):
+    buffer = BytesIO()
+    Image.new('RGBA', (ancho, alto), (200, 40, 40, 128)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class VariantesImagenTests(MediaTemporalMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.proyecto = crear_proyecto()
+
+    def _archivo(self, nombre='captura.png', contenido=None):
+        return ArchivoProyecto.objects.create(
+            proyecto=self.proyecto, nombre_original=nombre, tipo='imagen',
+            archivo=SimpleUploadedFile(nombre, contenido or png(800, 400)),
+        )
+
+    def test_variantes_de_archivo_por_la_cola(self):
+        archivo = self._archivo()
+        tareas.encolar(archivo)
+        self.assertTrue(TareaProcesamiento.objects.filter(tipo='miniaturas').exists())
+        tareas.procesar_pendientes()
+        archivo.refresh_from_db()
+        # Only widths narrower than the 800px original.
+        self.assertEqual(archivo.variantes, [320, 640])
+        for ext in ('webp', 'jpg'):
+            with archivo.archivo.storage.open(
+                    imagenes.variante_name(archivo.archivo.name, 320, ext)) as f:
+                self.assertEqual(Image.open(f).size, (320, 160))
+
+        html = Template('{% load repositorio_imagenes %}'
+                        '{% imagen_responsive a.archivo a.variantes alt="x" %}').render(
+            Context({'a': archivo}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('.w640.jpg 640w', html)
+
+    def test_thumbnail_del_proyecto_y_borrado_con_el_blob(self):
+        self.proyecto.thumbnail = SimpleUploadedFile('portada.png', png(700, 700))
+        self.proyecto.save()
+        tareas.procesar_pendientes()
+        self.proyecto.refresh_from_db()
+        self.assertEqual(self.proyecto.thumbnail_variantes, [320, 640])
+
+        archivo = self._archivo()
+        tareas.encolar(archivo)
+        tareas.procesar_pendientes()
+        variante = archivo.archivo.storage.path(
+            imagenes.variante_name(archivo.archivo.name, 320, 'webp'))
+        self.assertTrue(os.path.exists(variante))
+        with override_settings(REPOSITORIO_BLOB_GRACE_SECONDS=0), \
+                self.captureOnCommitCallbacks(execute=True):
+            archivo.delete()
+        self.assertFalse(os.path.exists(variante))
+
+    def test_reemplazar_thumbnail_borra_sus_variantes(self):
+        self.proyecto.thumbnail = SimpleUploadedFile('portada.png', png(700, 700))
+        self.proyecto.save()
+        tareas.procesar_pendientes()
+        storage_ = self.proyecto.thumbnail.storage
+        viejas = [imagenes.variante_name(self.proyecto.thumbnail.name, ancho, ext)
+                  for ancho in (320, 640) for ext in ('webp', 'jpg')]
+        self.assertTrue(all(storage_.exists(v) for v in viejas))
+
+        self.proyecto.thumbnail = SimpleUploadedFile('nueva.png', png(400, 400))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.proyecto.save()
+        self.assertFalse(any(storage_.exists(v) for v in viejas))
+        tareas.procesar_pendientes()
+        self.proyecto.refresh_from_db()
+        self.assertEqual(self.proyecto.thumbnail_variantes, [320])
+
+    def test_jpeg_grande_y_bomba_de_descompresion(self):
+        buffer = BytesIO()
+        Image.new('RGB', (4000, 2000), (10, 120, 200)).save(buffer, 'JPEG')
+        archivo = self._archivo('foto.jpg', buffer.getvalue())
+        storage_ = archivo.archivo.storage
+        self.assertEqual(imagenes.generar_variantes(storage_, archivo.archivo.name),
+                         [320, 640, 1280])
+        with storage_.open(imagenes.variante_name(archivo.archivo.name, 1280, 'jpg')) as f:
+            self.assertEqual(Image.open(f).size, (1280, 640))
+
+        bomba = self._archivo('bomba.png', png(800, 400))
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000):
+            self.assertEqual(imagenes.generar_variantes(storage_, bomba.archivo.name), [])
+
+    def test_comando_rellena_imagenes_existentes(self):
+        archivo = self._archivo()
+        pequeno = self._archivo('icono.png', png(100, 100))
+        TareaProcesamiento.objects.all().delete()
+        salida = StringIO()
+        call_command('generar_variantes', procesos=1, stdout=salida)
+        archivo.refresh_from_db()
+        pequeno.refresh_from_db()
+        self.assertEqual((archivo.variantes, pequeno.variantes), ([320, 640], []))
+        self.assertIn('2 imagen(es) procesadas, 1 con variantes', salida.getvalue())
+
+
+class RelacionadosTests(TestCase):
+    def setUp(self):
+        self.tags = {n: TagHabilidad.objects.create(nombre=n, slug=n.lower())
+                     for n in ('Django', 'React', 'Arduino')}
+        self.base = self.crear('Inventario web', 'Sistema de inventario con Django y PostgreSQL.',
+                               'Django')
+        self.texto = self.crear('Inventario para bodegas', 'Control de inventario y bodegas.')
+        self.tag = self.crear('Portal de empleo', 'Bolsa de trabajo regional.', 'Django',
+                              carrera='multimedia')
+        self.nada = self.crear('Riego automatico', 'Sensores de humedad con microcontrolador.',
+                               'Arduino')
+        self.borrador = self.crear('Inventario de bodegas web', 'Inventario con Django.', 'Django',
+                                   estado=ProyectoGrado.EstadoProyecto.BORRADOR)
+
+    def crear(self, titulo, descripcion, *tags, **kwargs):
+        proyecto = crear_proyecto(titulo=titulo, descripcion=descripcion, **kwargs)
+        proyecto.tags.set([self.tags[t] for t in tags])
+        return proyecto
+
+    def test_tags_texto_y_codescargas(self):
+        recalcular_relacionados()
+        relacionados = relacionados_de(self.base)
+        self.assertCountEqual(relacionados[:2], [self.texto, self.tag])
+        self.assertNotIn(self.nada, relacionados)
+        self.assertNotIn(self.borrador, relacionados)
+
+        # Users who downloaded both projects pull them together.
+        archivo = ArchivoProyecto.objects.create(proyecto=self.nada, archivo='x/a.ino',
+                                                 nombre_original='a.ino')
+        archivo_base = ArchivoProyecto.objects.create(proyecto=self.base, archivo='x/b.py',
+                                                      nombre_original='b.py')
+        for nombre in ('u1', 'u2'):
+            usuario = get_user_model().objects.create_user(nombre, password='x')
+            RegistroDescarga.objects.bulk_create([
+                RegistroDescarga(archivo=archivo, usuario=usuario),
+                RegistroDescarga(archivo=archivo_base, usuario=usuario),
+            ])
+        recalcular_relacionados()
+        self.assertIn(self.nada, relacionados_de(self.base))
+
+    def test_por_bloques_igual_que_de_una_vez(self):
+        def filas():
+            return list(ProyectoRelacionado.objects.order_by('proyecto', 'posicion')
+                        .values_list('proyecto', 'relacionado', 'posicion'))
+
+        recalcular_relacionados()
+        completo = filas()
+        with mock.patch.object(recomendaciones, 'BLOQUE', 2):
+            recalcular_relacionados()
+        self.assertEqual(filas(), completo)
+        self.assertFalse(ProyectoRelacionado.objects.filter(proyecto=F('relacionado')).exists())
+
+        ProyectoGrado.objects.update(estado=ProyectoGrado.EstadoProyecto.BORRADOR)
+        self.assertEqual(recalcular_relacionados(), 0)
+
+    def test_detalle_lee_la_tabla_y_cae_a_la_carrera(self):
+        otro = crear_proyecto(titulo='Sin relacion alguna', votos=5)
+        response = self.client.get(reverse('repositorio:detalle', args=[self.base.pk]))
+        # Nothing precomputed yet: same career, most voted first.
+        self.assertEqual(response.context['related'][0], otro)
+
+        call_command('rebuild_relacionados', stdout=StringIO())
+        with self.assertNumQueries(1):
+            relacionados = relacionados_de(self.base)
+        self.assertIn(self.texto, relacionados)
+        self.assertNotIn(otro, relacionados)
+        self.texto.estado = ProyectoGrado.EstadoProyecto.RECHAZADO
+        self.texto.save()
+        self.assertNotIn(self.texto, relacionados_de(self.base))
+
+
+class SugerenciasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        suggest._indice = None
+        crear_proyecto(titulo='Sistema de Inventario', autor='Andrés Gómez', votos=3)
+        crear_proyecto(titulo='Inventario de bodega', autor='Ana Torres')
+        TagHabilidad.objects.create(nombre='Python', slug='python')
+        self.url = reverse('repositorio:sugerencias')
+
+    def textos(self, q):
+        return [r['texto'] for r in self.client.get(self.url, {'q': q}).json()['resultados']]
+
+    def test_prefijo_por_palabra_y_sin_tildes(self):
+        indice = PrefixIndex([{'texto': 'Sistema de Inventario'}, {'texto': 'Diseño Gráfico'}])
+        self.assertEqual([e['texto'] for e in indice.buscar('inv')], ['Sistema de Inventario'])
+        self.assertEqual([e['texto'] for e in indice.buscar('diseno gra')], ['Diseño Gráfico'])
+        self.assertEqual(indice.buscar('i'), [])
+
+    def test_endpoint_sin_base_de_datos(self):
+        self.assertEqual(self.textos('inv'), ['Inventario de bodega', 'Sistema de Inventario'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.textos('andres'), ['Andrés Gómez'])
+            self.assertEqual(self.textos('pyt'), ['Python'])
+
+    def test_publicar_refresca_indice(self):
+        self.assertEqual(self.textos('robot'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_proyecto(titulo='Robot seguidor de linea')
+        self.assertEqual(self.textos('robot'), ['Robot seguidor de linea'])
+
+    def test_cambio_hecho_por_otro_worker(self):
+        self.assertEqual(self.textos('robot'), [])
+        # Another process commits the project and its bump; this worker only
+        # notices through the database generation once REVISION has passed.
+        with mock.patch.object(transaction, 'on_commit'):
+            crear_proyecto(titulo='Robot seguidor de linea')
+        self.assertEqual(self.textos('robot'), [])
+        with mock.patch.object(suggest, 'REVISION', 0):
+            self.assertEqual(self.textos('robot'), ['Robot seguidor de linea'])
+
+
+class PlanesConsultaTests(TestCase):
+    """EXPLAIN QUERY PLAN of the repositorio hot queries: no table may be fully scanned."""
+
+    FULL_SCAN = re.compile(r'\bSCAN (?!\w+ VIRTUAL TABLE)\w+')
+
+    def hot_queries(self):
+        publicados = ProyectoGrado.objects.filter(estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
+        ahora = timezone.now().isoformat()
+        queries = {}
+        for sort in SORT_KEYS:
+            queries[f'explorador {sort}'] = keyset_queryset(publicados, sort, None)[:61]
+        queries['explorador cursor'] = keyset_queryset(publicados, 'recientes', [ahora, 10])[:61]
+        queries['explorador carrera'] = keyset_queryset(
+            publicados.filter(carrera='software'), 'populares', [3, 10])[:61]
+        queries['explorador cluster'] = keyset_queryset(
+            publicados.filter(cluster='TICS'), 'recientes', None)[:61]
+        queries['explorador tipo'] = keyset_queryset(
+            publicados.filter(preview_type='CODE'), 'recientes', [ahora, 10])[:61]
+        queries['explorador anio'] = keyset_queryset(publicados.filter(anio=2025), 'recientes', None)[:61]
+        queries['explorador busqueda'] = get_search_backend().search(publicados, 'python')
+        queries['facetas'] = (publicados.order_by().values_list('carrera', 'anio')
+                              .annotate(c=Count('id', distinct=True)))
+        queries['relacionados'] = (ProyectoGrado.objects
+                                   .filter(relacionado_con__proyecto=1, estado='publicado')
+                                   .order_by('relacionado_con__posicion')[:4])
+        queries['relacionados por carrera'] = (
+            ProyectoGrado.objects
+            .filter(carrera='software', estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
+            .exclude(pk=1).order_by('-votos')[:4])
+        queries['archivos'] = ArchivoProyecto.objects.filter(proyecto_id=1)
+        queries['archivos por tipo'] = ArchivoProyecto.objects.filter(proyecto_id=1, tipo='imagen')
+        queries['descargas por archivo'] = RegistroDescarga.objects.filter(archivo_id=1)
+        queries['descargas por usuario'] = RegistroDescarga.objects.filter(usuario_id=1)
+        return queries
+
+    def test_sin_full_scans(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN format is SQLite specific')
+        reset_search_backend()
+        for nombre, qs in self.hot_queries().items():
+            plan = qs.explain()
+            self.assertIsNone(self.FULL_SCAN.search(plan), f'{nombre}:\n{plan}')
@@ -0,0 +1,337 @@
+"""
+OASIS Repositorio — Streaming and resumable uploads for project files.
+
+``HashingUploadHandler`` replaces Django's memory/temp-file handlers on
+``subir_archivos``. Every chunk of the multipart body is written straight to a
+temporary file on disk while the SHA-256 and size are updated, so each byte is
+read once and memory use does not depend on the file size. The resulting
+TemporaryUploadedFile carries:
+
+  - ``sha256``: hex digest, used by the content-addressed upload path instead
+    of hashing the file again.
+  - ``tipo``: ArchivoProyecto tipo from the extension.
+
+A file whose extension is not in ALLOWED_EXTENSIONS stops the upload as soon
+as its part header is parsed, before the rest of the body is read; the view
+finds the name in ``request.upload_rechazado`` and answers 400.
+
+Large files can instead go through the resumable chunked protocol below
+(``SubidaFragmentada``), which survives dropped connections.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+from .models import ALLOWED_EXTENSIONS, EXTENSION_MAP
+
+
+def extension_de(nombre):
+    return nombre.rsplit('.', 1)[-1].lower() if '.' in nombre else ''
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Streams each file to disk, hashing it on the way."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        extension = extension_de(self.file_name)
+        if extension not in ALLOWED_EXTENSIONS:
+            self.request.upload_rechazado = self.file_name
+            raise StopUpload(connection_reset=True)
+        self.sha256 = hashlib.sha256()
+        self.tipo = EXTENSION_MAP.get(extension, ('otro',))[0]
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0,
+                                          self.charset, self.content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.sha256.hexdigest()
+        self.file.tipo = self.tipo
+        return self.file
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()  # deletes the temporary file
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# RESUMABLE CHUNKED UPLOADS
+# ═══════════════════════════════════════════════════════════════════════════
+#
+# Protocol (views ``subida_*``):
+#   1. POST proyecto/<pk>/subidas/  nombre, tamano[, sha256, version]
+#      -> {id, chunk_size, recibidos}
+#   2. PUT subidas/<id>/<n>/  raw bytes of chunk n (every chunk is chunk_size
+#      bytes except the last). Optional X-Chunk-SHA256 header. Chunks are
+#      appended in order; a chunk already received is acknowledged again.
+#   3. GET subidas/<id>/ -> {recibidos, ...}: where to resume after a drop.
+#   4. POST subidas/<id>/completar/ -> creates the ArchivoProyecto.
+#
+# State lives on disk under MEDIA_ROOT/repositorio/subidas/<id>/ (estado.json
+# plus the file being assembled), so any worker or replica can take the next
+# chunk. The SHA-256 of the whole file is advanced chunk by chunk: the worker
+# that received the previous chunk keeps the running hash in memory, and only
+# a worker that did not (restart, another replica) re-reads the prefix once.
+
+DIRECTORIO = os.path.join('repositorio', 'subidas')
+BLOQUE = 64 * 1024
+LOCK_TIMEOUT = 120  # seconds before a lock left by a dead worker is taken over
+_ID_VALIDO = re.compile(r'^[0-9a-f]{32}$')
+
+# {subida id: (offset, running sha256)} for uploads this process has seen.
+_hashes = {}
+
+
+class SubidaError(Exception):
+    """Protocol error answered with ``status``."""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+class ArchivoEnsamblado(File):
+    """The assembled file; storage moves it into place instead of copying it."""
+
+    def __init__(self, path, nombre, sha256, tipo):
+        super().__init__(open(path, 'rb'), name=nombre)
+        self.path = path
+        self.sha256 = sha256
+        self.tipo = tipo
+
+    def temporary_file_path(self):
+        return self.path
+
+
+class SubidaFragmentada:
+    """One resumable upload, backed by its directory on disk."""
+
+    def __init__(self, subida_id):
+        self.id = subida_id
+        self.ruta = os.path.join(settings.MEDIA_ROOT, DIRECTORIO, subida_id)
+        self.datos = os.path.join(self.ruta, 'datos')
+        self._estado_path = os.path.join(self.ruta, 'estado.json')
+        self.estado = None
+
+    @classmethod
+    def crear(cls, proyecto_id, usuario_id, nombre, tamano, sha256='', version=''):
+        if extension_de(nombre) not in ALLOWED_EXTENSIONS:
+            raise SubidaError(f'Tipo de archivo no permitido: {nombre}')
+        if not 0 < tamano <= settings.REPOSITORIO_CHUNK_UPLOAD_MAX_SIZE:
+            raise SubidaError('Tamano de archivo no valido.')
+        subida = cls(uuid.uuid4().hex)
+        os.makedirs(subida.ruta)
+        open(subida.datos, 'wb').close()
+        subida.estado = {
+            'proyecto': proyecto_id, 'usuario': usuario_id, 'nombre': nombre,
+            'tamano': tamano, 'sha256': sha256.lower(), 'version': version,
+            'chunk_size': settings.REPOSITORIO_CHUNK_SIZE, 'recibidos': 0,
+        }
+        subida._guardar_estado()
+        _hashes[subida.id] = (0, hashlib.sha256())
+        return subida
+
+    @classmethod
+    def cargar(cls, subida_id):
+        subida = cls(subida_id)
+        try:
+            if not _ID_VALIDO.match(subida_id):
+                raise FileNotFoundError
+            with open(subida._estado_path) as f:
+                subida.estado = json.load(f)
+        except FileNotFoundError:
+            raise SubidaError('Subida no encontrada.', status=404)
+        return subida
+
+    @property
+    def total_chunks(self):
+        return -(-self.estado['tamano'] // self.estado['chunk_size'])
+
+    def resumen(self):
+        return {
+            'id': self.id, 'nombre': self.estado['nombre'], 'tamano': self.estado['tamano'],
+            'chunk_size': self.estado['chunk_size'], 'recibidos': self.estado['recibidos'],
+            'total': self.total_chunks,
+        }
+
+    def recibir(self, numero, stream, longitud, sha256_chunk=''):
+        """Appends chunk ``numero`` read from ``stream`` (``longitud`` bytes)."""
+        with self._bloqueo():
+            self.estado = self.cargar(self.id).estado
+            recibidos, chunk_size = self.estado['recibidos'], self.estado['chunk_size']
+            if numero < recibidos:
+                return  # resent after a lost response
+            if numero != recibidos or numero >= self.total_chunks:
+                raise SubidaError(f'Se esperaba el fragmento {recibidos}.', status=409)
+            offset = numero * chunk_size
+            esperado = min(chunk_size, self.estado['tamano'] - offset)
+            if longitud != esperado:
+                raise SubidaError(f'El fragmento {numero} debe tener {esperado} bytes.')
+
+            total = self._hash_en(offset).copy()
+            parcial = hashlib.sha256()
+            with open(self.datos, 'r+b') as f:
+                # Drop whatever an interrupted write left past the last chunk.
+                f.seek(offset)
+                f.truncate()
+                restante = longitud
+                while restante:
+                    bloque = stream.read(min(BLOQUE, restante))
+                    if not bloque:
+                        break
+                    total.update(bloque)
+                    parcial.update(bloque)
+                    f.write(bloque)
+                    restante -= len(bloque)
+                if restante or (sha256_chunk and parcial.hexdigest() != sha256_chunk.lower()):
+                    f.truncate(offset)
+                    raise SubidaError(f'El fragmento {numero} llego incompleto o alterado.')
+
+            self.estado['recibidos'] = numero + 1
+            self._guardar_estado()
+            _hashes[self.id] = (offset + longitud, total)
+
+    def completar(self, guardar):
+        """
+        Checks size and hash, passes the ArchivoEnsamblado to ``guardar`` and
+        removes the upload. Returns what ``guardar`` returns.
+        """
+        with self._bloqueo():
+            self.estado = self.cargar(self.id).estado
+            if self.estado['recibidos'] != self.total_chunks:
+                raise SubidaError(f"Faltan fragmentos: {self.estado['recibidos']} de "
+                                  f"{self.total_chunks}.", status=409)
+            sha256 = self._hash_en(self.estado['tamano']).hexdigest()
+            if self.estado['sha256'] and sha256 != self.estado['sha256']:
+                raise SubidaError('El hash SHA-256 del archivo no coincide.')
+            nombre = self.estado['nombre']
+            archivo = ArchivoEnsamblado(
+                self.datos, nombre, sha256,
+                tipo=EXTENSION_MAP.get(extension_de(nombre), ('otro',))[0],
+            )
+            with archivo:
+                resultado = guardar(archivo)
+            self.descartar()
+        return resultado
+
+    def descartar(self):
+        _hashes.pop(self.id, None)
+        shutil.rmtree(self.ruta, ignore_errors=True)
+
+    def _hash_en(self, offset):
+        """Running SHA-256 of the first ``offset`` bytes of the file."""
+        guardado = _hashes.get(self.id)
+        if not guardado or guardado[0] != offset:
+            # This process did not see the previous chunk: hash the prefix once.
+            guardado = (offset, self._hash_del_disco(offset))
+            _hashes[self.id] = guardado
+        return guardado[1]
+
+    def _hash_del_disco(self, offset):
+        sha256, restante = hashlib.sha256(), offset
+        with open(self.datos, 'rb') as f:
+            while restante:
+                bloque = f.read(min(BLOQUE, restante))
+                if not bloque:
+                    break
+                sha256.update(bloque)
+                restante -= len(bloque)
+        return sha256
+
+    def _guardar_estado(self):
+        temporal = f'{self._estado_path}.tmp'
+        with open(temporal, 'w') as f:
+            json.dump(self.estado, f)
+        os.replace(temporal, self._estado_path)
+
+    @contextmanager
+    def _bloqueo(self):
+        """Exclusive per-upload lock file shared by every worker and replica."""
+        path = os.path.join(self.ruta, 'lock')
+        try:
+            fd = self._tomar_bloqueo(path)
+        except FileNotFoundError:
+            raise SubidaError('Subida no encontrada.', status=404)
+        try:
+            yield
+        finally:
+            propio = os.fstat(fd).st_ino
+            os.close(fd)
+            try:
+                # Only if still ours: past LOCK_TIMEOUT another worker may own it.
+                if os.stat(path).st_ino == propio:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _tomar_bloqueo(path):
+        ocupada = SubidaError('Hay otro fragmento en curso para esta subida.', status=409)
+        try:
+            return os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            pass
+        try:
+            huerfano = time.time() - os.path.getmtime(path) > LOCK_TIMEOUT
+        except FileNotFoundError:
+            huerfano = False
+        if not huerfano:
+            raise ocupada
+        # Take over by renaming the stale lock to a unique name: of the workers
+        # that saw it stale, only one rename succeeds.
+        apartado = f'{path}.{uuid.uuid4().hex}'
+        try:
+            os.rename(path, apartado)
+        except FileNotFoundError:
+            raise ocupada
+        try:
+            if time.time() - os.path.getmtime(apartado) <= LOCK_TIMEOUT:
+                # Taken over and recreated between the check and the rename:
+                # that was a live lock, put it back.
+                try:
+                    os.link(apartado, path)
+                except FileExistsError:
+                    pass
+                raise ocupada
+        finally:
+            os.remove(apartado)
+        try:
+            return os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise ocupada
+
+
+def limpiar_subidas(max_edad=None):
+    """Removes partial uploads idle for more than ``max_edad`` seconds. Returns how many."""
+    if max_edad is None:
+        max_edad = settings.REPOSITORIO_CHUNK_UPLOAD_TTL
+    raiz = os.path.join(settings.MEDIA_ROOT, DIRECTORIO)
+    if not os.path.isdir(raiz):
+        return 0
+    borradas = 0
+    for subida_id in os.listdir(raiz):
+        subida = SubidaFragmentada(subida_id)
+        try:
+            inactiva = time.time() - os.path.getmtime(subida._estado_path) > max_edad
+        except FileNotFoundError:
+            inactiva = time.time() - os.path.getmtime(subida.ruta) > max_edad
+        if inactiva:
+            subida.descartar()
+            borradas += 1
+    return borradas
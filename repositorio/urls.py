@@ -5,8 +5,15 @@ app_name = 'repositorio'
 
 urlpatterns = [
     path('', views.explorador, name='explorador'),
+    path('sugerencias/', views.sugerencias, name='sugerencias'),
     path('proyecto/<int:pk>/', views.proyecto_detalle, name='detalle'),
     path('proyecto/<int:pk>/votar/', views.votar_proyecto, name='votar'),
     path('descargar/<int:archivo_id>/', views.descargar_archivo, name='descargar'),
+    path('archivo/<int:archivo_id>/contenido/', views.contenido_comprimido, name='contenido_comprimido'),
+    path('archivo/<int:archivo_id>/miembro/', views.descargar_miembro, name='descargar_miembro'),
     path('proyecto/<int:pk>/subir/', views.subir_archivos, name='subir_archivos'),
+    path('proyecto/<int:pk>/subidas/', views.subida_iniciar, name='subida_iniciar'),
+    path('subidas/<str:subida_id>/', views.subida_estado, name='subida_estado'),
+    path('subidas/<str:subida_id>/completar/', views.subida_completar, name='subida_completar'),
+    path('subidas/<str:subida_id>/<int:numero>/', views.subida_fragmento, name='subida_fragmento'),
 ]
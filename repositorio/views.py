@@ -1,17 +1,30 @@
-import hashlib
 import logging
 
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Count, F
-from django.http import JsonResponse, FileResponse
+from django.db.models import Prefetch
+from django.http import FileResponse, Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404
-from django.views.decorators.http import require_POST
-
-from OASIS.utils import get_client_ip
+from django.template.loader import render_to_string
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
+from rest_framework import viewsets
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.throttling import ScopedRateThrottle
+from rest_framework.utils.urls import replace_query_param
+
+from OASIS.utils import file_download_response, get_client_ip
+from . import audit, comprimidos, counters, previews, recomendaciones, results_cache, tareas, votos
 from .models import (
-    ProyectoGrado, ArchivoProyecto, TagHabilidad, RegistroDescarga,
-    CARRERA_CHOICES, CLUSTER_CHOICES, CARRERA_A_CLUSTER, CARRERA_A_PREVIEW,
+    ProyectoGrado, ArchivoProyecto, TagHabilidad, Voto,
+    CARRERA_CHOICES, CLUSTER_CHOICES,
 )
+from .facets import facetas_para, get_resumen_facetas
+from .filters import anotar_num_archivos, filtrar_explorador, hay_filtros, proyectos_publicados
+from .pagination import PAGE_SIZE, SORT_KEYS, paginate
+from .serializers import ProyectoGradoSearchSerializer
+from .suggest import sugerir
+from .uploads import HashingUploadHandler, SubidaError, SubidaFragmentada
 
 logger = logging.getLogger(__name__)
 
@@ -22,102 +35,135 @@ logger = logging.getLogger(__name__)
 
 def explorador(request):
     """Public repository explorer with faceted search and card grid."""
-    qs = ProyectoGrado.objects.filter(
-        estado=ProyectoGrado.EstadoProyecto.PUBLICADO
-    ).select_related('instructor_avalador', 'subido_por').prefetch_related('tags', 'archivos')
-
-    # ── Search ──
-    q = request.GET.get('q', '').strip()
-    if q:
-        qs = qs.filter(
-            Q(titulo__icontains=q) |
-            Q(descripcion__icontains=q) |
-            Q(autor__icontains=q) |
-            Q(herramientas_usadas__icontains=q) |
-            Q(ficha__icontains=q)
-        )
-
-    # ── Filters ──
-    carrera = request.GET.get('carrera', '')
-    if carrera:
-        qs = qs.filter(carrera=carrera)
-
-    cluster = request.GET.get('cluster', '')
-    if cluster:
-        carreras_in_cluster = [k for k, v in CARRERA_A_CLUSTER.items() if v == cluster]
-        qs = qs.filter(carrera__in=carreras_in_cluster)
-
-    anio = request.GET.get('anio', '')
-    if anio:
-        try:
-            qs = qs.filter(anio=int(anio))
-        except ValueError:
-            pass
-
-    tag = request.GET.get('tag', '')
-    if tag:
-        qs = qs.filter(tags__slug=tag)
-
-    preview_type = request.GET.get('tipo', '')
-    if preview_type:
-        carreras_with_type = [k for k, v in CARRERA_A_PREVIEW.items() if v == preview_type]
-        qs = qs.filter(carrera__in=carreras_with_type)
-
-    # ── Sort ──
-    sort = request.GET.get('sort', 'recientes')
-    sort_map = {
-        'recientes': '-fecha_publicacion',
-        'populares': '-votos',
-        'descargas': '-descargas',
-        'titulo': 'titulo',
-    }
-    qs = qs.order_by(sort_map.get(sort, '-fecha_publicacion'))
-
-    # ── Stats for sidebar (single query instead of N+1 per cluster) ──
-    total_count = qs.count()
-    all_published = ProyectoGrado.objects.filter(estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
-    carrera_counts = dict(
-        all_published.values_list('carrera').annotate(c=Count('id')).values_list('carrera', 'c')
-    )
-    cluster_display = dict(CLUSTER_CHOICES)
-    stats_by_cluster = {}
-    for carrera_key, count in carrera_counts.items():
-        ckey = CARRERA_A_CLUSTER.get(carrera_key, 'TICS')
-        if ckey not in stats_by_cluster:
-            stats_by_cluster[ckey] = {'name': cluster_display.get(ckey, ckey), 'count': 0}
-        stats_by_cluster[ckey]['count'] += count
-
-    available_years = (
-        all_published
-        .values_list('anio', flat=True)
-        .distinct()
-        .order_by('-anio')
-    )
-
-    popular_tags = (
-        TagHabilidad.objects
-        .filter(proyectos__estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
-        .annotate(num_proyectos=Count('proyectos'))
-        .order_by('-num_proyectos')[:20]
-    )
+    base = proyectos_publicados().select_related(
+        'instructor_avalador', 'subido_por'
+    ).prefetch_related('tags')
+    base = anotar_num_archivos(base)
+    qs, filtros = filtrar_explorador(base, request.GET)
+    sort = filtros['sort']
+    cursor = request.GET.get('cursor')
+    # Infinite scroll: later pages skip facets and counts, only the card grid.
+    parcial = bool(cursor) and request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+
+    # ── Result cache (ids + cursor + facets per filter combination) ──
+    cache_key = results_cache.clave(filtros, cursor, parcial)
+    entrada = results_cache.obtener(cache_key)
+    if entrada is not None:
+        por_id = base.in_bulk(entrada['ids'])
+        proyectos = [por_id[pk] for pk in entrada['ids'] if pk in por_id]
+        next_cursor, facetas = entrada['next'], entrada['facetas']
+    else:
+        # ── Keyset pagination ──
+        proyectos, next_cursor = paginate(qs, sort, cursor)
+        # ── Sidebar facets: precomputed when unfiltered, grouped queries otherwise ──
+        facetas = None
+        if not parcial:
+            facetas = facetas_para(qs) if hay_filtros(filtros) else get_resumen_facetas()
+        results_cache.guardar(cache_key, [p.pk for p in proyectos], next_cursor, facetas)
+
+    counters.aplicar_pendientes(proyectos)
+
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = f'?{params.urlencode()}'
+
+    if parcial:
+        html = render_to_string('repositorio/partials/proyecto_cards.html',
+                                {'proyectos': proyectos}, request=request)
+        response = JsonResponse({'html': html, 'next_url': next_url})
+        response['X-Cache'] = 'HIT' if entrada is not None else 'MISS'
+        return response
+
+    total_count = facetas['total']
 
     context = {
-        'proyectos': qs[:60],
+        'proyectos': proyectos,
+        'next_url': next_url,
         'total_count': total_count,
-        'query': q,
-        'selected_carrera': carrera,
-        'selected_cluster': cluster,
-        'selected_anio': anio,
-        'selected_tag': tag,
-        'selected_tipo': preview_type,
+        'query': filtros['q'],
+        'selected_carrera': filtros['carrera'],
+        'selected_cluster': filtros['cluster'],
+        'selected_anio': filtros['anio'],
+        'selected_tag': filtros['tag'],
+        'selected_tipo': filtros['tipo'],
         'selected_sort': sort,
         'carrera_choices': CARRERA_CHOICES,
         'cluster_choices': CLUSTER_CHOICES,
-        'stats_by_cluster': stats_by_cluster,
-        'available_years': available_years,
-        'popular_tags': popular_tags,
+        'stats_by_cluster': facetas['clusters'],
+        'carrera_facets': facetas['carreras'],
+        'available_years': facetas['anios'],
+        'popular_tags': facetas['tags'],
     }
-    return render(request, 'repositorio/explorador.html', context)
+    response = render(request, 'repositorio/explorador.html', context)
+    response['X-Cache'] = 'HIT' if entrada is not None else 'MISS'
+    return response
+
+
+def sugerencias(request):
+    """Typeahead for the explorer search box (in-memory prefix index, no DB)."""
+    q = request.GET.get('q', '')
+    resultados = [
+        {'tipo': e['tipo'], 'texto': e['texto'], 'url': e['url']}
+        for e in sugerir(q)
+    ]
+    return JsonResponse({'q': q, 'resultados': resultados})
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# API — JSON search with sparse fieldsets (/api/v1/repositorio/)
+# ═══════════════════════════════════════════════════════════════════════════
+
+class RepositorioSearchViewSet(viewsets.ViewSet):
+    """
+    Public JSON version of the explorer. Accepts the same filters
+    (q, carrera, cluster, anio, tag, tipo, sort), keyset ``cursor`` pagination
+    and ``fields=a,b,c`` to load and return only the requested columns.
+    """
+    permission_classes = [AllowAny]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = 'repositorio'
+    max_page_size = 100
+
+    def _cargar_solo(self, qs, fields, sort=None):
+        """Restricts ``qs`` to the columns/relations the requested fields need."""
+        columns = ProyectoGradoSearchSerializer.columns_for(fields) | {'id'}
+        if sort in SORT_KEYS:
+            columns.update(field for field, _ in SORT_KEYS[sort])
+        qs = qs.only(*columns)
+        if 'num_archivos' in fields:
+            qs = anotar_num_archivos(qs)
+        if 'tags' in fields:
+            qs = qs.prefetch_related(Prefetch('tags', queryset=TagHabilidad.objects.only('slug')))
+        return qs
+
+    def _page_size(self, request):
+        try:
+            size = int(request.query_params.get('page_size', PAGE_SIZE))
+        except ValueError:
+            return PAGE_SIZE
+        return max(1, min(size, self.max_page_size))
+
+    def list(self, request):
+        fields = ProyectoGradoSearchSerializer.resolve_fields(request.query_params.get('fields'))
+        qs, filtros = filtrar_explorador(proyectos_publicados(), request.query_params)
+        qs = self._cargar_solo(qs, fields, filtros['sort'])
+        items, cursor = paginate(qs, filtros['sort'], request.query_params.get('cursor'),
+                                 page_size=self._page_size(request))
+        next_url = None
+        if cursor:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', cursor)
+        counters.aplicar_pendientes(items)
+        serializer = ProyectoGradoSearchSerializer(items, many=True, context={'fields': fields})
+        return Response({'next': next_url, 'results': serializer.data})
+
+    def retrieve(self, request, pk=None):
+        fields = ProyectoGradoSearchSerializer.resolve_fields(request.query_params.get('fields'))
+        proyecto = get_object_or_404(self._cargar_solo(proyectos_publicados(), fields), pk=pk)
+        counters.aplicar_pendientes([proyecto])
+        serializer = ProyectoGradoSearchSerializer(proyecto, context={'fields': fields})
+        return Response(serializer.data)
 
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -132,32 +178,38 @@ def proyecto_detalle(request, pk):
         pk=pk,
     )
 
-    # Increment views
-    ProyectoGrado.objects.filter(pk=pk).update(vistas=F('vistas') + 1)
+    # Increment views (buffered; see counters.py)
+    counters.incrementar(pk, 'vistas')
 
-    archivos = proyecto.archivos.all()
+    # One pass over the prefetched files: group by version and by type
+    # (filtering the related manager would bypass the prefetch cache).
+    archivos = list(proyecto.archivos.all())
     archivos_by_version = {}
+    archivos_by_tipo = {}
     for a in archivos:
-        v = a.get_version_label_display()
-        archivos_by_version.setdefault(v, []).append(a)
+        archivos_by_version.setdefault(a.get_version_label_display(), []).append(a)
+        archivos_by_tipo.setdefault(a.tipo, []).append(a)
 
     # Separate file types for smart preview
-    images = archivos.filter(tipo='imagen')
-    code_files = archivos.filter(tipo='codigo')
-    documents = archivos.filter(tipo='documento')
-    videos = archivos.filter(tipo='video')
-    models_3d = archivos.filter(tipo='modelo_3d')
-
-    # Related projects (same career, excluding current)
-    related = (
-        ProyectoGrado.objects
-        .filter(carrera=proyecto.carrera, estado=ProyectoGrado.EstadoProyecto.PUBLICADO)
-        .exclude(pk=pk)
-        .order_by('-votos')[:4]
-    )
+    Tipo = ArchivoProyecto.TipoArchivo
+    images = archivos_by_tipo.get(Tipo.IMAGEN, [])
+    code_files = archivos_by_tipo.get(Tipo.CODIGO, [])
+    documents = archivos_by_tipo.get(Tipo.DOCUMENTO, [])
+    videos = archivos_by_tipo.get(Tipo.VIDEO, [])
+    models_3d = archivos_by_tipo.get(Tipo.MODELO_3D, [])
+
+    # Highlighted prefix of the first source file (cached by hash; see previews.py)
+    code_preview = None
+    if proyecto.preview_type == 'CODE' and code_files:
+        code_preview = previews.vista_previa(code_files[0])
+
+    # Related projects (precomputed offline; see recomendaciones.py)
+    related = recomendaciones.relacionados_de(proyecto)
+    counters.aplicar_pendientes([proyecto, *related])
 
     can_edit = False
     can_download = True
+    ya_votado = False
     if request.user.is_authenticated:
         user = request.user
         can_edit = (
@@ -165,6 +217,7 @@ def proyecto_detalle(request, pk):
             user == proyecto.subido_por or
             user == proyecto.instructor_avalador
         )
+        ya_votado = Voto.objects.filter(usuario=user, proyecto_id=pk).exists()
         # All authenticated users can download
         can_download = True
     else:
@@ -177,11 +230,14 @@ def proyecto_detalle(request, pk):
         'archivos_by_version': archivos_by_version,
         'images': images,
         'code_files': code_files,
+        'code_preview': code_preview,
+        'code_preview_css': previews.CSS if code_preview and code_preview['html'] else '',
         'documents': documents,
         'videos': videos,
         'models_3d': models_3d,
         'related': related,
         'can_edit': can_edit,
+        'ya_votado': ya_votado,
         'can_download': can_download,
         'preview_type': proyecto.preview_type,
     }
@@ -194,21 +250,72 @@ def proyecto_detalle(request, pk):
 
 @login_required
 def descargar_archivo(request, archivo_id):
-    """Download a project file with permission check and audit logging."""
+    """
+    Download a project file with permission check and audit logging.
+    Supports Range / If-Range / If-None-Match (ETag = SHA-256 of the file);
+    ``?inline=1`` serves it for in-page playback instead of as an attachment
+    and is not counted: the detail page's <video preload="metadata"> fetches
+    it on every view.
+    """
     archivo = get_object_or_404(ArchivoProyecto.objects.select_related('proyecto'), pk=archivo_id)
 
-    # Log the download
-    RegistroDescarga.objects.create(
-        archivo=archivo,
-        usuario=request.user,
-        ip_address=get_client_ip(request),
+    inline = request.GET.get('inline') == '1'
+    etag = f'"{archivo.hash_sha256}"' if archivo.hash_sha256 else None
+    response = file_download_response(
+        archivo.archivo.path, archivo.nombre_original, request=request, etag=etag,
+        as_attachment=not inline,
     )
 
-    # Increment download counter on the project
-    ProyectoGrado.objects.filter(pk=archivo.proyecto_id).update(descargas=F('descargas') + 1)
+    # Seeks and resumed transfers (Range past byte 0) and 304s are not new downloads.
+    rango = request.headers.get('Range', '').replace(' ', '')
+    if (not inline and response.status_code in (200, 206)
+            and (not rango or rango.startswith('bytes=0-'))):
+        # Log the download (queued, written in batches; see audit.py)
+        audit.registrar_descarga(archivo.pk, request.user.pk, get_client_ip(request))
+
+        # Increment download counter on the project (buffered; see counters.py)
+        counters.incrementar(archivo.proyecto_id, 'descargas')
+
+    return response
+
+
+def _comprimido_o_404(archivo_id):
+    return get_object_or_404(ArchivoProyecto, pk=archivo_id,
+                             tipo=ArchivoProyecto.TipoArchivo.COMPRIMIDO)
 
-    response = FileResponse(archivo.archivo.open('rb'), as_attachment=True,
-                            filename=archivo.nombre_original)
+
+@require_GET
+def contenido_comprimido(request, archivo_id):
+    """One directory level of an indexed archive (JSON; tree on the detail page)."""
+    archivo = _comprimido_o_404(archivo_id)
+    directorio = request.GET.get('dir', '').strip('/')
+    subdirectorios, miembros = comprimidos.listar_directorio(archivo, directorio)
+    return JsonResponse({
+        'dir': directorio,
+        'directorios': [{'nombre': nombre, 'archivos': n} for nombre, n in subdirectorios],
+        'archivos': [
+            {'nombre': m.nombre, 'ruta': m.ruta, 'tamano': m.tamano, 'size': m.size_display}
+            for m in miembros
+        ],
+    })
+
+
+@login_required
+@require_GET
+def descargar_miembro(request, archivo_id):
+    """Streams one member out of an indexed archive, without extracting it."""
+    archivo = _comprimido_o_404(archivo_id)
+    if archivo.scan_status == 'suspicious':
+        return JsonResponse({'ok': False, 'error': 'Archivo marcado como sospechoso.'}, status=403)
+    miembro = get_object_or_404(archivo.miembros, ruta=request.GET.get('ruta', ''))
+    try:
+        stream = comprimidos.abrir_miembro(archivo, miembro.ruta)
+    except FileNotFoundError:
+        raise Http404('Archivo no encontrado en el comprimido.')
+    response = FileResponse(stream, as_attachment=True, filename=miembro.nombre)
+    if comprimidos.formato_de(archivo.nombre_original) != 'gz':  # gzip sizes wrap at 4 GB
+        response['Content-Length'] = miembro.tamano
+    audit.registrar_descarga(archivo.pk, request.user.pk, get_client_ip(request))
     return response
 
 
@@ -216,59 +323,34 @@ def descargar_archivo(request, archivo_id):
 # UPLOAD — Version-Aware File Upload
 # ═══════════════════════════════════════════════════════════════════════════
 
-@login_required
-@require_POST
+@csrf_exempt
 def subir_archivos(request, pk):
     """Upload files to a project (owners, instructors, admins)."""
+    # Handlers must be set before anything reads the body, including the CSRF
+    # check, which _subir_archivos runs with csrf_protect.
+    request.upload_handlers = [HashingUploadHandler(request)]
+    return _subir_archivos(request, pk)
+
+
+@csrf_protect
+@login_required
+@require_POST
+def _subir_archivos(request, pk):
     proyecto = get_object_or_404(ProyectoGrado, pk=pk)
 
     user = request.user
-    if not (user.es_admin or user == proyecto.subido_por or user == proyecto.instructor_avalador):
+    if not _puede_subir(user, proyecto):
         return JsonResponse({'error': 'No tienes permisos para subir archivos a este proyecto.'}, status=403)
 
     files = request.FILES.getlist('archivos')
+    rechazado = getattr(request, 'upload_rechazado', None)
+    if rechazado:
+        return JsonResponse({'error': f'Tipo de archivo no permitido: {rechazado}'}, status=400)
     if not files:
         return JsonResponse({'error': 'No se seleccionaron archivos.'}, status=400)
 
-    version_label = request.POST.get('version', ProyectoGrado.VersionLabel.V1)
-    if version_label not in dict(ProyectoGrado.VersionLabel.choices):
-        version_label = ProyectoGrado.VersionLabel.V1
-
-    created = []
-    for f in files:
-        # Hash the file
-        sha256 = hashlib.sha256()
-        for chunk in f.chunks():
-            sha256.update(chunk)
-        file_hash = sha256.hexdigest()
-        f.seek(0)  # Reset file pointer after hashing
-
-        archivo = ArchivoProyecto(
-            proyecto=proyecto,
-            archivo=f,
-            nombre_original=f.name,
-            size_bytes=f.size,
-            hash_sha256=file_hash,
-            version_label=version_label,
-            subido_por=user,
-        )
-        archivo.tipo = archivo.detect_tipo()
-
-        # Simulated anti-malware scan
-        suspicious_extensions = ['exe', 'bat', 'cmd', 'com', 'scr', 'pif', 'vbs', 'msi']
-        if archivo.extension in suspicious_extensions:
-            archivo.scan_status = 'suspicious'
-        else:
-            archivo.scan_status = 'clean'
-
-        archivo.save()
-        created.append({
-            'id': archivo.pk,
-            'name': archivo.nombre_original,
-            'size': archivo.size_display,
-            'type': archivo.tipo,
-            'scan': archivo.scan_status,
-        })
+    version_label = _version_valida(request.POST.get('version'))
+    created = [_guardar_archivo(proyecto, f, version_label, user) for f in files]
 
     return JsonResponse({
         'ok': True,
@@ -277,21 +359,145 @@ def subir_archivos(request, pk):
     })
 
 
+def _puede_subir(user, proyecto):
+    return user.es_admin or user == proyecto.subido_por or user == proyecto.instructor_avalador
+
+
+def _version_valida(version_label):
+    if version_label not in dict(ProyectoGrado.VersionLabel.choices):
+        return ProyectoGrado.VersionLabel.V1
+    return version_label
+
+
+def _guardar_archivo(proyecto, f, version_label, user):
+    """
+    Stores a streamed or assembled upload and queues its post-processing
+    (scan, ...) for the `procesar_tareas` worker; scan_status stays pending.
+    """
+    # Size, type and hash come from the upload (HashingUploadHandler or a
+    # chunked upload); hash_sha256 is set on save by the content-addressed path.
+    archivo = ArchivoProyecto(
+        proyecto=proyecto,
+        archivo=f,
+        nombre_original=f.name,
+        size_bytes=f.size,
+        tipo=f.tipo,
+        version_label=version_label,
+        subido_por=user,
+    )
+    archivo.save()
+    tareas.encolar(archivo)
+    return {
+        'id': archivo.pk,
+        'name': archivo.nombre_original,
+        'size': archivo.size_display,
+        'type': archivo.tipo,
+        'scan': archivo.scan_status,
+    }
+
+
 # ═══════════════════════════════════════════════════════════════════════════
-# VOTE — Ajax voting
+# RESUMABLE UPLOAD — Chunked protocol for large files (see uploads.py)
 # ═══════════════════════════════════════════════════════════════════════════
 
+def _subida_de(request, subida_id):
+    """The caller's upload, or SubidaError 404 (other users' ids do not exist)."""
+    subida = SubidaFragmentada.cargar(subida_id)
+    if subida.estado['usuario'] != request.user.pk:
+        raise SubidaError('Subida no encontrada.', status=404)
+    return subida
+
+
 @login_required
 @require_POST
-def votar_proyecto(request, pk):
-    """Vote for a project (one vote per user, stored in session)."""
+def subida_iniciar(request, pk):
+    """Starts a resumable upload: nombre, tamano[, sha256, version]."""
     proyecto = get_object_or_404(ProyectoGrado, pk=pk)
+    if not _puede_subir(request.user, proyecto):
+        return JsonResponse({'error': 'No tienes permisos para subir archivos a este proyecto.'}, status=403)
+    try:
+        tamano = int(request.POST.get('tamano', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Tamano de archivo no valido.'}, status=400)
+    try:
+        subida = SubidaFragmentada.crear(
+            proyecto.pk, request.user.pk, request.POST.get('nombre', '').strip(), tamano,
+            sha256=request.POST.get('sha256', ''),
+            version=_version_valida(request.POST.get('version')),
+        )
+    except SubidaError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    return JsonResponse(subida.resumen(), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'DELETE'])
+def subida_estado(request, subida_id):
+    """GET: chunks received so far (to resume). DELETE: abort the upload."""
+    try:
+        subida = _subida_de(request, subida_id)
+    except SubidaError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    if request.method == 'DELETE':
+        subida.descartar()
+        return JsonResponse({'ok': True})
+    return JsonResponse(subida.resumen())
 
-    voted_key = f'voted_{pk}'
-    if request.session.get(voted_key):
-        return JsonResponse({'ok': False, 'error': 'Ya votaste por este proyecto.', 'votos': proyecto.votos})
 
-    ProyectoGrado.objects.filter(pk=pk).update(votos=F('votos') + 1)
-    request.session[voted_key] = True
-    proyecto.refresh_from_db()
-    return JsonResponse({'ok': True, 'votos': proyecto.votos})
+@login_required
+@require_http_methods(['PUT'])
+def subida_fragmento(request, subida_id, numero):
+    """Receives chunk ``numero`` as the raw request body."""
+    try:
+        subida = _subida_de(request, subida_id)
+        longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+        subida.recibir(numero, request, longitud, request.headers.get('X-Chunk-SHA256', ''))
+    except SubidaError as e:
+        return JsonResponse({'error': str(e), 'recibidos': _recibidos(subida_id)}, status=e.status)
+    return JsonResponse(subida.resumen())
+
+
+def _recibidos(subida_id):
+    try:
+        return SubidaFragmentada.cargar(subida_id).estado['recibidos']
+    except SubidaError:
+        return None
+
+
+@login_required
+@require_POST
+def subida_completar(request, subida_id):
+    """Assembles the upload into an ArchivoProyecto once every chunk arrived."""
+    try:
+        subida = _subida_de(request, subida_id)
+        proyecto = get_object_or_404(ProyectoGrado, pk=subida.estado['proyecto'])
+        if not _puede_subir(request.user, proyecto):
+            return JsonResponse({'error': 'No tienes permisos para subir archivos a este proyecto.'},
+                                status=403)
+        creado = subida.completar(lambda f: _guardar_archivo(
+            proyecto, f, subida.estado['version'], request.user,
+        ))
+    except SubidaError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+    return JsonResponse({
+        'ok': True,
+        'message': '1 archivo(s) subidos correctamente.',
+        'archivos': [creado],
+    })
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# VOTE — Ajax voting
+# ═══════════════════════════════════════════════════════════════════════════
+
+@login_required
+@require_POST
+def votar_proyecto(request, pk):
+    """Vote for a project (one Voto row per user; the count is buffered)."""
+    if votos.registrar_voto(request.user.pk, pk):
+        counters.incrementar(pk, 'votos')
+        return JsonResponse({'ok': True, 'votado': True})
+
+    # Not inserted: already voted, or no such project.
+    get_object_or_404(ProyectoGrado.objects.only('pk'), pk=pk)
+    return JsonResponse({'ok': False, 'error': 'Ya votaste por este proyecto.', 'votado': True})
@@ -0,0 +1,32 @@
+"""
+OASIS Repositorio — Project votes.
+
+A vote is a Voto row, unique per (usuario, proyecto). ``registrar_voto``
+inserts it with a single INSERT ... SELECT that the database ignores on a
+duplicate (``ON CONFLICT DO NOTHING`` on SQLite/PostgreSQL, ``INSERT IGNORE``
+on MySQL), so the row count alone says whether the vote is new. The
+ProyectoGrado row is never locked or re-read on this path: the ``votos``
+counter is advanced through the buffered counters (counters.py).
+"""
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import ProyectoGrado, Voto
+
+
+def registrar_voto(usuario_id, proyecto_id):
+    """
+    True if the vote was recorded; False if the user had already voted or the
+    project does not exist.
+    """
+    columnas = ', '.join(Voto._meta.get_field(f).column for f in ('usuario', 'proyecto', 'fecha'))
+    select = f'SELECT %s, id, %s FROM {ProyectoGrado._meta.db_table} WHERE id = %s'
+    if connection.vendor == 'mysql':
+        sql = f'INSERT IGNORE INTO {Voto._meta.db_table} ({columnas}) {select}'
+    else:
+        sql = f'INSERT INTO {Voto._meta.db_table} ({columnas}) {select} ON CONFLICT DO NOTHING'
+    fecha = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [usuario_id, fecha, proyecto_id])
+        return cursor.rowcount == 1
@@ -12,7 +12,7 @@ from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.db.models import Count
 from django.db.models.functions import TruncMonth, ExtractHour, ExtractWeekDay
-from django.http import JsonResponse, FileResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.utils import timezone
 from django.utils.http import url_has_allowed_host_and_scheme
@@ -20,7 +20,7 @@ from django.views.decorators.http import require_http_methods, require_POST
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 
-from OASIS.utils import get_client_ip
+from OASIS.utils import file_download_response, get_client_ip
 from .forms import LoginForm, EmpresaRegistroForm
 from .models import Usuario
 
@@ -472,10 +472,12 @@ def admin_rechazar_empresa(request, pk):
 def admin_toggle_destacado(request, pk):
     """Toggle destacado de un proyecto de grado."""
 
+    from OASIS.views import invalidar_index
     from repositorio.models import ProyectoGrado
     proyecto = get_object_or_404(ProyectoGrado, pk=pk)
     proyecto.destacado = not proyecto.destacado
     proyecto.save(update_fields=['destacado'])
+    invalidar_index()
     logger.info(f"Proyecto {'destacado' if proyecto.destacado else 'no-destacado'}: {proyecto.titulo} (ID={pk})")
     return JsonResponse({'ok': True, 'destacado': proyecto.destacado})
 
@@ -544,11 +546,7 @@ def admin_backup_download(request, pk):
     if not filepath.exists():
         return JsonResponse({'error': 'Archivo no encontrado'}, status=404)
 
-    response = FileResponse(
-        filepath.open('rb'),
-        as_attachment=True,
-        filename=record.filename,
-    )
+    response = file_download_response(filepath, record.filename)
     logger.info(f"Backup descargado: {record.filename} por {request.user.username}")
     return response
 